@@ -0,0 +1,137 @@
+"""Move message image data to blob store
+
+Revision ID: 3f1c9a7d2b64
+Revises: 8a7f82bd7da8
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+import base64
+import hashlib
+import os
+import tempfile
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b64'
+down_revision: Union[str, None] = '8a7f82bd7da8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 한 번에 메모리에 올릴 이미지 행 수
+BATCH_SIZE = 200
+DEFAULT_BLOB_STORE_PATH = './data/blobs'
+
+message_images = sa.table(
+    'message_images',
+    sa.column('id', sa.Integer),
+    sa.column('data', sa.Text),
+    sa.column('blob_key', sa.String),
+)
+
+
+def _blob_root() -> str:
+    """Blob 저장 위치 (BLOB_STORE_PATH 환경 변수 > alembic.ini의 blob_store_path > 기본값)
+
+    런타임 Settings 전체를 읽지 않도록 app 설정 대신 직접 조회 (앱의 LocalBlobStore와 같은 경로 규칙)
+    """
+    path = os.environ.get('BLOB_STORE_PATH') or op.get_context().config.get_main_option('blob_store_path')
+    return os.path.abspath(path or DEFAULT_BLOB_STORE_PATH)
+
+
+def _blob_path(root: str, key: str) -> str:
+    return os.path.join(root, key[:2], key[2:4], key)
+
+
+def _put_blob(root: str, data: bytes) -> str:
+    """콘텐츠 키로 저장 (이미 있으면 그대로 사용, 임시 파일에 쓴 뒤 원자적으로 교체)"""
+    key = hashlib.sha256(data).hexdigest()
+    path = _blob_path(root, key)
+    if os.path.exists(path):
+        return key
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return key
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('message_images', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('blob_key', sa.String(length=64), nullable=True))
+        batch_op.alter_column('data', existing_type=sa.Text(), nullable=True)
+        batch_op.create_index('ix_message_images_blob_key', ['blob_key'], unique=False)
+
+    # 기존 base64 데이터를 배치 단위로 Blob 저장소로 이동
+    # 스키마 변경을 먼저 커밋하고 행마다 바로 커밋해서, 긴 트랜잭션 없이 중단되어도 남은 행부터 다시 진행
+    root = _blob_root()
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(message_images.c.id, message_images.c.data)
+                .where(
+                    message_images.c.id > last_id,
+                    message_images.c.blob_key.is_(None),
+                    message_images.c.data.isnot(None)
+                )
+                .order_by(message_images.c.id)
+                .limit(BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+
+            for row in rows:
+                blob_key = _put_blob(root, base64.b64decode(row.data))
+                bind.execute(
+                    message_images.update()
+                    .where(message_images.c.id == row.id)
+                    .values(blob_key=blob_key, data=None)
+                )
+            last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    # Blob 저장소의 데이터를 base64 컬럼으로 복원 (Blob 파일은 삭제하지 않음)
+    root = _blob_root()
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(message_images.c.id, message_images.c.blob_key)
+                .where(
+                    message_images.c.id > last_id,
+                    message_images.c.blob_key.isnot(None)
+                )
+                .order_by(message_images.c.id)
+                .limit(BATCH_SIZE)
+            ).fetchall()
+            if not rows:
+                break
+
+            for row in rows:
+                with open(_blob_path(root, row.blob_key), 'rb') as blob_file:
+                    data = base64.b64encode(blob_file.read()).decode('utf-8')
+                bind.execute(
+                    message_images.update()
+                    .where(message_images.c.id == row.id)
+                    .values(data=data)
+                )
+            last_id = rows[-1].id
+
+    with op.batch_alter_table('message_images', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_images_blob_key')
+        batch_op.alter_column('data', existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column('blob_key')
@@ -0,0 +1,41 @@
+"""Add usage records table
+
+Revision ID: 5b8e2d4c9a13
+Revises: 3f1c9a7d2b64
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2d4c9a13'
+down_revision: Union[str, None] = '3f1c9a7d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('usage_records',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.String(length=50), nullable=False),
+    sa.Column('provider', sa.String(length=20), nullable=False),
+    sa.Column('model_name', sa.String(length=100), nullable=True),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('input_tokens', sa.Integer(), nullable=False),
+    sa.Column('output_tokens', sa.Integer(), nullable=False),
+    sa.Column('weighted_tokens', sa.Integer(), nullable=False),
+    sa.Column('request_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_usage_records_user_provider_bucket', 'usage_records', ['user_id', 'provider', 'bucket_start'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_usage_records_user_provider_bucket', table_name='usage_records')
+    op.drop_table('usage_records')
@@ -0,0 +1,36 @@
+"""Add blacklisted_on index to blacklist_tokens
+
+Revision ID: a4c8e1f6b925
+Revises: e8b2d6f4a317
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c8e1f6b925'
+down_revision: Union[str, None] = 'e8b2d6f4a317'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_blacklist_table() -> bool:
+    # blacklist_tokens는 이전 마이그레이션에서 만들지 않으므로 (모델 create_all로 생성) 없으면 건너뜀
+    return sa.inspect(op.get_bind()).has_table('blacklist_tokens')
+
+
+def upgrade() -> None:
+    if not _has_blacklist_table():
+        return
+    # 블랙리스트 캐시 증분 갱신: WHERE blacklisted_on >= ?
+    op.create_index('ix_blacklist_tokens_blacklisted_on', 'blacklist_tokens', ['blacklisted_on'], unique=False)
+
+
+def downgrade() -> None:
+    if not _has_blacklist_table():
+        return
+    op.drop_index('ix_blacklist_tokens_blacklisted_on', table_name='blacklist_tokens', if_exists=True)
@@ -0,0 +1,34 @@
+"""Add message_seq counter to chats
+
+Revision ID: c7e3f5a9b812
+Revises: 9d4a6c1e7f20
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e3f5a9b812'
+down_revision: Union[str, None] = '9d4a6c1e7f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('chats', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('message_seq', sa.Integer(), server_default='0', nullable=False))
+
+    # 기존 채팅은 마지막 메시지 순서부터 이어서 할당
+    op.execute(
+        "UPDATE chats SET message_seq = COALESCE("
+        "(SELECT MAX(messages.message_order) FROM messages WHERE messages.chat_id = chats.id), 0)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('chats', schema=None) as batch_op:
+        batch_op.drop_column('message_seq')
@@ -0,0 +1,30 @@
+"""Add chat list and message image indexes
+
+Revision ID: e8b2d6f4a317
+Revises: c7e3f5a9b812
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b2d6f4a317'
+down_revision: Union[str, None] = 'c7e3f5a9b812'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 채팅 목록: WHERE user_id = ? ORDER BY updated_at DESC LIMIT n 을 인덱스 역방향 탐색으로 처리
+    op.create_index('ix_chats_user_id_updated_at', 'chats', ['user_id', 'updated_at'], unique=False)
+    # 메시지 이미지 selectinload (message_id IN (...)) 및 메시지 삭제 시 CASCADE 탐색
+    op.create_index('ix_message_images_message_id', 'message_images', ['message_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_message_images_message_id', table_name='message_images')
+    op.drop_index('ix_chats_user_id_updated_at', table_name='chats')
@@ -1,66 +1,62 @@
-from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form, Request
+from fastapi import APIRouter, HTTPException, Depends, File, UploadFile, Form, Header, Request, Response
 from fastapi.responses import StreamingResponse
-from typing import List, Optional, AsyncGenerator
+from typing import Dict, List, Optional, AsyncGenerator, Set, Tuple
+from contextlib import aclosing
 import asyncio
+import copy
 import json
 import base64
-from sqlalchemy.orm import Session
+import logging
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.ai_schemas import (
     TextGenerationRequest,
     TextGenerationResponse,
     MultiTextGenerationResponse,
+    ProviderErrorResponse,
     ProviderStatusResponse,
     ChatGenerationRequest,
+    ChatCompareRequest,
     ChatMessage
 )
 from app.services.ai_manager import ai_manager
-from app.core.database import get_db
+from app.services.ai_service import AIResponse
+from app.services.context_builder import (
+    MESSAGE_OVERHEAD_TOKENS,
+    estimate_tokens,
+    get_history_budget,
+    build_history_messages
+)
+from app.core.config import settings
+from app.core.database import get_async_db, AsyncSessionLocal
+from app.core.metrics import metrics
 from app.core.auth import get_current_user
 from app.models.user import User
-from app.core.rate_limiter import limiter, RateLimits
-from app.models.chat import Chat
-from app.models.message import Message
-from app.models.message_image import MessageImage
-from app.crud.api_key_crud import get_api_key, decrypt_api_key
+from app.core.sse import ChunkCoalescer, ClientDisconnected, get_flush_policy, sse_frame, watch_disconnect
+from app.core.rate_limiter import limiter, RateLimits, get_authenticated_user_id
+from app.services.key_vault import key_vault
+from app.services.quota import quota_manager, QuotaExceeded
+from app.services.stream_registry import ResumableStream, stream_registry
+from app.services.turn_writer import ChatTurn, turn_writer
+from app.crud.chat_crud import (
+    get_chat_async,
+    store_image_blobs
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/ai", tags=["AI Services"])
 
+SUPPORTED_PROVIDERS = ("openai", "anthropic", "google")
+
 @router.get("/providers", response_model=ProviderStatusResponse)
 async def get_available_providers(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """사용 가능한 AI 서비스 제공자 목록"""
     try:
-        # 사용자의 API 키들을 가져와서 확인
-        user_api_keys = {}
-        
-        # OpenAI API 키 확인
-        openai_key = get_api_key(db, current_user.id, "openai")
-        if openai_key:
-            try:
-                decrypted_key = decrypt_api_key(openai_key.encrypted_key)
-                user_api_keys["openai"] = decrypted_key
-            except Exception:
-                pass  # 복호화 실패 시 해당 키는 사용 불가
-        
-        # Anthropic API 키 확인  
-        anthropic_key = get_api_key(db, current_user.id, "anthropic")
-        if anthropic_key:
-            try:
-                decrypted_key = decrypt_api_key(anthropic_key.encrypted_key)
-                user_api_keys["anthropic"] = decrypted_key
-            except Exception:
-                pass
-            
-        # Google API 키 확인
-        google_key = get_api_key(db, current_user.id, "google")
-        if google_key:
-            try:
-                decrypted_key = decrypt_api_key(google_key.encrypted_key)
-                user_api_keys["google"] = decrypted_key
-            except Exception:
-                pass
+        # 사용자의 API 키들을 한 번에 가져와서 확인 (복호화 실패한 키는 제외됨)
+        user_api_keys = await _get_provider_keys(db, current_user.id)
         
         # AI 매니저를 통해 사용 가능한 서비스 확인
         available_providers = ai_manager.get_available_services(user_api_keys)
@@ -73,35 +69,18 @@ async def get_available_providers(
         raise HTTPException(status_code=500, detail=f"Failed to get providers: {str(e)}")
 
 @router.post("/generate", response_model=TextGenerationResponse)
-@limiter.limit(RateLimits.AI_GENERATE)
+@limiter.limit(RateLimits.AI_GENERATE, key_func=get_authenticated_user_id)
 async def generate_text(
     request: Request,
+    http_response: Response,
     generation_request: TextGenerationRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """단일 AI 서비스로 텍스트 생성"""
     try:
-        # 사용자의 API 키를 가져와서 AI 매니저에 전달
-        user_api_keys = {}
-        
-        # 요청된 제공자에 따라 API 키 가져오기
-        provider_key = None
-        if generation_request.provider == "openai":
-            api_key_record = get_api_key(db, current_user.id, "openai")
-            if api_key_record:
-                provider_key = decrypt_api_key(api_key_record.encrypted_key)
-                user_api_keys["openai"] = provider_key
-        elif generation_request.provider == "anthropic":
-            api_key_record = get_api_key(db, current_user.id, "anthropic")
-            if api_key_record:
-                provider_key = decrypt_api_key(api_key_record.encrypted_key)
-                user_api_keys["anthropic"] = provider_key
-        elif generation_request.provider == "google":
-            api_key_record = get_api_key(db, current_user.id, "google")
-            if api_key_record:
-                provider_key = decrypt_api_key(api_key_record.encrypted_key)
-                user_api_keys["google"] = provider_key
+        # 요청된 제공자의 사용자 API 키 가져오기
+        provider_key = await _get_provider_key(db, current_user.id, generation_request.provider)
         
         if not provider_key:
             raise HTTPException(
@@ -109,6 +88,12 @@ async def generate_text(
                 detail=f"No API key found for provider {generation_request.provider}"
             )
         
+        # 요청 전 토큰 예산 확인
+        input_tokens = _estimate_input_tokens(
+            [{"content": generation_request.prompt}], generation_request.system_prompt
+        )
+        await quota_manager.check(db, current_user.id, generation_request.provider, input_tokens)
+        
         # AI 매니저를 통해 텍스트 생성
         response = await ai_manager.generate_text(
             prompt=generation_request.prompt,
@@ -120,6 +105,14 @@ async def generate_text(
             system_prompt=generation_request.system_prompt
         )
         
+        # 사용량 기록 및 남은 예산 헤더
+        _record_usage(
+            current_user.id, response.provider, response.model, response,
+            [{"content": generation_request.prompt}], generation_request.system_prompt, response.content
+        )
+        quota_status = await quota_manager.get_status(db, current_user.id, response.provider)
+        http_response.headers.update(quota_status.headers())
+        
         return TextGenerationResponse(
             content=response.content,
             provider=response.provider,
@@ -127,39 +120,23 @@ async def generate_text(
             tokens_used=response.tokens_used
         )
         
+    except QuotaExceeded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Text generation failed: {str(e)}")
 
 @router.post("/generate-multi", response_model=MultiTextGenerationResponse)
-@limiter.limit(RateLimits.AI_GENERATE_MULTI)
+@limiter.limit(RateLimits.AI_GENERATE_MULTI, key_func=get_authenticated_user_id)
 async def generate_text_multi(
     request: Request,
     generation_request: TextGenerationRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """여러 AI 서비스로 동시 텍스트 생성"""
     try:
-        # 사용자의 API 키들을 가져와서 확인
-        user_api_keys = {}
-        
-        # OpenAI API 키 확인
-        openai_key = get_api_key(db, current_user.id, "openai")
-        if openai_key:
-            decrypted_key = decrypt_api_key(openai_key.encrypted_key)
-            user_api_keys["openai"] = decrypted_key
-        
-        # Anthropic API 키 확인  
-        anthropic_key = get_api_key(db, current_user.id, "anthropic")
-        if anthropic_key:
-            decrypted_key = decrypt_api_key(anthropic_key.encrypted_key)
-            user_api_keys["anthropic"] = decrypted_key
-            
-        # Google API 키 확인
-        google_key = get_api_key(db, current_user.id, "google")
-        if google_key:
-            decrypted_key = decrypt_api_key(google_key.encrypted_key)
-            user_api_keys["google"] = decrypted_key
+        # 사용자의 API 키들을 한 번에 가져와서 확인
+        user_api_keys = await _get_provider_keys(db, current_user.id)
         
         if not user_api_keys:
             raise HTTPException(
@@ -167,8 +144,20 @@ async def generate_text_multi(
                 detail="No API keys found. Please add at least one AI service API key."
             )
         
+        # 토큰 예산을 초과한 제공자는 제외
+        input_tokens = _estimate_input_tokens(
+            [{"content": generation_request.prompt}], generation_request.system_prompt
+        )
+        quota_errors = []
+        for provider in list(user_api_keys):
+            try:
+                await quota_manager.check(db, current_user.id, provider, input_tokens)
+            except QuotaExceeded as e:
+                del user_api_keys[provider]
+                quota_errors.append(ProviderErrorResponse(provider=provider, error=str(e)))
+        
         # AI 매니저를 통해 여러 서비스로 동시 생성
-        responses = await ai_manager.generate_text_multi(
+        result = await ai_manager.generate_text_multi(
             prompt=generation_request.prompt,
             max_tokens=generation_request.max_tokens,
             temperature=generation_request.temperature,
@@ -176,142 +165,320 @@ async def generate_text_multi(
             system_prompt=generation_request.system_prompt
         )
         
-        return MultiTextGenerationResponse(responses=responses)
+        responses = [
+            TextGenerationResponse(
+                content=response.content,
+                provider=response.provider,
+                model=response.model,
+                tokens_used=response.tokens_used
+            )
+            for response in result.responses
+        ]
+        
+        for response in result.responses:
+            _record_usage(
+                current_user.id, response.provider, response.model, response,
+                [{"content": generation_request.prompt}], generation_request.system_prompt, response.content
+            )
+        
+        return MultiTextGenerationResponse(
+            responses=responses,
+            total_tokens=sum(response.tokens_used or 0 for response in responses),
+            errors=quota_errors + [
+                ProviderErrorResponse(provider=e.provider, error=e.error, timed_out=e.timed_out)
+                for e in result.errors
+            ],
+            deadline_exceeded=result.deadline_exceeded
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Multi-text generation failed: {str(e)}")
 
 # 모든 채팅 요청은 이제 스트리밍 방식만 지원
 
+# 연결이 끊겨도 재연결 대기 시간 동안 생성을 유지하도록 요청하는 헤더 (없으면 연결 종료 즉시 취소)
+RESUMABLE_STREAM_HEADER = "X-Stream-Resumable"
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"  # nginx 버퍼링 비활성화
+}
+
+def _sse_error_response(error_message: str) -> StreamingResponse:
+    """스트리밍 시작 전 에러를 SSE 형식으로 반환"""
+    async def error_generator():
+        yield sse_frame({'type': 'error', 'error': error_message})
+    return StreamingResponse(
+        error_generator(), 
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
+    )
+
+async def _parse_chat_form(request: Request) -> tuple:
+    """채팅 요청 본문 파싱 (multipart/form-data 또는 JSON)
+
+    Returns:
+        (요청 필드 dict, 업로드 이미지 목록 또는 None)
+    """
+    content_type = request.headers.get("content-type", "")
+    
+    if content_type.startswith("multipart/form-data"):
+        # FormData로 온 경우 - 이미지가 포함된 요청
+        form = await request.form()
+        body = {
+            "message": form.get("message"),
+            "max_tokens": int(form.get("max_tokens", 1000)),
+            "temperature": float(form.get("temperature", 0.7)),
+            "system_prompt": form.get("system_prompt"),
+            "include_history": form.get("include_history", "true").lower() == "true"
+        }
+        if form.get("provider"):
+            body["provider"] = form.get("provider")
+        if form.get("model"):
+            body["model"] = form.get("model")
+        if form.get("targets"):
+            body["targets"] = json.loads(form.get("targets"))
+        images = form.getlist("images") if "images" in form else None
+        return body, images
+    
+    # JSON으로 온 경우 - 텍스트만
+    body = await request.json()
+    
+    # 기본값 설정
+    body.setdefault('max_tokens', 1000)
+    body.setdefault('temperature', 0.7)
+    body.setdefault('include_history', True)
+    return body, None
+
+async def _get_provider_keys(db: AsyncSession, user_id: str) -> Dict[str, str]:
+    """지원하는 제공자의 복호화된 API 키 (키 보관소 캐시 사용)"""
+    keys = await key_vault.get_keys(db, user_id)
+    return {provider: key for provider, key in keys.items() if provider in SUPPORTED_PROVIDERS and key}
+
+async def _get_provider_key(db: AsyncSession, user_id: str, provider: str) -> Optional[str]:
+    """사용자의 제공자 API 키 (키 보관소 캐시 사용)"""
+    return await key_vault.get_key(db, user_id, provider)
+
+def _estimate_input_tokens(messages: List[dict], system_prompt: Optional[str]) -> int:
+    """제공자에 전달되는 입력 토큰 근사치 (쿼터 검사/기록용)"""
+    total = estimate_tokens(system_prompt)
+    for message in messages:
+        content = message.get("content")
+        total += MESSAGE_OVERHEAD_TOKENS + (estimate_tokens(content) if isinstance(content, str) else 0)
+    return total
+
+def _record_usage(
+    user_id: str,
+    provider: str,
+    model: Optional[str],
+    usage: Optional[AIResponse],
+    messages: List[dict],
+    system_prompt: Optional[str],
+    output_text: str
+) -> Tuple[int, int]:
+    """쿼터에 사용량 기록 (제공자가 보고한 값 우선, 없으면 추정치)
+
+    Returns:
+        (입력 토큰, 출력 토큰)
+    """
+    if usage is not None and usage.input_tokens is not None:
+        input_tokens = usage.input_tokens
+    else:
+        input_tokens = _estimate_input_tokens(messages, system_prompt)
+    if usage is not None and usage.output_tokens is not None:
+        output_tokens = usage.output_tokens
+    else:
+        output_tokens = estimate_tokens(output_text)
+    quota_manager.record(user_id, provider, model, input_tokens, output_tokens)
+    return input_tokens, output_tokens
+
+def _usage_payload(input_tokens: int, output_tokens: int) -> dict:
+    """SSE end 이벤트용 사용량"""
+    return {
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "total_tokens": input_tokens + output_tokens
+    }
+
+# max_tokens 미지정 시 중단으로 절감된 토큰을 추정하는 기준 (ai_manager 기본값)
+DEFAULT_MAX_OUTPUT_TOKENS = 1000
+
+# 요청 태스크가 취소된 뒤 실행되는 저장 작업 (완료 전 GC 방지)
+_background_tasks: Set[asyncio.Task] = set()
+
+def _spawn_background(coro) -> None:
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+def _record_cancelled_stream(max_tokens: Optional[int], output_tokens: int) -> None:
+    """중단된 스트림 메트릭 (절감 토큰은 요청 상한 기준 추정치)"""
+    metrics.inc("stream_cancelled_total")
+    metrics.inc(
+        "stream_cancelled_tokens_saved_total",
+        max(0, (max_tokens or DEFAULT_MAX_OUTPUT_TOKENS) - output_tokens)
+    )
+
+async def _commit_when_done(tasks: List[asyncio.Task], turn: ChatTurn) -> None:
+    """취소한 제공자 태스크가 부분 응답을 턴에 추가한 뒤 턴 저장"""
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await turn_writer.submit(turn)
+
+async def _iterate_queue(queue: asyncio.Queue):
+    """큐 항목을 순서대로 전달 (종료 조건은 소비자가 판단)"""
+    while True:
+        yield await queue.get()
+
+async def _collect_image_data(images, generation_request) -> List[dict]:
+    """FormData 업로드 또는 JSON 요청의 이미지를 base64 dict 목록으로 변환"""
+    image_data = []
+    # FormData에서 온 이미지들 처리
+    if images:
+        for image in images:
+            if image.filename:
+                # 이미지 읽기 및 base64 인코딩
+                image_bytes = await image.read()
+                image_b64 = base64.b64encode(image_bytes).decode('utf-8')
+                
+                image_data.append({
+                    'data': image_b64,
+                    'content_type': image.content_type,
+                    'filename': image.filename
+                })
+    
+    # JSON 요청에서 온 이미지들 처리
+    elif generation_request.images:
+        for img in generation_request.images:
+            # 빈 이미지 데이터는 건너뛰기
+            if img.data and img.data.strip():
+                image_data.append({
+                    'data': img.data,
+                    'content_type': img.content_type,
+                    'filename': img.filename
+                })
+    return image_data
+
+async def _stage_turn(
+    chat_id: int,
+    user_id: str,
+    content: str,
+    provider: Optional[str],
+    model: Optional[str],
+    image_data: List[dict],
+    reply_slots: int = 1,
+    token_counts: Optional[Dict[int, int]] = None
+) -> ChatTurn:
+    """사용자 메시지와 첨부 이미지를 저장 대기 턴으로 준비
+
+    이미지 바이너리는 Blob 저장소에 미리 기록하고 (콘텐츠 키이므로 재시도해도 중복 없음)
+    DB 행은 응답 종료 시 turn_writer가 한 트랜잭션으로 저장
+    (히스토리 조회 중 계산한 기존 메시지 토큰 수도 같은 트랜잭션에서 기록)
+    """
+    return ChatTurn(
+        chat_id=chat_id,
+        user_id=user_id,
+        user_message={
+            "content": content,
+            "api_provider": provider,
+            "model_name": model,
+            "token_count": estimate_tokens(content)
+        },
+        image_rows=await store_image_blobs(image_data) if image_data else [],
+        reply_slots=reply_slots,
+        token_counts=token_counts or {}
+    )
+
 @router.post("/chat/{chat_id}")
+@limiter.limit(RateLimits.AI_CHAT, key_func=get_authenticated_user_id)
 async def chat_response(
     request: Request,
     chat_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """실시간 스트리밍 채팅 응답 생성"""
     
     # 요청 본문을 미리 읽어서 파싱
     try:
-        content_type = request.headers.get("content-type", "")
-        
-        if content_type.startswith("multipart/form-data"):
-            # FormData로 온 경우 - 이미지가 포함된 요청
-            form = await request.form()
-            generation_request = ChatGenerationRequest(
-                message=form.get("message"),
-                provider=form.get("provider", "openai"),
-                model=form.get("model"),
-                max_tokens=int(form.get("max_tokens", 1000)),
-                temperature=float(form.get("temperature", 0.7)),
-                system_prompt=form.get("system_prompt"),
-                include_history=form.get("include_history", "true").lower() == "true"
-            )
-            images = form.getlist("images") if "images" in form else None
-        else:
-            # JSON으로 온 경우 - 텍스트만
-            body = await request.json()
-            
-            # 기본값 설정
-            body.setdefault('max_tokens', 1000)
-            body.setdefault('temperature', 0.7)
-            body.setdefault('provider', 'openai')
-            body.setdefault('include_history', True)
-            
-            generation_request = ChatGenerationRequest(**body)
-            images = None
-        
+        body, images = await _parse_chat_form(request)
+        body.setdefault('provider', 'openai')
+        generation_request = ChatGenerationRequest(**body)
     except Exception as parse_error:
         # 파싱 에러 시 에러 응답 반환
-        error_message = f"Request parsing error: {str(parse_error)}"
-        async def error_generator():
-            yield f"data: {json.dumps({'type': 'error', 'error': error_message})}\n\n"
-        return StreamingResponse(
-            error_generator(), 
-            media_type="text/event-stream",
-            headers={"Cache-Control": "no-cache", "Connection": "keep-alive"}
-        )
+        return _sse_error_response(f"Request parsing error: {str(parse_error)}")
     
-    async def generate():
+    # 스트리밍 시작 전에 토큰 예산 확인 (초과 시 429)
+    quota_status = await quota_manager.check(
+        db,
+        current_user.id,
+        generation_request.provider,
+        _estimate_input_tokens([{"content": generation_request.message}], generation_request.system_prompt)
+    )
+    
+    user_id = current_user.id
+    resumable = request.headers.get(RESUMABLE_STREAM_HEADER, "").lower() in ("1", "true")
+    
+    async def produce(stream: ResumableStream):
+        # 생성은 응답과 분리된 태스크에서 실행되므로 요청 세션 대신 별도 세션 사용
+        db = AsyncSessionLocal()
+        stream_started = False
+        response_parts: List[str] = []
+        coalescer = ChunkCoalescer(get_flush_policy(generation_request.flush_policy))
+        response_model = generation_request.model
+        usage = None
+        usage_recorded = False
+        
+        def abort_stream() -> ChatTurn:
+            """중단된 스트림의 사용량/메트릭 기록 후 부분 응답을 턴에 추가"""
+            nonlocal usage_recorded
+            partial_response = "".join(response_parts)
+            _, output_tokens = _record_usage(
+                user_id,
+                generation_request.provider,
+                response_model,
+                usage,
+                chat_messages,
+                generation_request.system_prompt,
+                partial_response
+            )
+            usage_recorded = True
+            _record_cancelled_stream(generation_request.max_tokens, output_tokens)
+            if partial_response:
+                turn.add_reply(
+                    0, partial_response, generation_request.provider, generation_request.model,
+                    output_tokens, truncated=True
+                )
+            return turn
+        
         try:
             
             # 채팅 존재 및 권한 확인
-            chat = db.query(Chat).filter(
-                Chat.id == chat_id,
-                Chat.user_id == current_user.id
-            ).first()
+            chat = await get_chat_async(db, chat_id, user_id)
             
             if not chat:
-                yield f"data: {json.dumps({'error': 'Chat not found'})}\n\n"
+                stream.publish({'type': 'error', 'error': 'Chat not found'})
                 return
             
             # 사용자의 API 키 가져오기
-            provider_key = None
-            if generation_request.provider == "openai":
-                api_key_record = get_api_key(db, current_user.id, "openai")
-                if api_key_record:
-                    provider_key = decrypt_api_key(api_key_record.encrypted_key)
-            elif generation_request.provider == "anthropic":
-                api_key_record = get_api_key(db, current_user.id, "anthropic")
-                if api_key_record:
-                    provider_key = decrypt_api_key(api_key_record.encrypted_key)
-            elif generation_request.provider == "google":
-                api_key_record = get_api_key(db, current_user.id, "google")
-                if api_key_record:
-                    provider_key = decrypt_api_key(api_key_record.encrypted_key)
-            
+            provider_key = await _get_provider_key(db, user_id, generation_request.provider)
             if not provider_key:
-                yield f"data: {json.dumps({'error': f'No API key found for provider {generation_request.provider}'})}\n\n"
+                stream.publish({'type': 'error', 'error': f'No API key found for provider {generation_request.provider}'})
                 return
             
-            # 채팅 메시지 히스토리 가져오기 (최근 20개)
-            messages = db.query(Message).filter(
-                Message.chat_id == chat_id
-            ).order_by(Message.created_at.desc()).limit(20).all()
-            messages.reverse()  # 시간순 정렬
-            
-            # 메시지를 AI API 형식으로 변환 (빈 메시지 필터링)
-            chat_messages = []
-            for msg in messages:
-                # 빈 메시지는 제외 (Anthropic API 요구사항)
-                if not msg.content or not msg.content.strip():
-                    continue
-                    
-                role = "user" if msg.sender == "user" else "assistant"
-                chat_messages.append({
-                    "role": role,
-                    "content": msg.content
-                })
+            # 모델별 토큰 예산 안에서 채팅 메시지 히스토리 가져오기
+            token_budget = get_history_budget(
+                [(generation_request.provider, generation_request.model)],
+                generation_request.max_tokens,
+                [generation_request.system_prompt, generation_request.message]
+            )
+            token_counts: Dict[int, int] = {}
+            chat_messages = await build_history_messages(
+                db, chat_id, token_budget, generation_request.include_history, token_counts
+            )
             
             # 이미지 처리 (먼저 처리해서 빈 메시지 체크에서 사용)
-            image_data = []
-            # FormData에서 온 이미지들 처리
-            if images:
-                for image in images:
-                    if image.filename:
-                        # 이미지 읽기 및 base64 인코딩
-                        image_bytes = await image.read()
-                        image_b64 = base64.b64encode(image_bytes).decode('utf-8')
-                        
-                        image_data.append({
-                            'data': image_b64,
-                            'content_type': image.content_type,
-                            'filename': image.filename
-                        })
-            
-            # JSON 요청에서 온 이미지들 처리 (ChatGenerationRequest에 images 필드가 있는 경우)
-            elif hasattr(generation_request, 'images') and generation_request.images:
-                for img in generation_request.images:
-                    # 이미지 데이터 검증
-                    if img.data and img.data.strip():  # 빈 문자열이 아닌지 확인
-                        image_data.append({
-                            'data': img.data,
-                            'content_type': img.content_type,
-                            'filename': img.filename
-                        })
-                    # 빈 이미지 데이터는 건너뛰기
-                    pass
+            image_data = await _collect_image_data(images, generation_request)
             
             # 새로운 사용자 메시지 추가
             # 이미지만 있고 텍스트가 없는 경우도 허용 (Claude API는 별도 처리)
@@ -322,7 +489,7 @@ async def chat_response(
                 # 이미지만 있는 경우 - 빈 텍스트로 처리 (Claude는 서비스에서 처리)
                 message_content = ""
             else:
-                yield f"data: {json.dumps({'type': 'error', 'error': 'Message content or images required'})}\\n\\n"
+                stream.publish({'type': 'error', 'error': 'Message content or images required'})
                 return
             
             chat_messages.append({
@@ -330,42 +497,23 @@ async def chat_response(
                 "content": message_content
             })
             
-            # 사용자 메시지를 데이터베이스에 저장
-            last_message = db.query(Message).filter(Message.chat_id == chat_id).order_by(Message.message_order.desc()).first()
-            next_order = (last_message.message_order + 1) if last_message else 1
-            
-            user_message = Message(
-                chat_id=chat_id,
-                sender="user",
-                content=generation_request.message,
-                message_order=next_order,
-                api_provider=generation_request.provider,
-                model_name=generation_request.model
+            # 사용자 메시지와 이미지는 스테이징만 하고 응답 종료 시 AI 응답과 함께 저장
+            turn = await _stage_turn(
+                chat_id,
+                user_id,
+                generation_request.message,
+                generation_request.provider,
+                generation_request.model,
+                image_data,
+                token_counts=token_counts
             )
-            db.add(user_message)
-            db.commit()
-            db.refresh(user_message)
-            
-            # 이미지가 있다면 저장
-            if image_data:
-                for i, img in enumerate(image_data):
-                    message_image = MessageImage(
-                        message_id=user_message.id,
-                        filename=img['filename'],
-                        content_type=img['content_type'],
-                        size=len(base64.b64decode(img['data'])),
-                        data=img['data'],
-                        order_index=i
-                    )
-                    db.add(message_image)
-                db.commit()
             
             # 스트리밍 시작 이벤트
-            yield f"data: {json.dumps({'type': 'start', 'message': 'Streaming started'})}\n\n"
+            stream.publish({'type': 'start', 'message': 'Streaming started', 'stream_id': stream.stream_id})
             
             # AI 서비스를 통해 스트리밍 응답 생성
-            full_response = ""
-            async for chunk in ai_manager.generate_text_stream(
+            stream_started = True
+            provider_stream = ai_manager.generate_text_stream(
                 prompt=generation_request.message,
                 provider=generation_request.provider,
                 max_tokens=generation_request.max_tokens,
@@ -375,39 +523,357 @@ async def chat_response(
                 messages=chat_messages,
                 images=image_data if image_data else None,
                 system_prompt=generation_request.system_prompt
-            ):
-                full_response += chunk.content
-                # 스트리밍 청크 전송
-                chunk_data = json.dumps({'type': 'chunk', 'content': chunk.content})
-                yield f"data: {chunk_data}\n\n"
+            )
+            # 연결 종료(재연결 요청 시에는 대기 시간 만료)로 생성이 취소되면 aclosing으로 제공자 스트림을 즉시 닫음
+            chunks = coalescer.pace(provider_stream)
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    if chunk is None:
+                        # 시간 창 만료: 모인 델타 전송
+                        text = coalescer.flush()
+                    else:
+                        response_model = chunk.model or response_model
+                        if chunk.tokens_used is not None:
+                            usage = chunk  # 제공자가 보고한 사용량 (마지막 청크)
+                        if not chunk.content:
+                            continue  # 사용량 전용 청크 등 빈 프레임은 전송하지 않음
+                        response_parts.append(chunk.content)
+                        text = coalescer.add(chunk.content)
+                    if text:
+                        # 스트리밍 청크 전송
+                        stream.publish({'type': 'chunk', 'content': text})
             
-            # AI 응답을 데이터베이스에 저장
-            ai_message = Message(
-                chat_id=chat_id,
-                sender="ai",
-                content=full_response,
-                message_order=next_order + 1,
-                api_provider=generation_request.provider,
-                model_name=generation_request.model
+            text = coalescer.flush()
+            if text:
+                stream.publish({'type': 'chunk', 'content': text})
+            full_response = "".join(response_parts)
+            
+            input_tokens, output_tokens = _record_usage(
+                user_id,
+                generation_request.provider,
+                response_model,
+                usage,
+                chat_messages,
+                generation_request.system_prompt,
+                full_response
             )
-            db.add(ai_message)
-            db.commit()
+            usage_recorded = True
+            
+            # 사용자 메시지, 이미지, AI 응답을 한 트랜잭션으로 저장 (실패 시 저널에서 재시도)
+            turn.add_reply(0, full_response, generation_request.provider, generation_request.model, output_tokens)
+            persisted = await turn_writer.submit(turn)
             
             # 스트리밍 완료 이벤트
-            yield f"data: {json.dumps({'type': 'end', 'full_content': full_response})}\n\n"
+            stream.publish({
+                'type': 'end',
+                'full_content': full_response,
+                'usage': _usage_payload(input_tokens, output_tokens),
+                'persisted': persisted
+            })
             
+        except asyncio.CancelledError:
+            # 클라이언트가 떠남 (재연결 요청 시에는 대기 시간 안에 돌아오지 않음): 취소 중인 태스크 대신 별도 태스크에서 저장
+            if stream_started and not usage_recorded:
+                _spawn_background(turn_writer.submit(abort_stream()))
+            raise
         except Exception as e:
-            db.rollback()
-            yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+            await db.rollback()
+            stream.publish({'type': 'error', 'error': str(e)})
+        finally:
+            # 제공자에 요청이 전달된 경우 (중단/실패 포함) 사용량 기록
+            if stream_started and not usage_recorded:
+                _record_usage(
+                    user_id,
+                    generation_request.provider,
+                    response_model,
+                    usage,
+                    chat_messages,
+                    generation_request.system_prompt,
+                    "".join(response_parts)
+                )
+            await db.close()
+    
+    # 생성은 응답과 분리된 태스크에서 실행하고, 응답은 스트림을 구독
+    stream = stream_registry.create(user_id, chat_id, resumable=resumable)
+    stream_registry.start(stream, produce(stream))
+    
+    return StreamingResponse(
+        stream.subscribe(request),
+        media_type="text/event-stream",
+        headers={**SSE_HEADERS, **quota_status.headers(), "X-Stream-Id": stream.stream_id}
+    )
+
+@router.get("/chat/{chat_id}/streams/{stream_id}")
+@limiter.limit(RateLimits.GENERAL_READ, key_func=get_authenticated_user_id)
+async def resume_chat_stream(
+    request: Request,
+    chat_id: int,
+    stream_id: str,
+    last_event_id: Optional[str] = Header(default=None),
+    current_user: User = Depends(get_current_user)
+):
+    """끊긴 채팅 스트림에 다시 연결
+
+    Last-Event-ID 이후 이벤트를 버퍼에서 재생한 뒤 진행 중인 생성을 이어서 전달.
+    버퍼에서 이미 밀려난 구간을 놓친 경우 resync 이벤트로 그 구간의 본문을 먼저 전달
+    """
+    stream = stream_registry.get(stream_id, current_user.id, chat_id)
+    if not stream:
+        raise HTTPException(status_code=404, detail="Stream not found or expired")
+    
+    try:
+        cursor = int(last_event_id) if last_event_id else 0
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+    
+    return StreamingResponse(
+        stream.subscribe(request, cursor),
+        media_type="text/event-stream",
+        headers={**SSE_HEADERS, "X-Stream-Id": stream.stream_id}
+    )
+
+@router.post("/chat/{chat_id}/compare")
+@limiter.limit(RateLimits.AI_CHAT, key_func=get_authenticated_user_id)
+async def chat_compare_response(
+    request: Request,
+    chat_id: int,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """여러 제공자/모델의 스트리밍 응답을 하나의 SSE 스트림으로 다중화
+
+    히스토리와 API 키는 한 번만 로드하고, 각 제공자의 청크는 도착하는 대로
+    provider/model/index 태그와 함께 전달. 사용자 메시지와 모든 응답은 마지막에 한 번에 저장
+    """
+    
+    try:
+        body, images = await _parse_chat_form(request)
+        compare_request = ChatCompareRequest(**body)
+    except Exception as parse_error:
+        return _sse_error_response(f"Request parsing error: {str(parse_error)}")
+    
+    async def generate():
+        tasks: List[asyncio.Task] = []
+        turn: Optional[ChatTurn] = None
+        turn_committed = False
+        aborted = False
+        try:
+            # 채팅 존재 및 권한 확인
+            chat = await get_chat_async(db, chat_id, current_user.id)
+            
+            if not chat:
+                yield sse_frame({'type': 'error', 'error': 'Chat not found'})
+                return
+            
+            # 사용자의 API 키는 한 번만 조회
+            provider_keys = await _get_provider_keys(db, current_user.id)
+            
+            targets = []
+            input_tokens = _estimate_input_tokens(
+                [{"content": compare_request.message}], compare_request.system_prompt
+            )
+            for index, target in enumerate(compare_request.targets):
+                tags = {'index': index, 'provider': target.provider, 'model': target.model}
+                if not provider_keys.get(target.provider):
+                    yield sse_frame({'type': 'error', **tags, 'error': f'No API key found for provider {target.provider}'})
+                    continue
+                # 토큰 예산을 초과한 제공자는 제외
+                try:
+                    await quota_manager.check(db, current_user.id, target.provider, input_tokens)
+                except QuotaExceeded as e:
+                    yield sse_frame({'type': 'error', **tags, 'error': str(e), 'quota': e.status.headers()})
+                    continue
+                targets.append((index, target))
+            
+            if not targets:
+                return
+            
+            # 비교 대상 중 가장 작은 컨텍스트 윈도우 기준으로 히스토리 선택
+            token_budget = get_history_budget(
+                [(target.provider, target.model) for _, target in targets],
+                compare_request.max_tokens,
+                [compare_request.system_prompt, compare_request.message]
+            )
+            token_counts: Dict[int, int] = {}
+            chat_messages = await build_history_messages(
+                db, chat_id, token_budget, compare_request.include_history, token_counts
+            )
+            image_data = await _collect_image_data(images, compare_request)
+            
+            if compare_request.message and compare_request.message.strip():
+                message_content = compare_request.message.strip()
+            elif image_data:
+                message_content = ""
+            else:
+                yield sse_frame({'type': 'error', 'error': 'Message content or images required'})
+                return
+            
+            chat_messages.append({
+                "role": "user",
+                "content": message_content
+            })
+            
+            turn = await _stage_turn(
+                chat_id,
+                current_user.id,
+                compare_request.message,
+                None,
+                None,
+                image_data,
+                reply_slots=len(targets),  # 건너뛴 대상은 순서를 예약하지 않음
+                token_counts=token_counts
+            )
+            # 응답 순서는 실행하는 대상 사이에서의 요청 순서 기준
+            slot_by_index = {index: slot for slot, (index, _) in enumerate(targets)}
+            
+            yield sse_frame({
+                'type': 'start',
+                'message': 'Streaming started',
+                'targets': [
+                    {'index': index, 'provider': target.provider, 'model': target.model}
+                    for index, target in targets
+                ]
+            })
+            
+            # 각 제공자 스트림을 하나의 큐로 모음
+            queue: asyncio.Queue = asyncio.Queue()
+            flush_policy = get_flush_policy(compare_request.flush_policy)
+            
+            async def run_target(index: int, target):
+                parts = []
+                # 제공자별로 델타를 묶어서 큐에 전달
+                coalescer = ChunkCoalescer(flush_policy)
+                response_model = target.model
+                usage = None
+                recorded = False
+                try:
+                    async for chunk in coalescer.pace(ai_manager.generate_text_stream(
+                        prompt=compare_request.message,
+                        provider=target.provider,
+                        max_tokens=compare_request.max_tokens,
+                        temperature=compare_request.temperature,
+                        model=target.model,
+                        api_key=provider_keys[target.provider],
+                        # 서비스가 메시지를 수정할 수 있으므로 제공자별로 복사
+                        messages=copy.deepcopy(chat_messages),
+                        images=image_data if image_data else None,
+                        system_prompt=compare_request.system_prompt
+                    )):
+                        if chunk is None:
+                            text = coalescer.flush()
+                        else:
+                            response_model = chunk.model or response_model
+                            if chunk.tokens_used is not None:
+                                usage = chunk
+                            if not chunk.content:
+                                continue
+                            parts.append(chunk.content)
+                            text = coalescer.add(chunk.content)
+                        if text:
+                            await queue.put(('chunk', index, text))
+                    text = coalescer.flush()
+                    if text:
+                        await queue.put(('chunk', index, text))
+                    input_tokens, output_tokens = _record_usage(
+                        current_user.id,
+                        target.provider,
+                        response_model,
+                        usage,
+                        chat_messages,
+                        compare_request.system_prompt,
+                        "".join(parts)
+                    )
+                    recorded = True
+                    await queue.put(('end', index, ("".join(parts), input_tokens, output_tokens)))
+                except asyncio.CancelledError:
+                    # 연결 종료 등으로 취소됨: 부분 응답을 턴에 추가 (저장은 generate의 finally에서)
+                    if not recorded:
+                        _, output_tokens = _record_usage(
+                            current_user.id,
+                            target.provider,
+                            response_model,
+                            usage,
+                            chat_messages,
+                            compare_request.system_prompt,
+                            "".join(parts)
+                        )
+                        recorded = True
+                        _record_cancelled_stream(compare_request.max_tokens, output_tokens)
+                        if parts:
+                            turn.add_reply(
+                                slot_by_index[index], "".join(parts), target.provider, target.model,
+                                output_tokens, truncated=True
+                            )
+                    raise
+                except Exception as e:
+                    await queue.put(('error', index, str(e)))
+                finally:
+                    # 실패/취소된 스트림도 제공자에 전달된 만큼 기록
+                    if not recorded:
+                        _record_usage(
+                            current_user.id,
+                            target.provider,
+                            response_model,
+                            usage,
+                            chat_messages,
+                            compare_request.system_prompt,
+                            "".join(parts)
+                        )
+            
+            tasks = [asyncio.create_task(run_target(index, target)) for index, target in targets]
+            target_by_index = dict(targets)
+            
+            remaining = len(tasks)
+            # 클라이언트가 떠나면 ClientDisconnected로 빠져나가고, finally에서 제공자 태스크를 취소
+            events = watch_disconnect(request, _iterate_queue(queue), settings.sse_disconnect_poll_interval)
+            async with aclosing(events):
+                async for kind, index, payload in events:
+                    target = target_by_index[index]
+                    tags = {'index': index, 'provider': target.provider, 'model': target.model}
+                    
+                    if kind == 'chunk':
+                        yield sse_frame({'type': 'chunk', **tags, 'content': payload})
+                    elif kind == 'end':
+                        remaining -= 1
+                        full_content, input_tokens, output_tokens = payload
+                        # 완료된 응답은 턴에 모았다가 모든 제공자가 끝나면 한 번에 저장
+                        turn.add_reply(slot_by_index[index], full_content, target.provider, target.model, output_tokens)
+                        yield sse_frame({
+                            'type': 'end',
+                            **tags,
+                            'full_content': full_content,
+                            'usage': _usage_payload(input_tokens, output_tokens)
+                        })
+                    else:
+                        remaining -= 1
+                        yield sse_frame({'type': 'error', **tags, 'error': payload})
+                    
+                    if not remaining:
+                        break
+            
+            # 사용자 메시지, 이미지, 모든 응답을 한 트랜잭션으로 저장 (실패 시 저널에서 재시도)
+            persisted = await turn_writer.submit(turn)
+            turn_committed = True
+            yield sse_frame({'type': 'done', 'persisted': persisted})
+            
+        except ClientDisconnected:
+            aborted = True
+        except (asyncio.CancelledError, GeneratorExit):
+            aborted = True
+            raise
+        except Exception as e:
+            await db.rollback()
+            yield sse_frame({'type': 'error', 'error': str(e)})
+        finally:
+            for task in tasks:
+                task.cancel()
+            if aborted and turn is not None and not turn_committed:
+                _spawn_background(_commit_when_done(tasks, turn))
     
     return StreamingResponse(
         generate(), 
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"  # nginx 버퍼링 비활성화
-        }
+        headers=SSE_HEADERS
     )
 
 @router.get("/health")
@@ -17,6 +17,7 @@ from app.schemas.api_key_schemas import (
     ApiKeyValidationResult
 )
 from app.models.user import User
+from app.services.key_vault import key_vault
 
 router = APIRouter(prefix="/api/v1/api-keys", tags=["api-keys"])
 
@@ -84,6 +85,7 @@ def save_api_key(
     )
     
     db_api_key = create_or_update_api_key(db, current_user.id, normalized_api_key_data)
+    key_vault.invalidate(current_user.id)
     return db_api_key
 
 @router.get("/", response_model=List[ApiKeyResponse])
@@ -146,6 +148,7 @@ def delete_api_key_by_provider(
     db: Session = Depends(get_db)
 ):
     success = delete_api_key(db, current_user.id, provider)
+    key_vault.invalidate(current_user.id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -159,6 +162,7 @@ def delete_all_api_keys(
     db: Session = Depends(get_db)
 ):
     count = delete_all_user_api_keys(db, current_user.id)
+    key_vault.invalidate(current_user.id)
     return {"message": f"{count} API keys deleted successfully"}
 
 @router.post("/validate", response_model=ApiKeyValidationResult)
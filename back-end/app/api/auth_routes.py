@@ -1,9 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db, get_async_db
 from app.core.auth import create_access_token, create_refresh_token, get_current_user, blacklist_token
-from app.crud.user_crud import create_user, authenticate_user, get_user_by_email
+from app.core.password_hasher import password_hasher
+from app.crud.user_crud import (
+    get_user_by_email,
+    get_user_by_email_async,
+    get_user_by_id_async,
+    create_user_async,
+    authenticate_user_async,
+    change_user_password_async
+)
 from app.schemas.auth_schemas import (
     UserCreate, UserLogin, UserResponse, Token, UserUpdate, PasswordChange,
     EmailVerificationRequest, EmailVerificationVerify, PasswordResetRequest, 
@@ -20,9 +29,9 @@ class PasswordVerify(BaseModel):
 
 @router.post("/register", response_model=UserResponse)
 @limiter.limit(RateLimits.AUTH_REGISTER)
-def register(request: Request, user: UserCreate, db: Session = Depends(get_db)):
+async def register(request: Request, user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # 이메일 중복 확인
-    db_user = get_user_by_email(db, email=user.email)
+    db_user = await get_user_by_email_async(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -31,7 +40,7 @@ def register(request: Request, user: UserCreate, db: Session = Depends(get_db)):
     
     # 사용자 생성
     try:
-        db_user = create_user(db=db, user=user)
+        db_user = await create_user_async(db=db, user=user)
         return db_user
     except ValueError as e:
         if "User ID already exists" in str(e):
@@ -46,8 +55,9 @@ def register(request: Request, user: UserCreate, db: Session = Depends(get_db)):
 
 @router.post("/login", response_model=Token)
 @limiter.limit(RateLimits.AUTH_LOGIN)
-def login(request: Request, user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, user_credentials.identifier, user_credentials.password)
+async def login(request: Request, user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    # bcrypt 검증은 전용 실행기에서 수행 (필요 시 재해싱)
+    user = await authenticate_user_async(db, user_credentials.identifier, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -93,7 +103,8 @@ def get_user_info(current_user: User = Depends(get_current_user)):
 def refresh_token(refresh_token: str, db: Session = Depends(get_db)):
     from app.core.auth import verify_token
     
-    token_data = verify_token(refresh_token, db)
+    # 리프레시 토큰 재사용 방지를 위해 캐시 대신 DB에서 블랙리스트 확인
+    token_data = verify_token(refresh_token, db, use_cache=False)
     if token_data is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -138,17 +149,15 @@ def update_user_info(
 
 @router.post("/change-password")
 @limiter.limit(RateLimits.AUTH_PASSWORD_CHANGE)
-def change_password(
+async def change_password(
     request: Request,
     password_change: PasswordChange,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """비밀번호 변경"""
-    from app.crud.user_crud import change_user_password
-    
     try:
-        success = change_user_password(
+        success = await change_user_password_async(
             db, 
             current_user.id, 
             password_change.current_password, 
@@ -167,19 +176,15 @@ def change_password(
         )
 
 @router.post("/verify-password")
-def verify_current_password(
+async def verify_current_password(
     password_verify: PasswordVerify,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """현재 비밀번호 검증"""
-    from app.crud.user_crud import verify_password
-    from passlib.context import CryptContext
-    
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    
-    # 현재 비밀번호가 맞는지 검증
-    if not pwd_context.verify(password_verify.current_password, current_user.password):
+    # 캐시된 사용자에는 비밀번호 해시가 없으므로 최신 해시를 조회
+    user = await get_user_by_id_async(db, current_user.id)
+    if user is None or not await password_hasher.verify(password_verify.current_password, user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Current password is incorrect"
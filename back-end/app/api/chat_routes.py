@@ -1,36 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Callable, BinaryIO, List, Optional, Tuple
+import base64
+import io
+import json
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.auth import get_current_user
+from app.core.auth import get_current_user, sign_resource, verify_resource_signature
 from app.crud.chat_crud import (
     get_user_chats,
-    get_chat_by_id,
+    get_chat_metadata,
     create_chat,
     update_chat,
     delete_chat,
     get_chat_messages,
     add_message_to_chat,
-    clear_chat_messages
+    clear_chat_messages,
+    get_message_image
 )
 from app.schemas.chat_schemas import (
     ChatCreate,
     ChatUpdate,
     ChatResponse,
+    ChatListItemResponse,
     MessageCreate,
     MessageResponse
 )
 from app.models.user import User
+from app.services.blob_store import get_blob_store, compute_blob_key
 
 router = APIRouter(prefix="/api/v1/chats", tags=["chats"])
 
-@router.get("/", response_model=List[ChatResponse])
+# 이미지는 콘텐츠 주소(SHA-256)로 저장되므로 내용이 바뀌지 않음
+IMAGE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+IMAGE_STREAM_CHUNK_SIZE = 64 * 1024
+
+# 메시지 페이지당 최대 조회 개수
+MESSAGES_PAGE_MAX_LIMIT = 100
+
+def _encode_message_cursor(message_order: int) -> str:
+    """message_order를 불투명한 페이지 커서로 인코딩"""
+    raw = json.dumps({"o": message_order}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+def _decode_message_cursor(cursor: str) -> int:
+    """페이지 커서를 message_order로 디코딩 (잘못된 커서는 400)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        message_order = json.loads(base64.urlsafe_b64decode(padded.encode()))["o"]
+        if not isinstance(message_order, int) or isinstance(message_order, bool):
+            raise ValueError("message_order must be an integer")
+        return message_order
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+def _signed_image_url(chat_id: int, image_id: int) -> str:
+    """<img> 태그에서 바로 사용할 수 있는 서명된 이미지 URL 생성"""
+    resource = f"{router.prefix}/{chat_id}/images/{image_id}"
+    params = sign_resource(resource, settings.image_url_ttl_seconds)
+    return f"{resource}?expires={params['expires']}&signature={params['signature']}"
+
+def _parse_byte_range(range_header: str, total: int) -> Optional[Tuple[int, int]]:
+    """단일 bytes Range 헤더 파싱 (bytes=start-end, bytes=start-, bytes=-suffix)"""
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec or total == 0:
+        return None
+    start_str, _, end_str = spec.strip().partition("-")
+    try:
+        if start_str == "":
+            # 마지막 N 바이트
+            suffix = int(end_str)
+            if suffix <= 0:
+                return None
+            return max(total - suffix, 0), total - 1
+        start = int(start_str)
+        end = int(end_str) if end_str else total - 1
+    except ValueError:
+        return None
+    if start > end or start >= total:
+        return None
+    return start, min(end, total - 1)
+
+def _iter_byte_range(open_file: Callable[[], BinaryIO], start: int, end: int):
+    """파일의 [start, end] 구간을 청크 단위로 스트리밍"""
+    with open_file() as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = f.read(min(IMAGE_STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+@router.get("/", response_model=List[ChatListItemResponse], response_model_exclude_unset=True)
 def get_chats(
     limit: int = Query(50, ge=1, le=100),
+    include_message_count: bool = Query(False),
+    include_last_message: bool = Query(False),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return get_user_chats(db, current_user.id, limit)
+    """채팅 목록 (메시지 수/마지막 메시지 미리보기는 요청한 경우에만 포함)"""
+    return get_user_chats(
+        db,
+        current_user.id,
+        limit,
+        include_message_count=include_message_count,
+        include_last_message=include_last_message
+    )
 
 @router.post("/", response_model=ChatResponse)
 def create_new_chat(
@@ -46,7 +128,7 @@ def get_chat(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    chat = get_chat_by_id(db, chat_id, current_user.id)
+    chat = get_chat_metadata(db, chat_id, current_user.id)
     if not chat:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -86,32 +168,55 @@ def delete_chat_by_id(
 @router.get("/{chat_id}/messages")
 def get_chat_messages_list(
     chat_id: int,
-    limit: int = 20,
-    offset: int = 0,
+    limit: int = Query(20, ge=1, le=MESSAGES_PAGE_MAX_LIMIT),
+    before: Optional[str] = Query(None, description="이전 페이지 커서 (응답의 before_cursor)"),
+    after: Optional[str] = Query(None, description="이후 페이지 커서 (응답의 after_cursor)"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
+    """메시지 목록 조회 (최신순, 커서 기반 페이지네이션)
+
+    - before_cursor: 더 오래된 메시지 조회용 (더 없으면 null)
+    - after_cursor: 이후에 추가된 메시지 조회용
+    """
+    if before and after:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only one of before or after can be specified"
+        )
     
-    messages = get_chat_messages(db, chat_id, current_user.id, limit=limit, offset=offset)
-    if messages is None:
+    before_order = _decode_message_cursor(before) if before else None
+    after_order = _decode_message_cursor(after) if after else None
+    
+    result = get_chat_messages(
+        db,
+        chat_id,
+        current_user.id,
+        limit=limit,
+        before_order=before_order,
+        after_order=after_order
+    )
+    if result is None:
         
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Chat not found"
         )
+    messages, has_more = result
     
     # 응답 변환: message_images를 images 형태로 변환
+    # 이미지 바이너리는 포함하지 않고 메타데이터와 서명된 URL만 반환 (클라이언트가 지연 로드)
     response_messages = []
     for msg in messages:
-        # 이미지 데이터 변환
         images_data = [
             {
+                "id": img.id,
                 "filename": img.filename,
                 "content_type": img.content_type,
-                "data": img.data,
-                "size": img.size
+                "size": img.size,
+                "url": _signed_image_url(chat_id, img.id)
             }
-            for img in msg.message_images
+            for img in sorted(msg.message_images, key=lambda image: image.order_index)
         ]
         
         # 직접 딕셔너리 형태로 응답 구성
@@ -123,12 +228,112 @@ def get_chat_messages_list(
             "api_provider": msg.api_provider,
             "model_name": msg.model_name,
             "token_count": msg.token_count,
-            "images": images_data,  # 변환된 이미지 데이터
+            "truncated": msg.truncated,
+            "images": images_data,  # 이미지 메타데이터 및 URL
             "created_at": msg.created_at.isoformat()
         }
         response_messages.append(message_dict)
     
-    return response_messages
+    # 응답 메시지는 최신순이므로 첫 항목이 가장 새롭고 마지막 항목이 가장 오래됨
+    if messages:
+        newest_order = messages[0].message_order
+        oldest_order = messages[-1].message_order
+        # after 방향 조회에서는 기준 커서 이전 메시지가 항상 존재
+        has_older = has_more if after_order is None else True
+    else:
+        newest_order = after_order
+        oldest_order = None
+        has_older = False
+    
+    return {
+        "messages": response_messages,
+        "before_cursor": _encode_message_cursor(oldest_order) if has_older else None,
+        "after_cursor": _encode_message_cursor(newest_order) if newest_order is not None else None,
+        "has_more": has_more
+    }
+
+@router.get("/{chat_id}/images/{image_id}")
+def get_message_image_content(
+    chat_id: int,
+    image_id: int,
+    request: Request,
+    expires: int = Query(...),
+    signature: str = Query(...),
+    db: Session = Depends(get_db)
+):
+    """이미지 바이너리 제공 (ETag / Range / Cache-Control 지원)
+
+    메시지 목록 응답에 포함된 서명된 URL로만 접근 가능
+    """
+    resource = f"{router.prefix}/{chat_id}/images/{image_id}"
+    if not verify_resource_signature(resource, expires, signature):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired image URL"
+        )
+    
+    image = get_message_image(db, chat_id, image_id)
+    if not image:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Image not found"
+        )
+    
+    if image.blob_key:
+        blob_store = get_blob_store()
+        blob_key = image.blob_key
+        etag_value = blob_key
+        try:
+            total = blob_store.size(blob_key)
+        except (FileNotFoundError, ValueError):
+            # 메타데이터는 있지만 Blob이 없거나 키가 손상된 경우
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Image not found"
+            )
+        open_file = lambda: blob_store.open(blob_key)
+    else:
+        # Blob 저장소로 이전되지 않은 레거시 행
+        raw = base64.b64decode(image.data or "")
+        etag_value = compute_blob_key(raw)
+        total = len(raw)
+        open_file = lambda: io.BytesIO(raw)
+    
+    etag = f'"{etag_value}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": IMAGE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes"
+    }
+    
+    # 조건부 요청: 클라이언트 캐시가 유효하면 본문 없이 응답
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        if "*" in candidates or etag in candidates:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    start, end = 0, total - 1
+    status_code = status.HTTP_200_OK
+    range_header = request.headers.get("range")
+    if range_header:
+        byte_range = _parse_byte_range(range_header, total)
+        if byte_range is None:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{total}"}
+            )
+        start, end = byte_range
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+    
+    headers["Content-Length"] = str(max(end - start + 1, 0))
+    return StreamingResponse(
+        _iter_byte_range(open_file, start, end),
+        status_code=status_code,
+        media_type=image.content_type,
+        headers=headers
+    )
 
 @router.post("/{chat_id}/messages", response_model=MessageResponse)
 def add_message(
@@ -1,8 +1,12 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
+import hashlib
+import hmac
+import time
 import uuid
 from jose import JWTError, jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.database import get_db
@@ -10,6 +14,7 @@ from app.crud.user_crud import get_user_by_id
 from app.crud.blacklist_crud import is_token_blacklisted, add_token_to_blacklist
 from app.schemas.auth_schemas import TokenData
 from app.core.config import settings
+from app.core.auth_cache import token_cache, blacklist_cache, user_cache
 
 security = HTTPBearer()
 
@@ -38,25 +43,82 @@ def create_refresh_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, settings.get_secret_key(), algorithm=settings.algorithm)
     return encoded_jwt
 
-def verify_token(token: str, db: Session = None):
+@dataclass
+class AuthContext:
+    """요청 단위 인증 정보 (미들웨어에서 한 번 계산)
+
+    서명/만료만 검증된 상태이며 블랙리스트 확인은 get_current_user에서 수행
+    """
+    token: str
+    token_data: TokenData
+    
+    @property
+    def user_id(self) -> str:
+        return self.token_data.user_id
+
+def decode_token(token: str, use_cache: bool = True) -> Optional[TokenData]:
+    """토큰 서명/만료 검증 (검증 결과는 exp까지 캐시)"""
+    token_data = token_cache.get(token) if use_cache else None
+    if token_data is not None:
+        return token_data
+    
     try:
         payload = jwt.decode(token, settings.get_secret_key(), algorithms=[settings.algorithm])
-        user_id: int = payload.get("sub")
-        jti: str = payload.get("jti")
-        
-        if user_id is None or jti is None:
-            return None
-            
-        # 블랙리스트 확인
-        if db and is_token_blacklisted(db, jti):
-            return None
-            
-        token_data = TokenData(user_id=user_id, jti=jti)
-        return token_data
     except JWTError:
         return None
+    
+    user_id: int = payload.get("sub")
+    jti: str = payload.get("jti")
+    
+    if user_id is None or jti is None:
+        return None
+    
+    token_data = TokenData(user_id=user_id, jti=jti)
+    token_cache.set(token, token_data, float(payload["exp"]))
+    return token_data
+
+def verify_token(token: str, db: Session = None, use_cache: bool = True):
+    """토큰 검증
+
+    use_cache가 True이면 검증 결과와 블랙리스트를 프로세스 메모리 캐시에서 확인
+    (다른 프로세스의 로그아웃은 블랙리스트 갱신 주기 안에 반영됨).
+    리프레시 토큰 교환처럼 재사용을 즉시 막아야 하는 경우 False로 DB를 직접 확인
+    """
+    token_data = decode_token(token, use_cache)
+    if token_data is None:
+        return None
+    
+    # 블랙리스트 확인
+    if db and _is_revoked(db, token_data.jti, use_cache):
+        return None
+    
+    return token_data
+
+def _is_revoked(db: Session, jti: str, use_cache: bool = True) -> bool:
+    if use_cache:
+        return blacklist_cache.is_blacklisted(db, jti)
+    return is_token_blacklisted(db, jti)
+
+def resolve_auth_context(authorization: Optional[str]) -> Optional[AuthContext]:
+    """Authorization 헤더에서 인증 정보 계산"""
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    token_data = decode_token(token.strip())
+    if token_data is None:
+        return None
+    return AuthContext(token=token.strip(), token_data=token_data)
+
+def get_auth_context(request: Request) -> Optional[AuthContext]:
+    """요청의 인증 정보 (미들웨어가 없는 경우 여기서 계산 후 저장)"""
+    if "auth" not in request.scope.get("state", {}):
+        request.state.auth = resolve_auth_context(request.headers.get("Authorization"))
+    return request.state.auth
 
 def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ):
@@ -66,13 +128,23 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    token_data = verify_token(credentials.credentials, db)
-    if token_data is None:
+    # 미들웨어에서 검증한 토큰 정보 재사용 (추가 디코딩 없음)
+    auth_context = get_auth_context(request)
+    if auth_context is not None and auth_context.token == credentials.credentials:
+        token_data = auth_context.token_data
+    else:
+        token_data = decode_token(credentials.credentials)
+    
+    if token_data is None or _is_revoked(db, token_data.jti):
         raise credentials_exception
     
-    user = get_user_by_id(db, user_id=token_data.user_id)
+    # 짧은 TTL 사용자 캐시 확인 후 없을 때만 DB 조회
+    user = user_cache.get(db, token_data.user_id)
     if user is None:
-        raise credentials_exception
+        user = get_user_by_id(db, user_id=token_data.user_id)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(user)
     
     return user
 
@@ -86,7 +158,26 @@ def blacklist_token(token: str, user_id: str, token_type: str, db: Session):
         
         if jti:
             add_token_to_blacklist(db, jti, user_id, token_type)
+            blacklist_cache.add(jti)  # 현재 프로세스에는 즉시 반영
             return True
     except JWTError:
         pass
-    return False
\ No newline at end of file
+    return False
+
+def sign_resource(resource: str, ttl_seconds: int) -> dict:
+    """
+    리소스 URL 서명 (Authorization 헤더를 보낼 수 없는 <img> 요청용)
+    만료 시각을 ttl 단위로 올림하여 같은 기간 동안 URL이 바뀌지 않도록 함 (브라우저 캐시 유지)
+    """
+    expires = (int(time.time()) // ttl_seconds + 2) * ttl_seconds
+    message = f"{resource}:{expires}".encode()
+    signature = hmac.new(settings.get_secret_key().encode(), message, hashlib.sha256).hexdigest()
+    return {"expires": expires, "signature": signature}
+
+def verify_resource_signature(resource: str, expires: int, signature: str) -> bool:
+    """서명된 리소스 URL 검증"""
+    if expires < time.time():
+        return False
+    message = f"{resource}:{expires}".encode()
+    expected = hmac.new(settings.get_secret_key().encode(), message, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
@@ -0,0 +1,194 @@
+"""
+인증 캐시 모듈
+요청마다 발생하던 JWT 디코딩, 블랙리스트 조회, 사용자 조회를 프로세스 메모리에서 처리
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.config import settings
+from app.models.blacklist_token import BlacklistToken
+from app.models.user import User
+from app.schemas.auth_schemas import TokenData
+
+
+class VerifiedTokenCache:
+    """
+    서명 검증이 끝난 토큰 캐시
+
+    검증 전의 jti를 신뢰하지 않도록 토큰 원문의 SHA-256 다이제스트를 키로 사용하며,
+    각 항목은 토큰의 exp 시각까지만 유효
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[TokenData, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[TokenData]:
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            token_data, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return token_data
+
+    def set(self, token: str, token_data: TokenData, expires_at: float) -> None:
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = (token_data, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TokenBlacklistCache:
+    """
+    블랙리스트 jti 인메모리 집합
+
+    - refresh_interval마다 마지막으로 본 blacklisted_on 시각에서 overlap만큼 겹쳐서 증분 조회
+      (id는 삽입 시 할당되어 커밋 순서와 다를 수 있으므로 id 대신 시각 기준으로 조회하고,
+      늦게 커밋된 행과 워커 간 시계 차이는 겹치는 구간으로 보완)
+    - full_reload_interval마다 전체 재적재 (정리 작업으로 삭제된 행, overlap보다 늦게 커밋된 행 반영)
+    - 같은 프로세스에서 로그아웃한 토큰은 즉시 추가
+    "폐기되지 않음"이 대부분인 일반 요청은 DB 조회 없이 처리
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = 5.0,
+        full_reload_interval: float = 3600.0,
+        overlap: float = 60.0
+    ):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self.overlap = timedelta(seconds=overlap)
+        self._jtis: Set[str] = set()
+        self._last_seen: Optional[datetime] = None
+        self._last_refresh = 0.0
+        self._last_full_reload = 0.0
+        self._lock = threading.Lock()
+
+    def _refresh(self, db: Session) -> None:
+        now = time.monotonic()
+        if now - self._last_refresh < self.refresh_interval:
+            return
+
+        with self._lock:
+            if now - self._last_refresh < self.refresh_interval:
+                return  # 다른 스레드가 이미 갱신
+
+            query = db.query(BlacklistToken.token_jti, BlacklistToken.blacklisted_on)
+            if now - self._last_full_reload >= self.full_reload_interval:
+                rows = query.all()
+                self._jtis = {jti for jti, _ in rows}
+                self._last_full_reload = now
+            else:
+                if self._last_seen is not None:
+                    query = query.filter(BlacklistToken.blacklisted_on >= self._last_seen - self.overlap)
+                rows = query.all()
+                self._jtis.update(jti for jti, _ in rows)
+
+            seen = [blacklisted_on for _, blacklisted_on in rows if blacklisted_on is not None]
+            if seen:
+                self._last_seen = max(self._last_seen or seen[0], max(seen))
+            self._last_refresh = now
+
+    def is_blacklisted(self, db: Session, jti: str) -> bool:
+        self._refresh(db)
+        return jti in self._jtis
+
+    def add(self, jti: str) -> None:
+        with self._lock:
+            self._jtis.add(jti)
+
+    def invalidate(self) -> None:
+        """다음 조회 시 전체 재적재"""
+        with self._lock:
+            self._last_refresh = 0.0
+            self._last_full_reload = 0.0
+
+
+class UserCache:
+    """
+    짧은 TTL의 사용자 캐시
+
+    세션 간에 ORM 객체를 공유하지 않도록 컬럼 값만 저장하고,
+    조회 시 요청 세션에 쿼리 없이 병합된 인스턴스를 반환.
+    비밀번호 해시는 저장하지 않으므로 (다른 워커에서 변경되어도 오래된 해시로 검증하지 않도록)
+    캐시된 사용자의 password는 접근 시 DB에서 로드됨
+    """
+
+    EXCLUDED_COLUMNS = frozenset({"password"})
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, user_id: str) -> Optional[User]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            values, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+
+        user = User(**values)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    def set(self, user: User) -> None:
+        if self.ttl <= 0:
+            return
+        values = {
+            column.key: getattr(user, column.key)
+            for column in User.__mapper__.column_attrs
+            if column.key not in self.EXCLUDED_COLUMNS
+        }
+        with self._lock:
+            self._entries[user.id] = (values, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# 글로벌 인증 캐시 인스턴스
+token_cache = VerifiedTokenCache(max_size=settings.auth_token_cache_size)
+blacklist_cache = TokenBlacklistCache(
+    refresh_interval=settings.auth_blacklist_refresh_interval,
+    full_reload_interval=settings.auth_blacklist_full_reload_interval,
+    overlap=settings.auth_blacklist_refresh_overlap
+)
+user_cache = UserCache(ttl=settings.auth_user_cache_ttl, max_size=settings.auth_token_cache_size)
@@ -1,26 +1,105 @@
 from pydantic_settings import BaseSettings
-from typing import Optional, List
+from typing import Optional, List, Dict
 import secrets
 
 class Settings(BaseSettings):
     database_url: str
     debug: bool = False
     
+    # Async database pool settings
+    async_db_pool_size: int = 20
+    async_db_max_overflow: int = 30
+    
     # JWT Settings
     secret_key: Optional[str] = None
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 120
     refresh_token_expire_days: int = 7
     
+    # Rate limit settings
+    # 예: redis://redis:6379/1 (없으면 프로세스 메모리)
+    # 저장소 장애 시에는 토큰 버킷이 아니라 같은 전략의 프로세스 메모리 카운터로 대체됨:
+    # 대체 시점에 카운터가 0부터 시작해 한도만큼 다시 몰아서 허용되고 워커 수만큼 한도가 늘어나며,
+    # 한도를 채운 뒤에는 점진 충전 없이 가장 오래된 요청이 윈도우를 벗어나야 다음 요청이 허용됨
+    rate_limit_storage_uri: Optional[str] = None
+    rate_limit_strategy: str = "moving-window"  # moving-window, fixed-window, fixed-window-elastic-expiry
+    rate_limit_key_prefix: str = "polymind"
+    
+    # Password hashing settings
+    bcrypt_rounds: int = 12  # 변경 시 기존 해시는 다음 로그인에서 재해싱
+    password_hash_workers: int = 4  # 해싱 전용 스레드 수
+    password_hash_max_queue: int = 64  # 대기열 초과 시 503 응답
+    
+    # Authentication cache settings
+    auth_token_cache_size: int = 10000  # 검증된 토큰/사용자 캐시 최대 개수
+    auth_user_cache_ttl: float = 30.0  # 사용자 캐시 유지 시간 (초, 0이면 비활성화)
+    auth_blacklist_refresh_interval: float = 5.0  # 블랙리스트 증분 갱신 주기 (초)
+    auth_blacklist_full_reload_interval: float = 3600.0  # 블랙리스트 전체 재적재 주기 (초)
+    auth_blacklist_refresh_overlap: float = 60.0  # 증분 갱신 시 다시 조회하는 구간 (초, 늦은 커밋/시계 차이 보완)
+    
     # Encryption key for API keys
     encryption_key: Optional[str] = None
+    # 복호화된 API 키 캐시 유지 시간 (초, 0이면 비활성화)
+    # 키 저장/삭제 시 무효화는 요청을 처리한 프로세스에만 적용되므로, 다른 워커는 최대 이 시간 동안
+    # 이전 키(삭제된 키 포함)를 계속 사용할 수 있음. 즉시 반영이 필요하면 0으로 설정
+    api_key_cache_ttl: float = 60.0
     
     # CORS settings
     allowed_origins: List[str] = ["http://localhost:8080", "http://localhost:3000"]
     
     # Production settings
     environment: str = "development"  # development, production
-    
+    metrics_enabled: bool = False  # /metrics 엔드포인트 노출 (디버그 모드에서는 항상 노출)
+
+    # AI provider client pool settings
+    provider_client_pool_size: int = 256  # 캐시할 SDK 클라이언트 최대 개수
+    provider_client_idle_ttl: float = 600.0  # 미사용 클라이언트 제거 시간 (초)
+    provider_http_max_connections: int = 200
+    provider_http_max_keepalive: int = 50
+    provider_http_keepalive_expiry: float = 60.0
+    provider_http_timeout: float = 600.0
+
+    # Multi-provider generation settings
+    ai_multi_provider_timeout: float = 60.0  # 제공자별 제한 시간 (초)
+    ai_multi_deadline: float = 90.0  # 전체 요청 제한 시간 (초)
+    gemini_worker_threads: int = 32  # Gemini 동기 SDK 호출용 스레드 수
+
+    # AI usage quota settings (토큰 예산, 0이면 무제한)
+    quota_window_seconds: int = 86400  # 롤링 윈도우 길이 (초)
+    quota_bucket_seconds: int = 300  # 사용량 집계 버킷 크기 (초)
+    quota_default_tokens: int = 0  # 제공자별 기본 예산 (예: 2000000)
+    quota_provider_tokens: Dict[str, int] = {}  # 제공자별 예산 재정의 (예: {"anthropic": 500000})
+    quota_model_weights: Dict[str, float] = {}  # 모델 접두사별 차감 가중치 (예: {"claude-opus": 5.0})
+    quota_flush_interval: float = 10.0  # 사용량 DB 일괄 기록 주기 (초)
+    quota_sync_interval: float = 10.0  # 다른 워커의 사용량을 DB에서 다시 읽는 주기 (초)
+
+    # Chat context settings
+    chat_history_max_tokens: int = 16000  # 히스토리에 사용할 최대 토큰 (모델 윈도우와 별도 상한)
+    chat_history_max_messages: int = 100  # 예산 계산 시 조회할 최대 메시지 수
+
+    # SSE streaming settings
+    sse_flush_policy: str = "balanced"  # immediate, balanced, throughput (요청별 flush_policy로 재정의)
+    sse_disconnect_poll_interval: float = 0.5  # 클라이언트 연결 종료 확인 주기 (초)
+    stream_replay_buffer_size: int = 512  # 재연결 시 재생할 수 있는 최근 이벤트 수 (스트림별)
+    stream_resume_grace_seconds: float = 10.0  # X-Stream-Resumable 요청만 연결이 끊긴 뒤 재연결을 기다리는 시간 (그동안 토큰 계속 소비, 이후 생성 취소)
+    stream_retention_seconds: float = 60.0  # 완료된 스트림을 재연결용으로 보관하는 시간
+    stream_resync_max_chars: int = 262144  # 버퍼에서 밀려난 본문을 재연결용으로 보관하는 최대 글자 수 (스트림별)
+
+    # Chat turn persistence settings
+    turn_journal_retry_interval: float = 5.0  # 저장에 실패한 턴 재시도 주기 (초)
+    turn_journal_max_attempts: int = 20  # 이 횟수만큼 실패한 턴은 저널에서 제거
+    turn_write_behind_enabled: bool = False  # 완료된 턴을 큐에 넣고 백그라운드에서 배치 저장
+    turn_write_queue_size: int = 1000  # write-behind 큐 최대 크기 (가득 차면 스트림 종료 처리가 대기)
+    turn_write_batch_size: int = 100  # 한 트랜잭션에 저장할 최대 턴 수
+    turn_write_batch_interval: float = 0.05  # 배치를 모으는 최대 대기 시간 (초)
+
+    # Image blob store settings
+    blob_store_backend: str = "local"  # local (S3 호환 저장소는 추후 지원)
+    blob_store_path: str = "./data/blobs"
+    image_url_ttl_seconds: int = 86400  # 서명된 이미지 URL 유효 기간 단위 (초)
+    blob_gc_grace_seconds: float = 3600.0  # 최근 기록/재사용된 Blob은 참조가 없어도 남김 (저장 대기 중인 턴 보호)
+    blob_gc_interval: float = 3600.0  # 참조 없는 Blob 정리 주기 (초, 0이면 비활성화)
+
     class Config:
         env_file = ".env"
     
@@ -1,5 +1,6 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
@@ -23,6 +24,39 @@ else:
     )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def get_async_database_url(database_url: str) -> str:
+    """동기 드라이버 URL을 비동기 드라이버 URL로 변환 (asyncpg / aiosqlite)"""
+    scheme, _, rest = database_url.partition("://")
+    if scheme.startswith("postgresql"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme.startswith("sqlite"):
+        return f"sqlite+aiosqlite://{rest}"
+    return database_url
+
+# 비동기 엔진 (스트리밍 채팅 등 이벤트 루프에서 실행되는 경로용)
+if settings.database_url.startswith("postgresql"):
+    async_engine = create_async_engine(
+        get_async_database_url(settings.database_url),
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=settings.async_db_pool_size,
+        max_overflow=settings.async_db_max_overflow,
+        echo=False
+    )
+else:
+    async_engine = create_async_engine(
+        get_async_database_url(settings.database_url),
+        connect_args={"timeout": 20},
+        echo=False
+    )
+# 커밋 후에도 스트리밍 중 속성 접근이 추가 쿼리를 일으키지 않도록 expire 비활성화
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
 def get_db():
@@ -30,4 +64,8 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
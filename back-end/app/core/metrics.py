@@ -0,0 +1,48 @@
+"""
+프로세스 내부 메트릭 레지스트리
+카운터와 게이지를 이름별로 보관하고 /metrics 엔드포인트에서 스냅샷으로 제공
+"""
+
+import threading
+from typing import Callable, Dict
+
+
+class MetricsRegistry:
+    """스레드 안전한 간단한 카운터/게이지 레지스트리"""
+
+    def __init__(self):
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._gauge_callbacks: Dict[str, Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1) -> None:
+        """카운터 증가"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """게이지 값 설정"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float]) -> None:
+        """스냅샷 시점에 값을 계산하는 게이지 등록 (큐 깊이 등)"""
+        with self._lock:
+            self._gauge_callbacks[name] = callback
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            callbacks = dict(self._gauge_callbacks)
+        for name, callback in callbacks.items():
+            try:
+                gauges[name] = callback()
+            except Exception:
+                continue
+        return {"counters": counters, "gauges": gauges}
+
+
+# 글로벌 메트릭 레지스트리
+metrics = MetricsRegistry()
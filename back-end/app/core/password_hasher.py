@@ -0,0 +1,116 @@
+"""
+비밀번호 해싱 모듈
+bcrypt 연산을 전용 스레드풀에서 실행하여 요청 처리용 스레드풀/이벤트 루프를 점유하지 않도록 함
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from passlib.context import CryptContext
+
+from app.core.config import settings
+from app.core.metrics import metrics
+
+# 비용 파라미터(bcrypt__rounds)가 바뀌면 기존 해시는 로그인 시 재해싱 대상(needs_update)이 됨
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.bcrypt_rounds
+)
+
+
+class PasswordHasherBusy(Exception):
+    """해싱 대기열이 가득 찬 경우 (로그인 폭주 등)"""
+    pass
+
+
+class PasswordHasher:
+    """
+    크기가 제한된 전용 실행기에서 비밀번호 해싱/검증 수행
+
+    - 동시 실행 수는 max_workers, 대기열은 max_queue로 제한
+    - 대기열이 가득 차면 PasswordHasherBusy를 발생시켜 빠르게 거절 (503)
+    - 대기열 깊이, 실행 중 작업 수, 대기 시간을 메트릭으로 노출
+    """
+
+    def __init__(self, context: CryptContext, max_workers: int = 4, max_queue: int = 64):
+        self.context = context
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._pending = 0  # 제출되었으나 끝나지 않은 작업 (대기 + 실행 중)
+        self._running = 0
+        self._lock = threading.Lock()
+
+        metrics.register_gauge("password_hash_queue_depth", lambda: self.queue_depth)
+        metrics.register_gauge("password_hash_in_flight", lambda: self._running)
+
+    @property
+    def queue_depth(self) -> int:
+        """실행을 기다리는 작업 수"""
+        return self._pending - self._running
+
+    def _submit(self, func: Callable, *args: Any) -> Future:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                metrics.inc("password_hash_rejected_total")
+                raise PasswordHasherBusy("Password hashing queue is full")
+            self._pending += 1
+
+        enqueued_at = time.perf_counter()
+
+        def run():
+            with self._lock:
+                self._running += 1
+            metrics.inc("password_hash_wait_seconds_total", time.perf_counter() - enqueued_at)
+            try:
+                return func(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._pending -= 1
+                metrics.inc("password_hash_operations_total")
+
+        try:
+            return self._executor.submit(run)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+
+    async def _run(self, func: Callable, *args: Any) -> Any:
+        return await asyncio.wrap_future(self._submit(func, *args))
+
+    def _run_sync(self, func: Callable, *args: Any) -> Any:
+        """동기 라우트용 (동시 실행 수 제한은 동일하게 적용)"""
+        return self._submit(func, *args).result()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.context.verify, password, hashed_password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """검증 후 비용 파라미터가 바뀐 해시라면 새 해시를 함께 반환"""
+        return await self._run(self.context.verify_and_update, password, hashed_password)
+
+    def hash_sync(self, password: str) -> str:
+        return self._run_sync(self.context.hash, password)
+
+    def verify_sync(self, password: str, hashed_password: str) -> bool:
+        return self._run_sync(self.context.verify, password, hashed_password)
+
+    def verify_and_update_sync(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return self._run_sync(self.context.verify_and_update, password, hashed_password)
+
+
+# 글로벌 비밀번호 해셔 인스턴스
+password_hasher = PasswordHasher(
+    pwd_context,
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue
+)
@@ -9,6 +9,8 @@ from slowapi.errors import RateLimitExceeded
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
 import logging
+from typing import Any, Dict, Optional
+from app.core.config import settings
 
 try:
     import redis
@@ -38,23 +40,48 @@ def get_client_ip(request: Request) -> str:
     # 기본 클라이언트 IP
     return get_remote_address(request)
 
+def create_limiter(key_func, default_limits, storage_options: Optional[Dict[str, Any]] = None) -> Limiter:
+    """
+    설정된 저장소로 Limiter 생성
+
+    - RATE_LIMIT_STORAGE_URI(redis://, rediss://, redis+sentinel:// 등, Valkey 호환)가 있으면
+      워커/서버 간에 카운터를 공유 (moving-window는 Lua 스크립트로 원자적으로 계산)
+    - 저장소에 연결할 수 없으면 복구될 때까지 프로세스 메모리 카운터로 대체
+      (별도 토큰 버킷 없이 slowapi의 메모리 대체를 사용하므로 같은 전략으로 계산됨.
+      저장소의 카운트는 이어받지 않아 대체 직후 한도만큼 다시 허용되고, 워커별로 따로 셈)
+    - URI가 없으면 메모리 기반 (단일 프로세스용)
+    - storage_options는 저장소 생성자에 그대로 전달 (connection_pool, socket_timeout 등)
+    """
+    options = dict(
+        key_func=key_func,
+        default_limits=default_limits,
+        strategy=settings.rate_limit_strategy,
+        key_prefix=settings.rate_limit_key_prefix
+    )
+    
+    storage_uri = settings.rate_limit_storage_uri
+    if storage_uri and storage_uri.startswith("redis") and not REDIS_AVAILABLE:
+        logger.warning("⚠️  redis package is not installed - rate limits fall back to memory")
+        storage_uri = None
+    
+    if storage_uri:
+        return Limiter(
+            **options,
+            storage_uri=storage_uri,
+            storage_options=storage_options or {},
+            in_memory_fallback_enabled=True  # 저장소 장애 시 프로세스 메모리로 대체
+        )
+    return Limiter(**options)
+
 # Rate Limiter 초기화
 try:
-    if REDIS_AVAILABLE:
-        # Redis를 사용한 분산 환경 지원 (선택사항)
-        # limiter = Limiter(key_func=get_client_ip, storage_uri="redis://localhost:6379/1")
-        # 개발 환경에서는 메모리 기반 사용
-        limiter = Limiter(
-            key_func=get_client_ip,
-            default_limits=["1000/hour"]  # 기본 제한: 시간당 1000회
-        )
-        logger.info("✅ Rate Limiter initialized (Redis available but using memory)")
+    limiter = create_limiter(
+        key_func=get_client_ip,
+        default_limits=["1000/hour"]  # 기본 제한: 시간당 1000회
+    )
+    if settings.rate_limit_storage_uri and REDIS_AVAILABLE:
+        logger.info("✅ Rate Limiter initialized (shared storage with memory fallback)")
     else:
-        # 메모리 기반 (단일 서버용)
-        limiter = Limiter(
-            key_func=get_client_ip,
-            default_limits=["1000/hour"]  # 기본 제한: 시간당 1000회
-        )
         logger.info("✅ Rate Limiter initialized (memory-based)")
     
 except Exception as e:
@@ -119,31 +146,11 @@ class RateLimits:
 def get_authenticated_user_id(request: Request) -> str:
     """
     인증된 사용자의 ID를 키로 사용 (IP 기반보다 정확)
-    토큰에서 사용자 ID 추출
+    AuthContextMiddleware가 요청당 한 번 검증한 토큰 정보를 사용하므로 추가 디코딩 없음
     """
-    try:
-        # Authorization 헤더에서 토큰 추출
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return get_client_ip(request)
-        
-        token = auth_header.split(" ")[1]
-        
-        # JWT 토큰 검증 및 사용자 ID 추출
-        from app.core.auth import verify_token
-        token_data = verify_token(token)
-        
-        if token_data and token_data.user_id:
-            return f"user:{token_data.user_id}"
-        else:
-            return get_client_ip(request)
-    
-    except Exception as e:
-        logger.debug(f"Failed to extract user ID from token: {e}")
-        return get_client_ip(request)
-
-# 사용자 기반 Rate Limiter (인증된 요청용)
-user_limiter = Limiter(
-    key_func=get_authenticated_user_id,
-    default_limits=["500/hour"]
-)
\ No newline at end of file
+    from app.core.auth import get_auth_context
+    
+    auth_context = get_auth_context(request)
+    if auth_context is not None and auth_context.user_id:
+        return f"user:{auth_context.user_id}"
+    return get_client_ip(request)
@@ -0,0 +1,201 @@
+"""
+SSE 스트리밍 유틸리티
+프레임 인코딩과 제공자 델타 묶음 전송(크기/시간 기준 flush), 클라이언트 연결 종료 감시를 담당
+"""
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, TypeVar
+
+from starlette.requests import Request
+
+from app.core.config import settings
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    """스트리밍 도중 클라이언트 연결이 끊긴 경우"""
+    pass
+
+
+def encode_json(payload: Any) -> str:
+    """JSON 직렬화 (orjson이 설치되어 있으면 사용)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload).decode()
+    return json.dumps(payload)
+
+
+def sse_frame(payload: dict, event_id: Optional[int] = None) -> str:
+    """SSE data 프레임 생성 (event_id가 있으면 재연결용 id 필드 포함)"""
+    if event_id is not None:
+        return f"id: {event_id}\ndata: {encode_json(payload)}\n\n"
+    return f"data: {encode_json(payload)}\n\n"
+
+
+@dataclass(frozen=True)
+class FlushPolicy:
+    """버퍼가 max_bytes 이상이 되거나 첫 델타 후 max_delay초가 지나면 flush"""
+    max_bytes: int
+    max_delay: float
+
+    @property
+    def immediate(self) -> bool:
+        return self.max_bytes <= 0 or self.max_delay <= 0
+
+
+FLUSH_POLICIES: Dict[str, FlushPolicy] = {
+    "immediate": FlushPolicy(max_bytes=0, max_delay=0.0),  # 델타마다 전송 (기존 동작)
+    "balanced": FlushPolicy(max_bytes=512, max_delay=0.03),
+    "throughput": FlushPolicy(max_bytes=4096, max_delay=0.05),
+}
+
+
+def get_flush_policy(name: Optional[str] = None) -> FlushPolicy:
+    """이름으로 flush 정책 조회 (없으면 설정 기본값)"""
+    return FLUSH_POLICIES.get(name or settings.sse_flush_policy, FLUSH_POLICIES["balanced"])
+
+
+class ChunkCoalescer:
+    """
+    제공자 델타를 모아 한 번에 전송하기 위한 버퍼
+
+    사용 예:
+        async for item in coalescer.pace(stream):
+            text = coalescer.flush() if item is None else coalescer.add(item.content)
+            if text:
+                yield sse_frame({'type': 'chunk', 'content': text})
+        text = coalescer.flush()
+    """
+
+    def __init__(self, policy: FlushPolicy):
+        self.policy = policy
+        self._parts: List[str] = []
+        self._size = 0
+        self._first_at: Optional[float] = None
+
+    def add(self, text: str) -> Optional[str]:
+        """델타 추가. flush 조건을 만족하면 모인 텍스트 반환"""
+        if self.policy.immediate:
+            return text or None
+        if not text:
+            return None
+        if self._first_at is None:
+            self._first_at = time.monotonic()
+        self._parts.append(text)
+        self._size += len(text.encode("utf-8"))
+        if self._size >= self.policy.max_bytes:
+            return self.flush()
+        return None
+
+    def flush(self) -> Optional[str]:
+        """모인 텍스트를 반환하고 버퍼 비움 (비어 있으면 None)"""
+        if not self._parts:
+            return None
+        text = "".join(self._parts)
+        self._parts = []
+        self._size = 0
+        self._first_at = None
+        return text
+
+    def time_until_flush(self) -> Optional[float]:
+        """시간 창 만료까지 남은 초 (버퍼가 비어 있으면 None)"""
+        if self._first_at is None:
+            return None
+        return max(0.0, self._first_at + self.policy.max_delay - time.monotonic())
+
+    async def pace(self, source: AsyncIterator[T]) -> AsyncIterator[Optional[T]]:
+        """
+        source 항목을 그대로 전달하되, 다음 항목을 기다리는 동안 시간 창이 만료되면 None 전달
+
+        제공자가 잠시 멈춰도 버퍼에 남은 텍스트가 max_delay 이상 지연되지 않도록 함
+        """
+        if self.policy.immediate:
+            try:
+                async for item in source:
+                    yield item
+            finally:
+                if hasattr(source, "aclose"):
+                    await source.aclose()
+            return
+
+        iterator = source.__aiter__()
+        pending: Optional[asyncio.Future] = None
+        try:
+            while True:
+                if pending is None:
+                    pending = asyncio.ensure_future(iterator.__anext__())
+                timeout = self.time_until_flush()
+                if timeout is not None and not pending.done():
+                    done, _ = await asyncio.wait({pending}, timeout=timeout)
+                    if not done:
+                        yield None
+                        continue
+                try:
+                    item = await pending
+                except StopAsyncIteration:
+                    pending = None
+                    return
+                pending = None
+                yield item
+        finally:
+            await _close_stream(iterator, pending)
+
+
+async def watch_disconnect(
+    request: Request,
+    source: AsyncIterator[T],
+    poll_interval: float = 0.5
+) -> AsyncIterator[T]:
+    """
+    source 항목을 그대로 전달하면서 클라이언트 연결 종료를 감시
+
+    연결이 끊기면 대기 중인 제공자 호출을 취소하고 제공자 스트림을 닫은 뒤
+    ClientDisconnected를 발생시켜, 더 이상 토큰을 소비하지 않도록 함
+    """
+    iterator = source.__aiter__()
+    pending: Optional[asyncio.Future] = None
+    last_check = time.monotonic()
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            if not pending.done():
+                await asyncio.wait({pending}, timeout=poll_interval)
+            # 델타가 계속 도착하는 동안에도 poll_interval마다 확인
+            now = time.monotonic()
+            if now - last_check >= poll_interval:
+                last_check = now
+                if await request.is_disconnected():
+                    raise ClientDisconnected()
+            if not pending.done():
+                continue
+            try:
+                item = await pending
+            except StopAsyncIteration:
+                pending = None
+                return
+            pending = None
+            yield item
+    finally:
+        await _close_stream(iterator, pending)
+
+
+async def _close_stream(iterator: AsyncIterator, pending: Optional[asyncio.Future]) -> None:
+    """래핑한 제공자 스트림 정리"""
+    if pending is not None and not pending.done():
+        # 대기 중인 제공자 호출 취소 (스트림 정리는 취소된 제너레이터가 수행)
+        pending.cancel()
+        return
+    if pending is not None and not pending.cancelled():
+        pending.exception()  # 소비되지 않은 결과/예외 정리
+    if hasattr(iterator, "aclose"):
+        await iterator.aclose()
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from app.models.api_key import ApiKey
 from app.schemas.api_key_schemas import ApiKeyCreate
 from cryptography.fernet import Fernet
@@ -11,8 +12,14 @@ from app.core.config import settings
 # 고정된 암호화 키 (개발용)
 _FIXED_KEY = None
 
+# 암호화 객체 캐시 (요청마다 Fernet 생성 방지)
+_CIPHER_SUITE = None
+
 def get_cipher_suite():
-    global _FIXED_KEY
+    global _FIXED_KEY, _CIPHER_SUITE
+    
+    if _CIPHER_SUITE is not None:
+        return _CIPHER_SUITE
     
     encryption_key = settings.encryption_key
     if not encryption_key:
@@ -25,7 +32,8 @@ def get_cipher_suite():
     elif isinstance(encryption_key, str):
         encryption_key = encryption_key.encode()
     
-    return Fernet(encryption_key)
+    _CIPHER_SUITE = Fernet(encryption_key)
+    return _CIPHER_SUITE
 
 def encrypt_api_key(api_key: str) -> str:
     cipher_suite = get_cipher_suite()
@@ -44,6 +52,12 @@ def get_api_key(db: Session, user_id: str, provider: str):
 def get_all_user_api_keys(db: Session, user_id: str):
     return db.query(ApiKey).filter(ApiKey.user_id == user_id).all()
 
+async def get_all_user_api_keys_async(db: AsyncSession, user_id: str):
+    result = await db.execute(
+        select(ApiKey).where(ApiKey.user_id == user_id)
+    )
+    return result.scalars().all()
+
 def create_or_update_api_key(db: Session, user_id: str, api_key_data: ApiKeyCreate):
     encrypted_key = encrypt_api_key(api_key_data.apiKey)
     
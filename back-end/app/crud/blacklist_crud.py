@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from app.models.blacklist_token import BlacklistToken
 from datetime import datetime, timedelta
+from app.core.auth_cache import blacklist_cache
 
 def add_token_to_blacklist(db: Session, token_jti: str, user_id: str, token_type: str):
     """
@@ -42,4 +43,5 @@ def cleanup_expired_tokens(db: Session, days_old: int = 7):
         db.delete(token)
     
     db.commit()
+    blacklist_cache.invalidate()  # 삭제된 jti를 인메모리 블랙리스트에도 반영
     return len(expired_tokens)
\ No newline at end of file
@@ -1,25 +1,100 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func, desc, asc
+import asyncio
+import base64
+import logging
+import time
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, desc, asc, select, update, insert, bindparam
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
 from app.models.chat import Chat
 from app.models.message import Message
 from app.models.message_image import MessageImage
 from app.schemas.chat_schemas import ChatCreate, ChatUpdate, MessageCreate
+from app.services.blob_store import get_blob_store
 
-def get_user_chats(db: Session, user_id: str, limit: int = 50):
-    # 채팅 목록만 가져오기 (최근 메시지 정보 제거로 성능 개선)
-    chats = db.query(Chat).filter(
-        Chat.user_id == user_id
-    ).order_by(desc(Chat.updated_at)).limit(limit).all()
-    
+# 채팅 목록/상세/수정 응답(ChatResponse)에 필요한 컬럼 (메시지는 메시지 페이지 API로 별도 조회)
+CHAT_METADATA_COLUMNS = (
+    Chat.id,
+    Chat.title,
+    Chat.system_prompt,
+    Chat.model,
+    Chat.temperature,
+    Chat.max_tokens,
+    Chat.created_at,
+    Chat.updated_at
+)
+
+# 채팅 목록의 마지막 메시지 미리보기 길이 (DB에서 잘라서 가져옴)
+LAST_MESSAGE_PREVIEW_LENGTH = 100
+
+# 참조 확인 시 한 번의 IN 조회에 넣을 Blob 키 수
+BLOB_REFERENCE_BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+def get_user_chats(
+    db: Session,
+    user_id: str,
+    limit: int = 50,
+    include_message_count: bool = False,
+    include_last_message: bool = False
+) -> List[dict]:
+    """채팅 목록 조회 (ix_chats_user_id_updated_at 인덱스 역방향 탐색)
+
+    ChatResponse에 필요한 컬럼만 조회하고 메시지는 로드하지 않음.
+    메시지 수와 마지막 메시지 미리보기는 요청한 경우에만 SQL 상관 서브쿼리로 계산하며,
+    둘 다 uq_chat_message_order (chat_id, message_order) 인덱스로 채팅마다 한 번씩 탐색
+    """
+    columns = list(CHAT_METADATA_COLUMNS)
+
+    if include_message_count:
+        columns.append(
+            select(func.count()).where(
+                Message.chat_id == Chat.id
+            ).correlate(Chat).scalar_subquery().label("message_count")
+        )
+
+    last_message = None
+    if include_last_message:
+        last_message = aliased(Message)
+        columns.extend([
+            last_message.sender.label("last_message_sender"),
+            func.substr(last_message.content, 1, LAST_MESSAGE_PREVIEW_LENGTH).label("last_message_preview"),
+            last_message.created_at.label("last_message_at")
+        ])
+
+    query = select(*columns).where(Chat.user_id == user_id)
+    if last_message is not None:
+        last_message_id = select(Message.id).where(
+            Message.chat_id == Chat.id
+        ).order_by(Message.message_order.desc()).limit(1).correlate(Chat).scalar_subquery()
+        query = query.outerjoin(last_message, last_message.id == last_message_id)
+
+    rows = db.execute(query.order_by(desc(Chat.updated_at)).limit(limit)).mappings().all()
+
+    chats = []
+    for row in rows:
+        chat = {column.key: row[column.key] for column in CHAT_METADATA_COLUMNS}
+        if include_message_count:
+            chat["message_count"] = row["message_count"]
+        if include_last_message:
+            chat["last_message"] = None if row["last_message_sender"] is None else {
+                "sender": row["last_message_sender"],
+                "preview": row["last_message_preview"],
+                "created_at": row["last_message_at"]
+            }
+        chats.append(chat)
     return chats
 
-def get_chat_by_id(db: Session, chat_id: int, user_id: str):
-    return db.query(Chat).options(
-        joinedload(Chat.messages)
-    ).filter(
-        Chat.id == chat_id,
-        Chat.user_id == user_id
-    ).first()
+def get_chat_metadata(db: Session, chat_id: int, user_id: str):
+    """채팅 메타데이터만 조회 (메시지 로드 없음). 없으면 None"""
+    return db.execute(
+        select(*CHAT_METADATA_COLUMNS).where(
+            Chat.id == chat_id,
+            Chat.user_id == user_id
+        )
+    ).mappings().first()
 
 def create_chat(db: Session, user_id: str, chat_data: ChatCreate):
     db_chat = Chat(
@@ -36,17 +111,20 @@ def create_chat(db: Session, user_id: str, chat_data: ChatCreate):
     return db_chat
 
 def update_chat(db: Session, chat_id: int, user_id: str, chat_data: ChatUpdate):
-    chat = get_chat_by_id(db, chat_id, user_id)
-    if not chat:
-        return None
-    
+    """채팅 메타데이터 수정 (UPDATE ... RETURNING 한 번으로 수정 후 값을 반환, 메시지 로드 없음)"""
     update_data = chat_data.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(chat, field, value)
-    
-    chat.updated_at = func.now()
+    chat = db.execute(
+        update(Chat).where(
+            Chat.id == chat_id,
+            Chat.user_id == user_id
+        ).values(
+            **update_data,
+            updated_at=func.now()
+        ).returning(*CHAT_METADATA_COLUMNS).execution_options(synchronize_session=False)
+    ).mappings().first()
+    if chat is None:
+        return None
     db.commit()
-    db.refresh(chat)
     return chat
 
 def delete_chat(db: Session, chat_id: int, user_id: str):
@@ -56,13 +134,35 @@ def delete_chat(db: Session, chat_id: int, user_id: str):
     ).first()
     
     if chat:
+        blob_keys = _chat_blob_keys(db, chat_id)
         db.delete(chat)
         db.commit()
+        _cleanup_blobs(db, blob_keys)
         return True
     return False
 
-def get_chat_messages(db: Session, chat_id: int, user_id: str, limit: int = None, offset: int = 0):
-    chat = db.query(Chat).filter(
+def get_chat_messages(
+    db: Session,
+    chat_id: int,
+    user_id: str,
+    limit: int = 20,
+    before_order: Optional[int] = None,
+    after_order: Optional[int] = None
+) -> Optional[Tuple[List[Message], bool]]:
+    """커서(message_order) 기반 메시지 페이지 조회
+
+    OFFSET 없이 uq_chat_message_order (chat_id, message_order) 인덱스를 탐색하므로
+    대화 길이와 무관하게 일정한 비용이 들고, 페이지 사이에 새 메시지가 추가되어도
+    행이 누락되거나 중복되지 않음
+
+    Args:
+        before_order: 이 순서보다 이전 메시지 (과거 방향으로 스크롤)
+        after_order: 이 순서보다 이후 메시지 (새 메시지 조회)
+
+    Returns:
+        (최신순 메시지 목록, 요청 방향으로 더 조회할 메시지가 있는지) 또는 채팅이 없으면 None
+    """
+    chat = db.query(Chat.id).filter(
         Chat.id == chat_id,
         Chat.user_id == user_id
     ).first()
@@ -70,33 +170,70 @@ def get_chat_messages(db: Session, chat_id: int, user_id: str, limit: int = None
     if not chat:
         return None
     
+    # 이미지는 메타데이터만 로드 (바이너리는 이미지 엔드포인트에서 별도 제공)
     query = db.query(Message).options(
-        joinedload(Message.message_images)
+        selectinload(Message.message_images).load_only(
+            MessageImage.id,
+            MessageImage.message_id,
+            MessageImage.filename,
+            MessageImage.content_type,
+            MessageImage.size,
+            MessageImage.order_index,
+            MessageImage.blob_key
+        )
     ).filter(
         Message.chat_id == chat_id
-    ).order_by(Message.message_order.desc(), Message.created_at.desc())  # 최신 메시지부터 (DESC)
+    )
     
-    if limit:
-        query = query.offset(offset).limit(limit)
+    if after_order is not None:
+        # 기준 이후 메시지는 오래된 순으로 가져온 뒤 뒤집어 응답 순서(최신순)를 맞춤
+        query = query.filter(Message.message_order > after_order).order_by(Message.message_order.asc())
+    else:
+        if before_order is not None:
+            query = query.filter(Message.message_order < before_order)
+        query = query.order_by(Message.message_order.desc())  # 최신 메시지부터 (DESC)
     
-    return query.all()
+    # 한 건 더 조회하여 다음 페이지 존재 여부 판단 (COUNT 쿼리 불필요)
+    messages = query.limit(limit + 1).all()
+    has_more = len(messages) > limit
+    messages = messages[:limit]
+    
+    if after_order is not None:
+        messages.reverse()
+    
+    return messages, has_more
 
-def add_message_to_chat(db: Session, chat_id: int, user_id: str, message_data: MessageCreate):
-    chat = db.query(Chat).filter(
+def get_message_image(db: Session, chat_id: int, image_id: int):
+    """채팅에 속한 메시지 이미지 조회"""
+    return db.query(MessageImage).join(Message).filter(
+        MessageImage.id == image_id,
+        Message.chat_id == chat_id
+    ).first()
+
+def _reserve_message_orders_stmt(chat_id: int, user_id: str, count: int):
+    """채팅의 message_seq를 count만큼 증가시키고 새 값을 반환하는 UPDATE ... RETURNING
+
+    행 잠금으로 같은 채팅의 동시 요청이 직렬화되므로 순서 충돌이 없고,
+    소유자 확인과 updated_at 갱신도 같은 문장에서 처리
+    """
+    return update(Chat).where(
         Chat.id == chat_id,
         Chat.user_id == user_id
-    ).first()
-    
-    if not chat:
+    ).values(
+        message_seq=Chat.message_seq + count,
+        updated_at=func.now()
+    ).returning(Chat.message_seq).execution_options(synchronize_session=False)
+
+def reserve_message_orders(db: Session, chat_id: int, user_id: str, count: int = 1) -> Optional[int]:
+    """message_order count개를 예약하고 첫 번째 순서 반환 (채팅이 없으면 None, 커밋은 호출자가 수행)"""
+    last_order = db.execute(_reserve_message_orders_stmt(chat_id, user_id, count)).scalar()
+    return None if last_order is None else last_order - count + 1
+
+def add_message_to_chat(db: Session, chat_id: int, user_id: str, message_data: MessageCreate):
+    next_order = reserve_message_orders(db, chat_id, user_id)
+    if next_order is None:
         return None
     
-    # 다음 메시지 순서 계산
-    last_message = db.query(Message).filter(
-        Message.chat_id == chat_id
-    ).order_by(desc(Message.message_order)).first()
-    
-    next_order = (last_message.message_order + 1) if last_message else 1
-    
     db_message = Message(
         chat_id=chat_id,
         sender=message_data.sender,
@@ -108,10 +245,6 @@ def add_message_to_chat(db: Session, chat_id: int, user_id: str, message_data: M
     )
     
     db.add(db_message)
-    
-    # 채팅 업데이트 시간 갱신
-    chat.updated_at = func.now()
-    
     db.commit()
     db.refresh(db_message)
     return db_message
@@ -125,7 +258,218 @@ def clear_chat_messages(db: Session, chat_id: int, user_id: str):
     if not chat:
         return False
     
+    blob_keys = _chat_blob_keys(db, chat_id)
     db.query(Message).filter(Message.chat_id == chat_id).delete()
     chat.updated_at = func.now()
     db.commit()
-    return True
\ No newline at end of file
+    _cleanup_blobs(db, blob_keys)
+    return True
+
+def _chat_blob_keys(db: Session, chat_id: int) -> Set[str]:
+    """채팅의 이미지가 참조하는 Blob 키"""
+    return set(db.scalars(
+        select(MessageImage.blob_key).join(Message, MessageImage.message_id == Message.id).where(
+            Message.chat_id == chat_id,
+            MessageImage.blob_key.isnot(None)
+        ).distinct()
+    ))
+
+def _cleanup_blobs(db: Session, blob_keys: Set[str]) -> None:
+    """삭제 후 참조가 사라진 Blob 정리 (실패해도 요청은 성공, 남은 Blob은 주기적 GC가 정리)"""
+    try:
+        delete_unreferenced_blobs(db, blob_keys)
+    except Exception as e:
+        logger.warning(f"Failed to delete unreferenced blobs: {e}")
+
+def delete_unreferenced_blobs(db: Session, blob_keys: Iterable[str]) -> int:
+    """어떤 message_images 행도 참조하지 않는 Blob 삭제. 삭제한 개수 반환
+
+    콘텐츠 키라 다른 채팅/사용자의 이미지가 같은 Blob을 참조할 수 있으므로 남은 참조를 확인하고,
+    blob_gc_grace_seconds 안에 기록/재사용된 Blob은 아직 저장되지 않은 턴이 참조할 수 있어 남김
+    """
+    keys = list(set(blob_keys))
+    blob_store = get_blob_store()
+    cutoff = time.time() - settings.blob_gc_grace_seconds
+    deleted = 0
+    for start in range(0, len(keys), BLOB_REFERENCE_BATCH_SIZE):
+        batch = keys[start:start + BLOB_REFERENCE_BATCH_SIZE]
+        referenced = set(db.scalars(select(MessageImage.blob_key).where(MessageImage.blob_key.in_(batch))))
+        for key in batch:
+            if key in referenced:
+                continue
+            try:
+                if blob_store.last_used(key) > cutoff:
+                    continue
+            except FileNotFoundError:
+                continue
+            blob_store.delete(key)
+            deleted += 1
+    return deleted
+
+def sweep_unreferenced_blobs(db: Session) -> int:
+    """저장소 전체에서 참조 없는 Blob 정리 (주기적 GC). 삭제한 개수 반환"""
+    deleted = 0
+    batch: List[str] = []
+    for key in get_blob_store().iter_keys():
+        batch.append(key)
+        if len(batch) >= BLOB_REFERENCE_BATCH_SIZE:
+            deleted += delete_unreferenced_blobs(db, batch)
+            batch = []
+    if batch:
+        deleted += delete_unreferenced_blobs(db, batch)
+    return deleted
+
+# ==============================================================================
+# 비동기 CRUD (AI 스트리밍 경로용)
+# ==============================================================================
+
+async def get_chat_async(db: AsyncSession, chat_id: int, user_id: str):
+    result = await db.execute(
+        select(Chat).where(
+            Chat.id == chat_id,
+            Chat.user_id == user_id
+        )
+    )
+    return result.scalars().first()
+
+async def reserve_message_orders_async(db: AsyncSession, chat_id: int, user_id: str, count: int = 1) -> Optional[int]:
+    """message_order count개를 예약하고 첫 번째 순서 반환 (채팅이 없으면 None, 커밋은 호출자가 수행)"""
+    result = await db.execute(_reserve_message_orders_stmt(chat_id, user_id, count))
+    last_order = result.scalar()
+    return None if last_order is None else last_order - count + 1
+
+async def store_image_blobs(images: list) -> List[dict]:
+    """이미지 바이너리를 Blob 저장소에 저장하고 MessageImage 컬럼 값 반환 (DB에는 키만 보관)
+
+    Blob 키는 콘텐츠 해시이므로 같은 이미지를 다시 저장해도 중복되지 않음
+    """
+    blob_store = get_blob_store()
+    image_rows = []
+    for i, img in enumerate(images):
+        image_bytes = base64.b64decode(img['data'])
+        blob_key = await asyncio.to_thread(blob_store.put, image_bytes)
+        image_rows.append({
+            "filename": img['filename'],
+            "content_type": img['content_type'],
+            "size": len(image_bytes),
+            "blob_key": blob_key,
+            "order_index": i
+        })
+    return image_rows
+
+async def _save_token_counts_async(db: AsyncSession, token_counts: Dict[int, int]) -> None:
+    """히스토리 조회 중 계산한 기존 메시지 토큰 수를 한 번의 executemany UPDATE로 기록 (비어 있는 행만)"""
+    if not token_counts:
+        return
+    messages = Message.__table__
+    await db.execute(
+        update(messages).where(
+            messages.c.id == bindparam("message_id"),
+            messages.c.token_count.is_(None)
+        ).values(token_count=bindparam("counted_tokens")),
+        [{"message_id": message_id, "counted_tokens": count} for message_id, count in token_counts.items()]
+    )
+
+async def create_chat_turn_async(
+    db: AsyncSession,
+    chat_id: int,
+    user_id: str,
+    user_message: dict,
+    image_rows: List[dict],
+    replies: List[dict],
+    reply_slots: int = 1,
+    token_counts: Optional[Dict[int, int]] = None
+) -> Optional[Message]:
+    """채팅 한 턴(사용자 메시지, 첨부 이미지, AI 응답)을 하나의 트랜잭션으로 저장
+
+    순서 예약(updated_at 갱신 포함)과 모든 INSERT를 한 번의 커밋으로 처리.
+    user_message/replies는 Message 컬럼 값이며, 각 응답의 slot은 사용자 메시지 다음
+    몇 번째 순서인지를 나타냄 (0부터, reply_slots 미만).
+    token_counts({message_id: token_count})는 히스토리 조회 중 계산한 기존 메시지 토큰 수. 채팅이 없으면 None
+    """
+    first_order = await reserve_message_orders_async(db, chat_id, user_id, 1 + reply_slots)
+    if first_order is None:
+        return None
+    
+    db_user_message = Message(chat_id=chat_id, sender="user", message_order=first_order, **user_message)
+    db_user_message.message_images = [MessageImage(**row) for row in image_rows]
+    db.add(db_user_message)
+    
+    for reply in replies:
+        values = dict(reply)
+        slot = values.pop("slot")
+        db.add(Message(chat_id=chat_id, sender="ai", message_order=first_order + 1 + slot, **values))
+    
+    await _save_token_counts_async(db, token_counts or {})
+    await db.commit()
+    return db_user_message
+
+async def create_chat_turns_async(db: AsyncSession, turns: list) -> List[bool]:
+    """여러 채팅 턴을 한 트랜잭션에서 다중 행 INSERT로 저장 (write-behind 배치용)
+
+    각 턴은 chat_id, user_id, user_message, image_rows, replies, reply_slots, token_counts 속성을 가짐.
+    순서는 채팅별로 한 번의 UPDATE로 예약하고 (교착 방지를 위해 chat_id 순),
+    사용자 메시지/이미지/AI 응답은 각각 executemany로 삽입.
+    반환값은 턴별 저장 여부 (채팅이 없으면 False)
+    """
+    needed: Dict[Tuple[int, str], int] = {}
+    for turn in turns:
+        key = (turn.chat_id, turn.user_id)
+        needed[key] = needed.get(key, 0) + 1 + turn.reply_slots
+    
+    next_orders: Dict[Tuple[int, str], int] = {}
+    for key in sorted(needed):
+        first_order = await reserve_message_orders_async(db, key[0], key[1], needed[key])
+        if first_order is not None:
+            next_orders[key] = first_order
+    
+    saved = []
+    planned = []
+    for turn in turns:
+        key = (turn.chat_id, turn.user_id)
+        if key not in next_orders:
+            saved.append(False)
+            continue
+        planned.append((turn, next_orders[key]))
+        next_orders[key] += 1 + turn.reply_slots
+        saved.append(True)
+    
+    if planned:
+        result = await db.execute(
+            insert(Message).returning(Message.id, sort_by_parameter_order=True),
+            [
+                {"chat_id": turn.chat_id, "sender": "user", "message_order": first_order, **turn.user_message}
+                for turn, first_order in planned
+            ]
+        )
+        user_message_ids = result.scalars().all()
+        
+        image_rows = [
+            {"message_id": message_id, **row}
+            for (turn, _), message_id in zip(planned, user_message_ids)
+            for row in turn.image_rows
+        ]
+        if image_rows:
+            await db.execute(insert(MessageImage), image_rows)
+        
+        reply_rows = []
+        for turn, first_order in planned:
+            for reply in turn.replies:
+                values = dict(reply)
+                slot = values.pop("slot")
+                reply_rows.append({
+                    "chat_id": turn.chat_id,
+                    "sender": "ai",
+                    "message_order": first_order + 1 + slot,
+                    **values
+                })
+        if reply_rows:
+            await db.execute(insert(Message), reply_rows)
+        
+        token_counts: Dict[int, int] = {}
+        for turn, _ in planned:
+            token_counts.update(turn.token_counts)
+        await _save_token_counts_async(db, token_counts)
+    
+    await db.commit()
+    return saved
@@ -1,22 +1,28 @@
+import hmac
+import re
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from app.models.user import User
 from app.schemas.auth_schemas import UserCreate, UserUpdate
-from passlib.context import CryptContext
+from app.core.auth_cache import user_cache
+from app.core.password_hasher import password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# 이메일 형식 정규식
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return password_hasher.hash_sync(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify_sync(plain_password, hashed_password)
 
 def get_user_by_email(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 
 def get_user_by_id(db: Session, user_id: str):
-    return db.query(User).filter(User.id == user_id).first()
+    # 인증 캐시에서 병합된 인스턴스가 세션에 있더라도 DB 값으로 갱신
+    return db.query(User).populate_existing().filter(User.id == user_id).first()
 
 def create_user(db: Session, user: UserCreate):
     # 사용자 ID 중복 확인
@@ -37,13 +43,8 @@ def create_user(db: Session, user: UserCreate):
     return db_user
 
 def authenticate_user(db: Session, identifier: str, password: str):
-    import re
-    
-    # 이메일 형식 정규식 검증
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    
     # identifier가 이메일인지 ID인지 판단
-    if re.match(email_pattern, identifier):
+    if EMAIL_PATTERN.match(identifier):
         # 이메일로 로그인
         user = get_user_by_email(db, identifier)
     else:
@@ -52,8 +53,14 @@ def authenticate_user(db: Session, identifier: str, password: str):
     
     if not user:
         return False
-    if not verify_password(password, user.password):
+    verified, new_hash = password_hasher.verify_and_update_sync(password, user.password)
+    if not verified:
         return False
+    if new_hash:
+        # 해싱 비용 설정이 바뀐 경우 로그인 시 재해싱
+        user.password = new_hash
+        db.commit()
+        user_cache.invalidate(user.id)
     return user
 
 def update_user_last_login(db: Session, user_id: str):
@@ -62,6 +69,7 @@ def update_user_last_login(db: Session, user_id: str):
         user.updated_at = func.now()
         db.commit()
         db.refresh(user)
+        user_cache.invalidate(user_id)
     return user
 
 def update_user_info(db: Session, user_id: str, user_update: UserUpdate):
@@ -85,6 +93,7 @@ def update_user_info(db: Session, user_id: str, user_update: UserUpdate):
     user.updated_at = func.now()
     db.commit()
     db.refresh(user)
+    user_cache.invalidate(user_id)
     return user
 
 def change_user_password(db: Session, user_id: str, current_password: str, new_password: str, is_reset: bool = False):
@@ -93,13 +102,17 @@ def change_user_password(db: Session, user_id: str, current_password: str, new_p
     if not user:
         return False
     
-    # 비밀번호 재설정이 아닌 경우에만 현재 비밀번호 확인
     if not is_reset:
+        # 현재 비밀번호 확인 (검증된 평문과 비교하므로 추가 해싱 불필요)
         if not verify_password(current_password, user.password):
             return False
+        is_same_password = hmac.compare_digest(new_password.encode(), current_password.encode())
+    else:
+        # 비밀번호 재설정은 현재 평문이 없으므로 해시와 비교
+        is_same_password = verify_password(new_password, user.password)
     
     # 새 비밀번호가 현재 비밀번호와 같은지 확인
-    if verify_password(new_password, user.password):
+    if is_same_password:
         raise ValueError('새 비밀번호는 현재 비밀번호와 달라야 합니다.')
     
     # 새 비밀번호로 업데이트
@@ -107,4 +120,75 @@ def change_user_password(db: Session, user_id: str, current_password: str, new_p
     user.updated_at = func.now()
     db.commit()
     db.refresh(user)
-    return True
\ No newline at end of file
+    user_cache.invalidate(user_id)
+    return True
+
+# ==============================================================================
+# 비동기 버전 (인증 라우트용, 해싱은 전용 실행기에서 수행)
+# ==============================================================================
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
+
+async def get_user_by_id_async(db: AsyncSession, user_id: str):
+    result = await db.execute(
+        select(User).where(User.id == user_id).execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
+
+async def create_user_async(db: AsyncSession, user: UserCreate):
+    # 사용자 ID 중복 확인
+    existing_user_by_id = await get_user_by_id_async(db, user.id)
+    if existing_user_by_id:
+        raise ValueError("User ID already exists")
+    
+    hashed_password = await password_hasher.hash(user.password)
+    db_user = User(
+        id=user.id,  # 사용자가 입력한 ID 사용
+        email=user.email,
+        password=hashed_password,
+        name=user.name
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def authenticate_user_async(db: AsyncSession, identifier: str, password: str):
+    # identifier가 이메일인지 ID인지 판단
+    if EMAIL_PATTERN.match(identifier):
+        user = await get_user_by_email_async(db, identifier)
+    else:
+        user = await get_user_by_id_async(db, identifier)
+    
+    if not user:
+        return False
+    verified, new_hash = await password_hasher.verify_and_update(password, user.password)
+    if not verified:
+        return False
+    if new_hash:
+        # 해싱 비용 설정이 바뀐 경우 로그인 시 재해싱
+        user.password = new_hash
+        await db.commit()
+        user_cache.invalidate(user.id)
+    return user
+
+async def change_user_password_async(db: AsyncSession, user_id: str, current_password: str, new_password: str):
+    """사용자 비밀번호 변경 (검증 1회 + 해싱 1회)"""
+    user = await get_user_by_id_async(db, user_id)
+    if not user:
+        return False
+    
+    if not await password_hasher.verify(current_password, user.password):
+        return False
+    
+    # 새 비밀번호가 현재 비밀번호와 같은지 확인 (검증된 평문과 비교)
+    if hmac.compare_digest(new_password.encode(), current_password.encode()):
+        raise ValueError('새 비밀번호는 현재 비밀번호와 달라야 합니다.')
+    
+    user.password = await password_hasher.hash(new_password)
+    user.updated_at = func.now()
+    await db.commit()
+    user_cache.invalidate(user_id)
+    return True
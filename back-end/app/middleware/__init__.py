@@ -1,3 +1,4 @@
 from .security import SecurityHeadersMiddleware, RequestLoggingMiddleware
+from .auth_context import AuthContextMiddleware
 
-__all__ = ["SecurityHeadersMiddleware", "RequestLoggingMiddleware"]
\ No newline at end of file
+__all__ = ["SecurityHeadersMiddleware", "RequestLoggingMiddleware", "AuthContextMiddleware"]
\ No newline at end of file
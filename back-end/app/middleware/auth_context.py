@@ -0,0 +1,20 @@
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+from app.core.auth import resolve_auth_context
+
+class AuthContextMiddleware:
+    """
+    요청 단위 인증 컨텍스트 미들웨어
+
+    Authorization 헤더의 토큰을 요청당 한 번만 검증해 request.state.auth에 저장하고,
+    Rate Limiter 키 함수, get_current_user, 로깅이 이를 공유
+    (응답 본문을 감싸지 않는 순수 ASGI 미들웨어라 스트리밍 응답에 영향 없음)
+    """
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] == "http":
+            authorization = Headers(scope=scope).get("authorization")
+            scope.setdefault("state", {})["auth"] = resolve_auth_context(authorization)
+        await self.app(scope, receive, send)
@@ -1,5 +1,6 @@
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
 from app.core.config import settings
 import time
 import uuid
@@ -31,28 +32,41 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         
         return response
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
     """
     요청 로깅 미들웨어 (보안 고려)
+    응답 본문을 감싸지 않는 순수 ASGI 미들웨어라 스트리밍 응답은 끝난 뒤 전체 시간으로 기록
     """
-    async def dispatch(self, request: Request, call_next):
-        if not settings.debug:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not settings.debug:
             # 프로덕션에서는 로깅 최소화
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
         
         # 개발환경에서만 상세 로깅
         start_time = time.time()
+        status_code = 500
         
-        response = await call_next(request)
-        
-        process_time = time.time() - start_time
-        
-        # 민감한 경로는 로깅하지 않음
-        sensitive_paths = ["/auth/login", "/auth/register", "/api-keys"]
-        if any(path in str(request.url) for path in sensitive_paths):
-            return response
-        
-        print(f"[{request.state.request_id if hasattr(request.state, 'request_id') else 'REQ'}] "
-              f"{request.method} {request.url.path} - {response.status_code} - {process_time:.3f}s")
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
         
-        return response
\ No newline at end of file
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            process_time = time.time() - start_time
+            
+            # 민감한 경로는 로깅하지 않음
+            sensitive_paths = ["/auth/login", "/auth/register", "/api-keys"]
+            if not any(path in scope["path"] for path in sensitive_paths):
+                # 인증 컨텍스트 미들웨어가 계산한 사용자 정보 사용 (토큰 재검증 없음)
+                state = scope.get("state", {})
+                auth = state.get("auth")
+                user_label = f"user:{auth.user_id}" if auth else "anonymous"
+                print(f"[{state.get('request_id', 'REQ')}] "
+                      f"{scope['method']} {scope['path']} - {user_label} - {status_code} - {process_time:.3f}s")
@@ -7,5 +7,6 @@ from .user_session import UserSession
 from .user_preferences import UserPreferences
 from .blacklist_token import BlacklistToken
 from .email_verification import EmailVerification, PasswordResetToken
+from .usage_record import UsageRecord
 
-__all__ = ["User", "ApiKey", "Chat", "Message", "MessageImage", "UserSession", "UserPreferences", "BlacklistToken", "EmailVerification", "PasswordResetToken"]
\ No newline at end of file
+__all__ = ["User", "ApiKey", "Chat", "Message", "MessageImage", "UserSession", "UserPreferences", "BlacklistToken", "EmailVerification", "PasswordResetToken", "UsageRecord"]
\ No newline at end of file
@@ -8,5 +8,5 @@ class BlacklistToken(Base):
     id = Column(Integer, primary_key=True, index=True)
     token_jti = Column(String, unique=True, index=True, nullable=False)  # JWT ID (jti)
     user_id = Column(String, nullable=False)  # 사용자 ID는 문자열
-    blacklisted_on = Column(DateTime, default=datetime.utcnow)
+    blacklisted_on = Column(DateTime, default=datetime.utcnow, index=True)  # 증분 갱신 기준 시각
     token_type = Column(String, nullable=False)  # 'access' or 'refresh'
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Numeric, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -13,9 +13,15 @@ class Chat(Base):
     model = Column(String(50), nullable=False)
     temperature = Column(Numeric(3, 2), default=0.7, nullable=False)
     max_tokens = Column(Integer, default=2048, nullable=False)
+    message_seq = Column(Integer, default=0, server_default="0", nullable=False)  # 마지막으로 할당된 message_order
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
     
     # 관계 설정
     user = relationship("User", back_populates="chats")
-    messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan")
\ No newline at end of file
+    messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan")
+    
+    # 채팅 목록 조회 (user_id로 찾고 updated_at 역순으로 정렬) 인덱스
+    __table_args__ = (
+        Index('ix_chats_user_id_updated_at', 'user_id', 'updated_at'),
+    )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, CheckConstraint, UniqueConstraint, false
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -16,6 +16,7 @@ class Message(Base):
     api_provider = Column(String(20))
     model_name = Column(String(100))
     token_count = Column(Integer)
+    truncated = Column(Boolean, default=False, server_default=false(), nullable=False)  # 클라이언트 연결 종료로 중단된 응답
 
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
     
@@ -7,10 +7,11 @@ class MessageImage(Base):
     __tablename__ = "message_images"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    message_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), nullable=False)
+    message_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), nullable=False, index=True)
     filename = Column(String(255), nullable=False)  # 원본 파일명
     content_type = Column(String(100), nullable=False)  # MIME 타입 (image/jpeg, image/png 등)
-    data = Column(Text, nullable=False)  # Base64로 인코딩된 이미지 데이터
+    blob_key = Column(String(64), index=True)  # Blob 저장소 콘텐츠 키 (SHA-256)
+    data = Column(Text)  # 레거시 Base64 데이터 (Blob 저장소 이전 전 행만 사용)
     size = Column(Integer, nullable=False)  # 파일 크기 (bytes)
     order_index = Column(Integer, nullable=False, default=0)  # 이미지 순서
     created_at = Column(DateTime, server_default=func.now(), nullable=False)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class UsageRecord(Base):
+    __tablename__ = "usage_records"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String(50), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    provider = Column(String(20), nullable=False)
+    model_name = Column(String(100))
+    bucket_start = Column(DateTime, nullable=False)  # 집계 구간 시작 시각 (UTC)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    weighted_tokens = Column(Integer, nullable=False, default=0)  # 모델 가중치를 적용한 쿼터 차감량
+    request_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    
+    # 롤링 윈도우 합계 조회용 인덱스
+    __table_args__ = (
+        Index('ix_usage_records_user_provider_bucket', 'user_id', 'provider', 'bucket_start'),
+    )
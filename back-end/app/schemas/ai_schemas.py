@@ -10,6 +10,7 @@ class TextGenerationRequest(BaseModel):
     max_tokens: int = Field(default=1000, ge=1, le=4000)
     temperature: float = Field(default=0.7, ge=0.0, le=2.0)
     model: Optional[str] = Field(default=None, description="사용할 모델 (선택사항)", example=None)
+    system_prompt: Optional[str] = Field(default=None, description="시스템 프롬프트")
 
 class ChatMessage(BaseModel):
     role: Literal["user", "assistant", "system"]
@@ -33,6 +34,27 @@ class ChatGenerationRequest(BaseModel):
     temperature: Optional[float] = Field(default=None, description="Temperature 값")
     system_prompt: Optional[str] = Field(default=None, description="시스템 프롬프트")
     include_history: bool = Field(default=True, description="이전 대화 내역 포함 여부")
+    flush_policy: Optional[Literal["immediate", "balanced", "throughput"]] = Field(
+        default=None,
+        description="스트리밍 청크 묶음 정책 (기본값은 서버 설정)"
+    )
+
+class ChatCompareTarget(BaseModel):
+    provider: Literal["openai", "anthropic", "google"] = Field(..., description="AI 서비스 제공자")
+    model: Optional[str] = Field(default=None, description="사용할 모델")
+
+class ChatCompareRequest(BaseModel):
+    message: str = Field(..., description="사용자 메시지")
+    images: Optional[List[ImageData]] = Field(default=None, description="첨부된 이미지들")
+    targets: List[ChatCompareTarget] = Field(..., min_length=1, max_length=6, description="비교할 제공자/모델 목록")
+    max_tokens: Optional[int] = Field(default=None, description="최대 토큰 수")
+    temperature: Optional[float] = Field(default=None, description="Temperature 값")
+    system_prompt: Optional[str] = Field(default=None, description="시스템 프롬프트")
+    include_history: bool = Field(default=True, description="이전 대화 내역 포함 여부")
+    flush_policy: Optional[Literal["immediate", "balanced", "throughput"]] = Field(
+        default=None,
+        description="스트리밍 청크 묶음 정책 (기본값은 서버 설정)"
+    )
 
 class TextGenerationResponse(BaseModel):
     content: str
@@ -41,10 +63,17 @@ class TextGenerationResponse(BaseModel):
     tokens_used: Optional[int] = None
     cost: Optional[float] = None
 
+class ProviderErrorResponse(BaseModel):
+    provider: str
+    error: str
+    timed_out: bool = False
+
 class MultiTextGenerationResponse(BaseModel):
     responses: List[TextGenerationResponse]
     total_tokens: int
     total_cost: Optional[float] = None
+    errors: List[ProviderErrorResponse] = Field(default=[], description="제공자별 실패 내역")
+    deadline_exceeded: bool = Field(default=False, description="전체 제한 시간 초과로 부분 결과만 반환된 경우")
 
 class ProviderStatusResponse(BaseModel):
     available_providers: List[str]
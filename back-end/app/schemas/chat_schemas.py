@@ -9,7 +9,6 @@ class MessageImageResponse(BaseModel):
     id: int
     filename: str
     content_type: str
-    data: str
     size: int
     order_index: int
 
@@ -46,6 +45,7 @@ class MessageResponse(BaseModel):
     api_provider: Optional[str] = None
     model_name: Optional[str] = None
     token_count: Optional[int] = None
+    truncated: bool = False
     message_images: List[MessageImageResponse] = []
     images: Optional[List[Dict[str, Any]]] = None  # 하위 호환성을 위한 변환된 이미지 데이터
     created_at: datetime
@@ -61,4 +61,13 @@ class ChatResponse(BaseModel):
     max_tokens: int
     created_at: datetime
     updated_at: datetime
-    messages: List[MessageResponse] = []
\ No newline at end of file
+
+class ChatLastMessage(BaseModel):
+    sender: str
+    preview: str  # 앞부분만 잘라낸 내용
+    created_at: datetime
+
+class ChatListItemResponse(ChatResponse):
+    # 목록 조회 시 요청한 경우에만 포함
+    message_count: Optional[int] = None
+    last_message: Optional[ChatLastMessage] = None
\ No newline at end of file
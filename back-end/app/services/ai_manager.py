@@ -1,8 +1,10 @@
+import asyncio
 from typing import Dict, List, Optional, AsyncGenerator
-from .ai_service import AIService, AIResponse
+from .ai_service import AIService, AIResponse, MultiAIResponse, ProviderError
 from .openai_service import OpenAIService
 from .anthropic_service import AnthropicService
 from .gemini_service import GeminiService
+from ..core.config import settings
 
 class AIManager:
     def __init__(self):
@@ -40,6 +42,7 @@ class AIManager:
         # 스트리밍 메서드를 사용하여 전체 응답을 수집
         full_content = ""
         final_response = None
+        usage = None
         
         async for chunk in self.generate_text_stream(
             prompt=prompt,
@@ -53,6 +56,8 @@ class AIManager:
         ):
             full_content += chunk.content
             final_response = chunk  # 마지막 청크의 메타데이터 사용
+            if chunk.tokens_used is not None:
+                usage = chunk  # 제공자가 보고한 사용량 (마지막 청크)
         
         # 최종 응답 생성
         if final_response:
@@ -60,7 +65,9 @@ class AIManager:
                 content=full_content,
                 provider=final_response.provider,
                 model=final_response.model,
-                tokens_used=final_response.tokens_used
+                tokens_used=usage.tokens_used if usage else None,
+                input_tokens=usage.input_tokens if usage else None,
+                output_tokens=usage.output_tokens if usage else None
             )
         else:
             raise ValueError(f"No response received from provider {provider}")
@@ -72,32 +79,72 @@ class AIManager:
         max_tokens: int = 1000,
         temperature: float = 0.7,
         user_api_keys: Optional[Dict[str, str]] = None,
+        provider_timeout: Optional[float] = None,
+        deadline: Optional[float] = None,
         **kwargs
-    ) -> List[AIResponse]:
-        """여러 AI 서비스로 동시 텍스트 생성 (사용자 API 키 지원)"""
+    ) -> MultiAIResponse:
+        """여러 AI 서비스로 동시 텍스트 생성 (사용자 API 키 지원)
+
+        각 제공자를 TaskGroup으로 동시에 실행하여 전체 지연 시간이
+        가장 느린 제공자 기준이 되도록 함. 전체 deadline 초과 시
+        완료된 결과만 부분 반환
+        """
         if providers is None:
             providers = self.get_available_services(user_api_keys)
+        if provider_timeout is None:
+            provider_timeout = settings.ai_multi_provider_timeout
+        if deadline is None:
+            deadline = settings.ai_multi_deadline
+        
+        results: Dict[str, AIResponse] = {}
+        errors: Dict[str, ProviderError] = {}
         
-        results = []
-        for provider in providers:
+        async def run_provider(provider: str):
             try:
                 # 해당 프로바이더의 사용자 API 키 가져오기
                 api_key = user_api_keys.get(provider) if user_api_keys else None
                 
-                response = await self.generate_text(
-                    prompt=prompt,
+                async with asyncio.timeout(provider_timeout):
+                    results[provider] = await self.generate_text(
+                        prompt=prompt,
+                        provider=provider,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        api_key=api_key,  # 사용자 API 키 전달
+                        **kwargs
+                    )
+            except TimeoutError:
+                errors[provider] = ProviderError(
                     provider=provider,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
-                    api_key=api_key,  # 사용자 API 키 전달
-                    **kwargs
+                    error=f"Provider timed out after {provider_timeout}s",
+                    timed_out=True
                 )
-                results.append(response)
             except Exception as e:
-                # 개별 서비스 실패 시 계속 진행
-                continue
+                # 개별 서비스 실패는 다른 제공자에 영향을 주지 않도록 기록만 함
+                errors[provider] = ProviderError(provider=provider, error=str(e))
+        
+        deadline_exceeded = False
+        try:
+            async with asyncio.timeout(deadline):
+                async with asyncio.TaskGroup() as task_group:
+                    for provider in providers:
+                        task_group.create_task(run_provider(provider))
+        except TimeoutError:
+            deadline_exceeded = True
+            for provider in providers:
+                if provider not in results and provider not in errors:
+                    errors[provider] = ProviderError(
+                        provider=provider,
+                        error=f"Deadline of {deadline}s exceeded",
+                        timed_out=True
+                    )
         
-        return results
+        # 요청한 제공자 순서 유지
+        return MultiAIResponse(
+            responses=[results[p] for p in providers if p in results],
+            errors=[errors[p] for p in providers if p in errors],
+            deadline_exceeded=deadline_exceeded
+        )
     
     async def generate_text_stream(
         self,
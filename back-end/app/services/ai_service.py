@@ -3,15 +3,48 @@ from typing import Dict, Any, Optional, List, AsyncGenerator
 from pydantic import BaseModel
 
 class AIResponse(BaseModel):
+    """AI 응답 (스트리밍에서는 청크 단위)
+
+    스트리밍의 마지막 청크는 content가 비어 있고 제공자가 보고한 사용량만 포함
+    """
     content: str
     provider: str
     model: str
     tokens_used: Optional[int] = None
+    input_tokens: Optional[int] = None
+    output_tokens: Optional[int] = None
     cost: Optional[float] = None
 
+class ProviderError(BaseModel):
+    provider: str
+    error: str
+    timed_out: bool = False
+
+class MultiAIResponse(BaseModel):
+    """여러 제공자 동시 생성 결과 (부분 결과 포함)"""
+    responses: List[AIResponse] = []
+    errors: List[ProviderError] = []
+    deadline_exceeded: bool = False
+
 class AIService(ABC):
     """AI 서비스 추상화 인터페이스"""
     
+    # 모델명 접두사별 컨텍스트 윈도우 (토큰), 각 서비스에서 오버라이드
+    CONTEXT_WINDOWS: Dict[str, int] = {}
+    DEFAULT_CONTEXT_WINDOW = 128000
+    
+    def resolve_model(self, model: Optional[str]) -> Optional[str]:
+        """별칭을 실제 API 모델명으로 변환 (기본 구현: 그대로 반환)"""
+        return model
+    
+    def get_context_window(self, model: Optional[str]) -> int:
+        """모델의 컨텍스트 윈도우 크기 반환 (가장 긴 접두사 일치 기준)"""
+        resolved = self.resolve_model(model) or ""
+        for prefix in sorted(self.CONTEXT_WINDOWS, key=len, reverse=True):
+            if resolved.startswith(prefix):
+                return self.CONTEXT_WINDOWS[prefix]
+        return self.DEFAULT_CONTEXT_WINDOW
+    
     @abstractmethod
     async def generate_text(
         self,
@@ -1,12 +1,51 @@
-import anthropic
 from typing import Optional, List, Dict, AsyncGenerator
 from .ai_service import AIService, AIResponse
+from .client_pool import client_pool
 from ..core.config import settings
 
 class AnthropicService(AIService):
+    DEFAULT_MODEL = "claude-sonnet-4-20250514"
+    
+    SUPPORTED_MODELS = {
+        "claude-opus-4-1-20250805",
+        "claude-opus-4-20250514",
+        "claude-sonnet-4-20250514",
+        "claude-3-7-sonnet-20250219",
+        "claude-3-5-sonnet-20241022",
+        "claude-3-5-haiku-20241022",
+        "claude-3-haiku-20240307"
+    }
+    
+    # 모델명 매핑 (레거시 별칭들만 매핑, 프론트엔드에서 특정 버전 직접 사용)
+    MODEL_MAPPING = {
+        "Opus4.1": "claude-opus-4-1-20250805",
+        "Opus4": "claude-opus-4-20250514",
+        "Sonnet4": "claude-sonnet-4-20250514",
+        "Sonnet3.7": "claude-3-7-sonnet-20250219",
+        "Sonnet3.5": "claude-3-5-sonnet-20241022",
+        "Haiku3.5": "claude-3-5-haiku-20241022",
+        "Haiku3": "claude-3-haiku-20240307",
+        "Opus": "claude-opus-4-1-20250805",
+        "Sonnet": "claude-sonnet-4-20250514",
+        "Haiku": "claude-3-5-haiku-20241022"
+    }
+    
+    # 모든 Claude 모델은 200K 컨텍스트 윈도우
+    CONTEXT_WINDOWS = {
+        "claude": 200000
+    }
+    
     def __init__(self):
         pass  # API 키는 런타임에 제공받음
     
+    def resolve_model(self, model: Optional[str]) -> str:
+        # 모델명 매핑 및 검증 (지원하지 않는 모델은 기본값 사용)
+        if model in self.MODEL_MAPPING:
+            return self.MODEL_MAPPING[model]
+        if model not in self.SUPPORTED_MODELS:
+            return self.DEFAULT_MODEL
+        return model
+    
     def get_provider_name(self) -> str:
         return "anthropic"
     
@@ -40,7 +79,7 @@ class AnthropicService(AIService):
             raise Exception("Anthropic API key must be provided by user")
         
         try:
-            client = anthropic.AsyncAnthropic(api_key=api_key)
+            client = client_pool.get_client("anthropic", api_key)
             
             # 메시지 구성
             if messages:
@@ -49,28 +88,7 @@ class AnthropicService(AIService):
                 chat_messages = [{"role": "user", "content": prompt}]
             
             # 모델명 매핑 (프론트엔드에서 특정 버전 사용)
-            model_mapping = {
-                # 레거시 별칭들만 매핑 (프론트엔드에서 특정 버전 직접 사용)
-                "Opus4.1": "claude-opus-4-1-20250805",
-                "Opus4": "claude-opus-4-20250514",
-                "Sonnet4": "claude-sonnet-4-20250514",
-                "Sonnet3.7": "claude-3-7-sonnet-20250219",
-                "Sonnet3.5": "claude-3-5-sonnet-20241022",
-                "Haiku3.5": "claude-3-5-haiku-20241022",
-                "Haiku3": "claude-3-haiku-20240307",
-                "Opus": "claude-opus-4-1-20250805",
-                "Sonnet": "claude-sonnet-4-20250514",
-                "Haiku": "claude-3-5-haiku-20241022"
-            }
-            
-            # 모델명 매핑 및 검증
-            if model in model_mapping:
-                actual_model = model_mapping[model]
-                model = actual_model
-            elif model not in ['claude-opus-4-1-20250805', 'claude-opus-4-20250514', 'claude-sonnet-4-20250514', 
-                              'claude-3-7-sonnet-20250219', 'claude-3-5-sonnet-20241022', 
-                              'claude-3-5-haiku-20241022', 'claude-3-haiku-20240307']:
-                model = "claude-sonnet-4-20250514"
+            model = self.resolve_model(model)
             
             # API 호출 파라미터 구성
             api_params = {
@@ -91,7 +109,9 @@ class AnthropicService(AIService):
                 content=message.content[0].text,
                 provider="anthropic",
                 model=model,
-                tokens_used=message.usage.input_tokens + message.usage.output_tokens if message.usage else None
+                tokens_used=message.usage.input_tokens + message.usage.output_tokens if message.usage else None,
+                input_tokens=message.usage.input_tokens if message.usage else None,
+                output_tokens=message.usage.output_tokens if message.usage else None
             )
         except Exception as e:
             raise Exception(f"Anthropic API error: {str(e)}")
@@ -113,7 +133,7 @@ class AnthropicService(AIService):
             raise Exception("Anthropic API key must be provided by user")
         
         try:
-            client = anthropic.AsyncAnthropic(api_key=api_key)
+            client = client_pool.get_client("anthropic", api_key)
             
             # 메시지 구성
             if messages:
@@ -153,26 +173,7 @@ class AnthropicService(AIService):
                 chat_messages = [{"role": "user", "content": prompt}]
             
             # 모델명 매핑
-            model_mapping = {
-                "Opus4.1": "claude-opus-4-1-20250805",
-                "Opus4": "claude-opus-4-20250514",
-                "Sonnet4": "claude-sonnet-4-20250514",
-                "Sonnet3.7": "claude-3-7-sonnet-20250219",
-                "Sonnet3.5": "claude-3-5-sonnet-20241022",
-                "Haiku3.5": "claude-3-5-haiku-20241022",
-                "Haiku3": "claude-3-haiku-20240307",
-                "Opus": "claude-opus-4-1-20250805",
-                "Sonnet": "claude-sonnet-4-20250514",
-                "Haiku": "claude-3-5-haiku-20241022"
-            }
-            
-            if model in model_mapping:
-                actual_model = model_mapping[model]
-                model = actual_model
-            elif model not in ['claude-opus-4-1-20250805', 'claude-opus-4-20250514', 'claude-sonnet-4-20250514', 
-                              'claude-3-7-sonnet-20250219', 'claude-3-5-sonnet-20241022', 
-                              'claude-3-5-haiku-20241022', 'claude-3-haiku-20240307']:
-                model = "claude-sonnet-4-20250514"
+            model = self.resolve_model(model)
             
             # API 호출 파라미터 구성 (stream 파라미터 제거)
             api_params = {
@@ -187,14 +188,33 @@ class AnthropicService(AIService):
             if system_prompt:
                 api_params["system"] = system_prompt
             
+            # 입력 토큰은 message_start, 출력 토큰(누적)은 message_delta 이벤트로 전달됨
+            input_tokens = None
+            output_tokens = None
             async with client.messages.stream(**api_params) as stream:
-                async for text in stream.text_stream:
-                    yield AIResponse(
-                        content=text,
-                        provider="anthropic",
-                        model=model,
-                        tokens_used=None  # 스트리밍 중에는 토큰 수 미제공
-                    )
+                async for event in stream:
+                    if event.type == "message_start":
+                        input_tokens = event.message.usage.input_tokens
+                        output_tokens = event.message.usage.output_tokens
+                    elif event.type == "message_delta" and event.usage:
+                        output_tokens = event.usage.output_tokens
+                    elif event.type == "content_block_delta" and event.delta.type == "text_delta":
+                        yield AIResponse(
+                            content=event.delta.text,
+                            provider="anthropic",
+                            model=model,
+                            tokens_used=None  # 사용량은 마지막 청크에서 제공
+                        )
+            
+            if input_tokens is not None:
+                yield AIResponse(
+                    content="",
+                    provider="anthropic",
+                    model=model,
+                    tokens_used=input_tokens + (output_tokens or 0),
+                    input_tokens=input_tokens,
+                    output_tokens=output_tokens
+                )
             
         except Exception as e:
             raise Exception(f"Anthropic streaming API error: {str(e)}")
\ No newline at end of file
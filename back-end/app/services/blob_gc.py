@@ -0,0 +1,31 @@
+"""
+Blob 저장소 GC
+채팅/메시지 삭제 시 바로 지우지 못한(최근에 사용되었거나 정리에 실패한) 참조 없는 Blob을 주기적으로 정리
+"""
+
+import asyncio
+import logging
+
+from app.core.database import SessionLocal
+from app.core.metrics import metrics
+from app.crud.chat_crud import sweep_unreferenced_blobs
+
+logger = logging.getLogger(__name__)
+
+
+def collect_unreferenced_blobs() -> int:
+    """참조 없는 Blob 정리 (파일시스템/DB 조회가 있으므로 스레드에서 실행)"""
+    with SessionLocal() as db:
+        return sweep_unreferenced_blobs(db)
+
+
+async def run_blob_gc_loop(interval: float) -> None:
+    """주기적 Blob GC (애플리케이션 lifespan에서 실행)"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            deleted = await asyncio.to_thread(collect_unreferenced_blobs)
+        except Exception as e:
+            logger.error(f"Blob GC failed: {e}")
+            continue
+        metrics.inc("blob_gc_deleted_total", deleted)
@@ -0,0 +1,142 @@
+"""
+이미지 Blob 저장소
+SHA-256 콘텐츠 주소 기반으로 바이너리를 저장하고, DB에는 참조 키만 보관
+"""
+
+import hashlib
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Iterator, Optional
+
+from app.core.config import settings
+
+
+def compute_blob_key(data: bytes) -> str:
+    """콘텐츠 주소 (SHA-256 hex)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore(ABC):
+    """Blob 저장소 추상화 인터페이스 (로컬 파일시스템, S3 호환 등)"""
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        """데이터를 저장하고 콘텐츠 키 반환 (동일 콘텐츠는 한 번만 저장)"""
+        pass
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        pass
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        """스트리밍/Range 응답용 바이너리 파일 객체 반환"""
+        pass
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """Blob 크기 (bytes). 없으면 FileNotFoundError"""
+        pass
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    @abstractmethod
+    def last_used(self, key: str) -> float:
+        """마지막으로 기록되거나 put으로 재사용된 시각 (epoch 초). 없으면 FileNotFoundError"""
+        pass
+
+    @abstractmethod
+    def iter_keys(self) -> Iterator[str]:
+        """저장된 모든 키 (GC용)"""
+        pass
+
+
+class LocalBlobStore(BlobStore):
+    """로컬 파일시스템 Blob 저장소
+
+    root/ab/cd/abcd... 형태로 2단계 디렉터리에 분산 저장
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        if len(key) != 64 or any(ch not in "0123456789abcdef" for ch in key):
+            raise ValueError("Invalid blob key")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, data: bytes) -> str:
+        key = compute_blob_key(data)
+        path = self._path(key)
+        if os.path.exists(path):
+            # 중복 제거. 저장 대기 중인 턴이 참조할 수 있으므로 GC 대상에서 잠시 제외되도록 시각 갱신
+            try:
+                os.utime(path)
+                return key
+            except FileNotFoundError:
+                pass  # 그 사이 GC로 삭제됨: 다시 기록
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+
+        # 부분 기록된 파일이 노출되지 않도록 임시 파일에 쓴 뒤 원자적으로 교체
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return key
+
+    def get(self, key: str) -> bytes:
+        with open(self._path(key), "rb") as f:
+            return f.read()
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def size(self, key: str) -> int:
+        return os.path.getsize(self._path(key))
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def last_used(self, key: str) -> float:
+        return os.path.getmtime(self._path(key))
+
+    def iter_keys(self) -> Iterator[str]:
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if len(filename) == 64 and not filename.startswith(".tmp-"):
+                    yield filename
+
+
+_blob_store: Optional[BlobStore] = None
+
+
+def get_blob_store() -> BlobStore:
+    """설정된 Blob 저장소 인스턴스 반환"""
+    global _blob_store
+    if _blob_store is None:
+        backend = settings.blob_store_backend
+        if backend == "local":
+            _blob_store = LocalBlobStore(settings.blob_store_path)
+        else:
+            raise ValueError(f"Unsupported blob store backend: {backend}")
+    return _blob_store
@@ -0,0 +1,183 @@
+"""
+AI 제공자 SDK 클라이언트 풀
+사용자 API 키별 SDK 클라이언트를 재사용해 요청마다 발생하던
+커넥션 풀 생성, TLS 핸드셰이크, DNS 조회 비용을 제거
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def hash_api_key(api_key: str) -> str:
+    """API 키 원문을 메모리 키로 사용하지 않도록 해시"""
+    return hashlib.sha256(api_key.encode()).hexdigest()
+
+
+class ProviderClientPool:
+    """
+    (provider, API 키 해시) 단위의 SDK 클라이언트 레지스트리
+
+    - 제공자별로 하나의 httpx.AsyncClient(keep-alive 커넥션 풀)를 공유
+    - SDK 클라이언트는 LRU + 유휴 TTL 기준으로 제거
+    - 제거된 SDK 클라이언트는 공유 커넥션 풀을 닫지 않으므로
+      진행 중인 스트림에 영향을 주지 않음
+    - 공유 풀 없이 자체 transport를 가진 클라이언트(gRPC 채널 등)는 제거 후
+      close_delay가 지나면 transport를 닫음 (제거 직전에 시작된 스트림이 끝날 시간을 둠)
+    """
+
+    def __init__(self, max_size: int = 256, idle_ttl: float = 600.0, close_delay: float = 600.0):
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self.close_delay = close_delay
+        self._clients: "OrderedDict[Tuple[str, str], Tuple[Any, float]]" = OrderedDict()
+        self._retired: List[Tuple[str, Any, float]] = []  # (provider, 클라이언트, 제거 시각)
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        self._factories: Dict[str, Callable[[str, Optional[httpx.AsyncClient]], Any]] = {}
+        self._shared_http: Dict[str, bool] = {}
+
+    def register(
+        self,
+        provider: str,
+        factory: Callable[[str, Optional[httpx.AsyncClient]], Any],
+        shared_http: bool = True
+    ) -> None:
+        """제공자별 SDK 클라이언트 생성 함수 등록
+
+        shared_http가 False인 제공자(gRPC 기반 등)는 공유 httpx 풀 없이 생성
+        """
+        self._factories[provider] = factory
+        self._shared_http[provider] = shared_http
+
+    def get_http_client(self, provider: str) -> httpx.AsyncClient:
+        """제공자별 공유 HTTP 커넥션 풀 반환 (지연 생성)"""
+        http_client = self._http_clients.get(provider)
+        if http_client is None or http_client.is_closed:
+            http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(
+                    max_connections=settings.provider_http_max_connections,
+                    max_keepalive_connections=settings.provider_http_max_keepalive,
+                    keepalive_expiry=settings.provider_http_keepalive_expiry
+                ),
+                timeout=httpx.Timeout(settings.provider_http_timeout, connect=10.0)
+            )
+            self._http_clients[provider] = http_client
+        return http_client
+
+    def get_client(self, provider: str, api_key: str) -> Any:
+        """캐시된 SDK 클라이언트 반환 (없으면 생성)"""
+        factory = self._factories.get(provider)
+        if factory is None:
+            raise ValueError(f"No client factory registered for provider {provider}")
+
+        now = time.monotonic()
+        self._evict_idle(now)
+        self._close_retired(now)
+
+        key = (provider, hash_api_key(api_key))
+        entry = self._clients.get(key)
+        if entry is not None:
+            self._clients[key] = (entry[0], now)
+            self._clients.move_to_end(key)
+            return entry[0]
+
+        http_client = self.get_http_client(provider) if self._shared_http[provider] else None
+        client = factory(api_key, http_client)
+        self._clients[key] = (client, now)
+
+        # 최대 크기 초과 시 가장 오래 사용되지 않은 클라이언트 제거
+        while len(self._clients) > self.max_size:
+            self._evict_oldest(now)
+
+        return client
+
+    def _evict_idle(self, now: float) -> None:
+        """유휴 TTL이 지난 클라이언트 제거 (LRU 순서이므로 앞에서부터 확인)"""
+        while self._clients:
+            key, (_, last_used) = next(iter(self._clients.items()))
+            if now - last_used < self.idle_ttl:
+                break
+            self._evict_oldest(now)
+
+    def _evict_oldest(self, now: float) -> None:
+        """가장 오래 사용되지 않은 클라이언트 제거 (자체 transport를 가지면 나중에 닫도록 보관)"""
+        (provider, _), (client, _) = self._clients.popitem(last=False)
+        if not self._shared_http[provider]:
+            self._retired.append((provider, client, now))
+
+    def _close_retired(self, now: float) -> None:
+        """제거 후 close_delay가 지난 클라이언트의 transport 종료"""
+        while self._retired and now - self._retired[0][2] >= self.close_delay:
+            provider, client, _ = self._retired.pop(0)
+            self._close_transport(provider, client)
+
+    @staticmethod
+    def _close_transport(provider: str, client: Any) -> None:
+        transport = getattr(client, "transport", None)
+        if transport is None:
+            return
+        try:
+            transport.close()
+        except Exception as e:
+            logger.warning(f"Failed to close client transport for {provider}: {e}")
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    async def aclose(self) -> None:
+        """모든 클라이언트 및 공유 커넥션 풀 종료 (애플리케이션 종료 시)"""
+        for (provider, _), (client, _) in list(self._clients.items()):
+            if not self._shared_http[provider]:
+                self._close_transport(provider, client)
+        self._clients.clear()
+        for provider, client, _ in self._retired:
+            self._close_transport(provider, client)
+        self._retired.clear()
+        for provider, http_client in list(self._http_clients.items()):
+            try:
+                await http_client.aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close HTTP client for {provider}: {e}")
+        self._http_clients.clear()
+
+
+def _create_openai_client(api_key: str, http_client: Optional[httpx.AsyncClient]):
+    import openai
+    return openai.AsyncOpenAI(api_key=api_key, http_client=http_client)
+
+
+def _create_anthropic_client(api_key: str, http_client: Optional[httpx.AsyncClient]):
+    import anthropic
+    return anthropic.AsyncAnthropic(api_key=api_key, http_client=http_client)
+
+
+def _create_gemini_client(api_key: str, http_client: Optional[httpx.AsyncClient]):
+    # 전역 genai.configure 대신 API 키별 전용 gRPC transport 생성
+    from google.ai import generativelanguage as glm
+    return glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+
+# 글로벌 클라이언트 풀 인스턴스
+client_pool = ProviderClientPool(
+    max_size=settings.provider_client_pool_size,
+    idle_ttl=settings.provider_client_idle_ttl,
+    close_delay=settings.provider_http_timeout
+)
+client_pool.register("openai", _create_openai_client)
+client_pool.register("anthropic", _create_anthropic_client)
+client_pool.register("google", _create_gemini_client, shared_http=False)
@@ -0,0 +1,99 @@
+"""
+대화 컨텍스트 빌더
+모델별 토큰 예산 안에서 최신 메시지부터 히스토리를 선택
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.message import Message
+from .ai_manager import ai_manager
+
+# 메시지별 역할/구분자 오버헤드 (대략값)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """토크나이저 없이 토큰 수를 근사
+
+    영문/기호는 약 4자당 1토큰, 한글 등 비 ASCII 문자는 문자당 약 1토큰으로 계산
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    non_ascii_chars = len(text) - ascii_chars
+    return (ascii_chars + 3) // 4 + non_ascii_chars
+
+def get_history_budget(
+    targets: Sequence[Tuple[str, Optional[str]]],
+    max_tokens: Optional[int],
+    reserved_text: Sequence[Optional[str]] = ()
+) -> int:
+    """히스토리에 사용할 토큰 예산 계산
+
+    Args:
+        targets: (provider, model) 목록. 여러 모델이면 가장 작은 컨텍스트 윈도우 기준
+        max_tokens: 응답용으로 남겨둘 토큰 수
+        reserved_text: 시스템 프롬프트, 현재 메시지 등 항상 포함되는 텍스트
+    """
+    context_window = None
+    for provider, model in targets:
+        service = ai_manager.get_service(provider)
+        if not service:
+            continue
+        window = service.get_context_window(model)
+        context_window = window if context_window is None else min(context_window, window)
+    if context_window is None:
+        context_window = settings.chat_history_max_tokens
+
+    reserved = (max_tokens or 0) + sum(estimate_tokens(text) + MESSAGE_OVERHEAD_TOKENS for text in reserved_text)
+    return max(0, min(context_window - reserved, settings.chat_history_max_tokens))
+
+async def build_history_messages(
+    db: AsyncSession,
+    chat_id: int,
+    token_budget: int,
+    include_history: bool = True,
+    new_token_counts: Optional[Dict[int, int]] = None
+) -> List[Dict]:
+    """토큰 예산 안에서 최신 메시지부터 선택하여 AI API 형식으로 반환
+
+    토큰 수가 없는 메시지는 계산해서 new_token_counts({message_id: token_count})에 담음
+    (조회 세션은 커밋하지 않으므로 호출자가 턴 저장 트랜잭션에서 함께 기록)
+    """
+    if not include_history or token_budget <= 0:
+        return []
+
+    result = await db.execute(
+        select(Message).where(
+            Message.chat_id == chat_id
+        ).order_by(Message.message_order.desc()).limit(settings.chat_history_max_messages)
+    )
+
+    selected = []
+    used_tokens = 0
+    for msg in result.scalars():
+        # 빈 메시지는 제외 (Anthropic API 요구사항)
+        if not msg.content or not msg.content.strip():
+            continue
+
+        token_count = msg.token_count
+        if token_count is None:
+            token_count = estimate_tokens(msg.content)
+            if new_token_counts is not None:
+                new_token_counts[msg.id] = token_count
+
+        cost = token_count + MESSAGE_OVERHEAD_TOKENS
+        if used_tokens + cost > token_budget:
+            break
+        used_tokens += cost
+        selected.append(msg)
+
+    selected.reverse()  # 시간순 정렬
+    return [
+        {
+            "role": "user" if msg.sender == "user" else "assistant",
+            "content": msg.content
+        }
+        for msg in selected
+    ]
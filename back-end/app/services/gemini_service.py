@@ -1,8 +1,121 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import google.generativeai as genai
-from typing import Optional, List, Dict, AsyncGenerator
+from typing import Optional, List, Dict, AsyncGenerator, Callable, Iterable, Any
 from .ai_service import AIService, AIResponse
+from .client_pool import client_pool
 from ..core.config import settings
 
+# Gemini SDK는 동기 API이므로 전용 스레드 풀에서 실행하여 이벤트 루프 블로킹 방지
+_gemini_executor = ThreadPoolExecutor(
+    max_workers=settings.gemini_worker_threads,
+    thread_name_prefix="gemini"
+)
+
+_STREAM_END = object()
+
+# google-generativeai는 0.3.0으로 고정 (requirements.txt).
+# 이 버전의 GenerativeModel은 클라이언트를 받는 공개 인자가 없고, 첫 호출 때 _client가 None이면
+# 전역(genai.configure) 클라이언트를 만들어 씀. 키별 클라이언트는 이 _client 자리에 주입하므로
+# SDK 업그레이드로 구조가 바뀌면 다른 키로 조용히 요청하지 않도록 바로 실패시킴
+GENAI_SDK_VERSION = "0.3.0"
+_UNSET = object()
+
+async def run_in_thread(func: Callable, *args, **kwargs) -> Any:
+    """동기 Gemini 호출을 전용 스레드 풀에서 실행"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_gemini_executor, partial(func, *args, **kwargs))
+
+def _cancel_stream(stream: Any) -> None:
+    """진행 중인 SDK 스트림의 전송을 취소하여 워커 스레드의 블로킹된 next()를 깨움
+
+    gRPC 스트림 호출(cancel())을 직접 받았거나 GenerateContentResponse처럼 내부에 감싼 경우 모두 처리.
+    취소 수단이 없는 스트림은 워커가 다음 청크를 받은 뒤 stop 플래그를 보고 종료
+    """
+    for target in (stream, getattr(stream, "_iterator", None)):
+        cancel = getattr(target, "cancel", None)
+        if callable(cancel):
+            try:
+                cancel()
+            except Exception:
+                pass
+            return
+
+async def iterate_in_thread(start_stream: Callable[[], Iterable]) -> AsyncGenerator[Any, None]:
+    """동기 스트림을 워커 스레드에서 소비하고 asyncio 큐로 전달
+
+    start_stream은 스트림 요청(최초 네트워크 호출 포함)을 시작하는 함수로,
+    워커 스레드 안에서 호출됨. 소비 측이 중단하면 스트림 전송을 취소하여
+    워커가 다음 청크를 기다리며 풀 스레드를 붙잡지 않도록 함
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = threading.Event()
+    lock = threading.Lock()
+    state = {"stream": None}
+    
+    def put(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            # 이벤트 루프가 이미 종료된 경우
+            stop.set()
+    
+    def worker():
+        if stop.is_set():
+            return  # 시작 전에 취소됨
+        try:
+            stream = start_stream()
+            with lock:
+                state["stream"] = stream
+            if stop.is_set():
+                _cancel_stream(stream)  # 요청을 시작하는 동안 취소됨
+                return
+            for item in stream:
+                if stop.is_set():
+                    return
+                put(item)
+        except BaseException as e:
+            if not stop.is_set():
+                put(_STREAM_END, e)
+            return
+        put(_STREAM_END)
+    
+    loop.run_in_executor(_gemini_executor, worker)
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _STREAM_END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        with lock:
+            stream = state["stream"]
+        if stream is not None:
+            _cancel_stream(stream)
+
+def _chunk_text(chunk) -> str:
+    """청크 텍스트 (텍스트 파트 없이 사용량만 담긴 청크는 빈 문자열)"""
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+def _usage_fields(usage_metadata) -> Dict[str, Optional[int]]:
+    """usage_metadata를 AIResponse 사용량 필드로 변환"""
+    if usage_metadata is None:
+        return {"tokens_used": None}
+    return {
+        "tokens_used": usage_metadata.total_token_count,
+        "input_tokens": usage_metadata.prompt_token_count,
+        "output_tokens": usage_metadata.candidates_token_count
+    }
+
 class GeminiService(AIService):
     # 2025년 현재 지원되는 Gemini 모델 목록 (2.5 버전만)
     SUPPORTED_MODELS = {
@@ -20,9 +133,38 @@ class GeminiService(AIService):
         "Gemini": "gemini-2.5-flash"
     }
     
+    # 모델별 컨텍스트 윈도우
+    CONTEXT_WINDOWS = {
+        "gemini-2.5": 1048576
+    }
+    
     def __init__(self):
         pass  # API 키는 런타임에 제공받음
     
+    def resolve_model(self, model: Optional[str]) -> str:
+        if model in self.MODEL_MAPPING:
+            # 사용자 친화적 모델명을 실제 API 모델명으로 매핑
+            return self.MODEL_MAPPING[model]
+        if model not in self.SUPPORTED_MODELS:
+            # 지원하지 않는 모델인 경우 기본값 사용
+            return "gemini-2.5-flash"
+        return model
+    
+    def _create_model(self, model: str, api_key: str):
+        """요청별 API 키 전용 transport를 사용하는 모델 인스턴스 생성
+
+        전역 genai.configure는 동시 요청 간 API 키가 섞일 수 있으므로 사용하지 않고,
+        클라이언트 풀에 캐시된 키별 GenerativeServiceClient를 주입
+        """
+        model_instance = genai.GenerativeModel(model)
+        if genai.__version__ != GENAI_SDK_VERSION or getattr(model_instance, "_client", _UNSET) is not None:
+            raise RuntimeError(
+                f"google-generativeai {genai.__version__} does not support per-request client injection "
+                f"(expected {GENAI_SDK_VERSION}); update GeminiService._create_model"
+            )
+        model_instance._client = client_pool.get_client("google", api_key)
+        return model_instance
+    
     async def generate_text(
         self,
         prompt: str,
@@ -40,18 +182,9 @@ class GeminiService(AIService):
             raise Exception("Google API key must be provided by user")
         
         # 모델명 검증 및 매핑
-        if model in self.MODEL_MAPPING:
-            # 사용자 친화적 모델명을 실제 API 모델명으로 매핑
-            actual_model = self.MODEL_MAPPING[model]
-            model = actual_model
-        elif model not in self.SUPPORTED_MODELS:
-            # 지원하지 않는 모델인 경우 기본값 사용
-            model = "gemini-2.5-flash"
+        model = self.resolve_model(model)
         
         try:
-            # API 키 설정
-            genai.configure(api_key=api_key)
-            
             # 이미지가 있는 경우 Vision 모델로 처리
             if images and len(images) > 0:
                 # Vision 모델 확인 및 설정 (2.5 버전들은 모두 Vision 지원)
@@ -98,7 +231,7 @@ class GeminiService(AIService):
                     )
                 
                 # Vision 모델 인스턴스 생성
-                model_instance = genai.GenerativeModel(model)
+                model_instance = self._create_model(model, api_key)
                 
                 # 생성 설정
                 generation_config = genai.types.GenerationConfig(
@@ -108,7 +241,8 @@ class GeminiService(AIService):
                 )
                 
                 # 이미지와 함께 생성
-                response = model_instance.generate_content(
+                response = await run_in_thread(
+                    model_instance.generate_content,
                     content_parts,
                     generation_config=generation_config
                 )
@@ -117,17 +251,17 @@ class GeminiService(AIService):
                     content=response.text,
                     provider="google",
                     model=model,
-                    tokens_used=response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else None
+                    **_usage_fields(getattr(response, 'usage_metadata', None))
                 )
             
             # 이미지가 없는 경우 기존 텍스트 처리 로직 계속
             
             # 시스템 프롬프트 처리 (새 버전에서는 다른 방식 사용)
             if system_prompt:
-                model_instance = genai.GenerativeModel(model)
+                model_instance = self._create_model(model, api_key)
                 # 시스템 프롬프트는 대화 시작 시 추가
             else:
-                model_instance = genai.GenerativeModel(model)
+                model_instance = self._create_model(model, api_key)
             
             generation_config = genai.types.GenerationConfig(
                 max_output_tokens=max_tokens,
@@ -145,7 +279,8 @@ class GeminiService(AIService):
                 if system_prompt:
                     user_message = f"{system_prompt}\\n\\n{user_message}"
                 
-                response = chat.send_message(
+                response = await run_in_thread(
+                    chat.send_message,
                     user_message,
                     generation_config=generation_config
                 )
@@ -155,7 +290,8 @@ class GeminiService(AIService):
                 if system_prompt:
                     final_prompt = f"{system_prompt}\\n\\n{prompt}"
                     
-                response = model_instance.generate_content(
+                response = await run_in_thread(
+                    model_instance.generate_content,
                     final_prompt,
                     generation_config=generation_config
                 )
@@ -202,7 +338,7 @@ class GeminiService(AIService):
                 content=response_text,
                 provider="google",
                 model=model,
-                tokens_used=response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else None
+                **_usage_fields(getattr(response, 'usage_metadata', None))
             )
         except Exception as e:
             error_msg = str(e)
@@ -245,16 +381,9 @@ class GeminiService(AIService):
             raise Exception("Google API key must be provided by user")
         
         # 모델명 검증 및 매핑
-        if model in self.MODEL_MAPPING:
-            actual_model = self.MODEL_MAPPING[model]
-            model = actual_model
-        elif model not in self.SUPPORTED_MODELS:
-            model = "gemini-2.5-flash"
+        model = self.resolve_model(model)
         
         try:
-            # API 키 설정
-            genai.configure(api_key=api_key)
-            
             # 이미지가 있는 경우 Vision 모델로 처리
             if images and len(images) > 0:
                 if model not in ["gemini-2.5-pro", "gemini-2.5-flash"]:
@@ -294,7 +423,7 @@ class GeminiService(AIService):
                     return
                 
                 # Vision 모델로 스트리밍 생성
-                model_instance = genai.GenerativeModel(model)
+                model_instance = self._create_model(model, api_key)
                 generation_config = genai.types.GenerationConfig(
                     max_output_tokens=max_tokens,
                     temperature=temperature,
@@ -304,14 +433,14 @@ class GeminiService(AIService):
                 
                 # 스트리밍 생성
                 try:
-                    response = model_instance.generate_content(
+                    chunk_count = 0
+                    usage_metadata = None
+                    async for chunk in iterate_in_thread(partial(
+                        model_instance.generate_content,
                         content_parts,
                         generation_config=generation_config,
                         stream=True
-                    )
-                    
-                    chunk_count = 0
-                    for chunk in response:
+                    )):
                         # 안전성 확인
                         if hasattr(chunk, 'candidates') and chunk.candidates:
                             candidate = chunk.candidates[0]
@@ -325,25 +454,37 @@ class GeminiService(AIService):
                                     )
                                     return
                         
-                        if chunk.text and len(chunk.text.strip()) > 0:
+                        # 스트리밍 중 usage_metadata는 누적값이므로 마지막 값을 사용
+                        usage_metadata = getattr(chunk, 'usage_metadata', None) or usage_metadata
+                        text = _chunk_text(chunk)
+                        if text and len(text.strip()) > 0:
                             chunk_count += 1
                             yield AIResponse(
-                                content=chunk.text,
+                                content=text,
                                 provider="google",
                                 model=model,
                                 tokens_used=None
                             )
                     
+                    if usage_metadata is not None:
+                        yield AIResponse(
+                            content="",
+                            provider="google",
+                            model=model,
+                            **_usage_fields(usage_metadata)
+                        )
                     
                 except Exception as stream_error:
                     # 에러 시 일반 생성으로 폴백
                     try:
-                        response = model_instance.generate_content(content_parts, generation_config=generation_config)
+                        response = await run_in_thread(
+                            model_instance.generate_content, content_parts, generation_config=generation_config
+                        )
                         yield AIResponse(
                             content=response.text,
                             provider="google",
                             model=model,
-                            tokens_used=response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else None
+                            **_usage_fields(getattr(response, 'usage_metadata', None))
                         )
                     except Exception as fallback_error:
                         yield AIResponse(
@@ -355,7 +496,7 @@ class GeminiService(AIService):
                 return
             
             # 텍스트 전용 스트리밍
-            model_instance = genai.GenerativeModel(model)
+            model_instance = self._create_model(model, api_key)
             generation_config = genai.types.GenerationConfig(
                 max_output_tokens=max_tokens,
                 temperature=temperature,
@@ -374,14 +515,14 @@ class GeminiService(AIService):
                 
                 
                 try:
-                    response = chat.send_message(
+                    chunk_count = 0
+                    usage_metadata = None
+                    async for chunk in iterate_in_thread(partial(
+                        chat.send_message,
                         user_message,
                         generation_config=generation_config,
                         stream=True
-                    )
-                    
-                    chunk_count = 0
-                    for chunk in response:
+                    )):
                         # 안전성 확인
                         if hasattr(chunk, 'candidates') and chunk.candidates:
                             candidate = chunk.candidates[0]
@@ -395,25 +536,37 @@ class GeminiService(AIService):
                                     )
                                     return
                         
-                        if chunk.text and len(chunk.text.strip()) > 0:
+                        # 스트리밍 중 usage_metadata는 누적값이므로 마지막 값을 사용
+                        usage_metadata = getattr(chunk, 'usage_metadata', None) or usage_metadata
+                        text = _chunk_text(chunk)
+                        if text and len(text.strip()) > 0:
                             chunk_count += 1
                             yield AIResponse(
-                                content=chunk.text,
+                                content=text,
                                 provider="google",
                                 model=model,
                                 tokens_used=None
                             )
                     
+                    if usage_metadata is not None:
+                        yield AIResponse(
+                            content="",
+                            provider="google",
+                            model=model,
+                            **_usage_fields(usage_metadata)
+                        )
                     
                 except Exception as stream_error:
                     # 에러 시 일반 생성으로 폴백
                     try:
-                        response = chat.send_message(user_message, generation_config=generation_config)
+                        response = await run_in_thread(
+                            chat.send_message, user_message, generation_config=generation_config
+                        )
                         yield AIResponse(
                             content=response.text,
                             provider="google",
                             model=model,
-                            tokens_used=response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else None
+                            **_usage_fields(getattr(response, 'usage_metadata', None))
                         )
                     except Exception as fallback_error:
                         yield AIResponse(
@@ -430,14 +583,14 @@ class GeminiService(AIService):
                 
                 
                 try:
-                    response = model_instance.generate_content(
+                    chunk_count = 0
+                    usage_metadata = None
+                    async for chunk in iterate_in_thread(partial(
+                        model_instance.generate_content,
                         final_prompt,
                         generation_config=generation_config,
                         stream=True
-                    )
-                    
-                    chunk_count = 0
-                    for chunk in response:
+                    )):
                         # 안전성 확인
                         if hasattr(chunk, 'candidates') and chunk.candidates:
                             candidate = chunk.candidates[0]
@@ -451,25 +604,37 @@ class GeminiService(AIService):
                                     )
                                     return
                         
-                        if chunk.text and len(chunk.text.strip()) > 0:
+                        # 스트리밍 중 usage_metadata는 누적값이므로 마지막 값을 사용
+                        usage_metadata = getattr(chunk, 'usage_metadata', None) or usage_metadata
+                        text = _chunk_text(chunk)
+                        if text and len(text.strip()) > 0:
                             chunk_count += 1
                             yield AIResponse(
-                                content=chunk.text,
+                                content=text,
                                 provider="google",
                                 model=model,
                                 tokens_used=None
                             )
                     
+                    if usage_metadata is not None:
+                        yield AIResponse(
+                            content="",
+                            provider="google",
+                            model=model,
+                            **_usage_fields(usage_metadata)
+                        )
                     
                 except Exception as stream_error:
                     # 에러 시 일반 생성으로 폴백
                     try:
-                        response = model_instance.generate_content(final_prompt, generation_config=generation_config)
+                        response = await run_in_thread(
+                            model_instance.generate_content, final_prompt, generation_config=generation_config
+                        )
                         yield AIResponse(
                             content=response.text,
                             provider="google",
                             model=model,
-                            tokens_used=response.usage_metadata.total_token_count if hasattr(response, 'usage_metadata') else None
+                            **_usage_fields(getattr(response, 'usage_metadata', None))
                         )
                     except Exception as fallback_error:
                         yield AIResponse(
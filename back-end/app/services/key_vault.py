@@ -0,0 +1,72 @@
+"""
+사용자 API 키 보관소
+사용자의 모든 제공자 키를 한 번의 쿼리로 읽어 복호화한 뒤 짧은 TTL 동안 메모리에 보관
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud.api_key_crud import get_all_user_api_keys_async, decrypt_api_key
+
+logger = logging.getLogger(__name__)
+
+
+class KeyVault:
+    """
+    사용자별 복호화된 제공자 API 키 캐시
+
+    - 캐시 미스 시 사용자의 키 전체를 한 번에 조회 (제공자별 쿼리 없음)
+    - 키 저장/삭제 시 invalidate()로 즉시 무효화 (현재 프로세스만 해당.
+      다른 워커의 캐시는 TTL이 지날 때까지 이전 키를 반환할 수 있음)
+    - 복호화에 실패한 키는 사용 불가로 간주하고 제외
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[Dict[str, str], float]] = {}
+        self._lock = threading.Lock()  # 동기 라우트(스레드풀)에서도 무효화됨
+        self._version = 0  # 조회 중 무효화된 경우 오래된 키를 캐시하지 않기 위한 버전
+
+    async def get_keys(self, db: AsyncSession, user_id: str) -> Dict[str, str]:
+        """사용자의 {provider: 복호화된 키} 반환"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            version = self._version
+        if entry is not None and entry[1] > time.monotonic():
+            return dict(entry[0])
+
+        keys = {}
+        for api_key_record in await get_all_user_api_keys_async(db, user_id):
+            try:
+                keys[api_key_record.provider] = decrypt_api_key(api_key_record.encrypted_key)
+            except Exception as e:
+                logger.warning(f"Failed to decrypt {api_key_record.provider} API key: {type(e).__name__}")
+
+        if self.ttl > 0:
+            with self._lock:
+                if version == self._version:
+                    self._entries[user_id] = (keys, time.monotonic() + self.ttl)
+        return dict(keys)
+
+    async def get_key(self, db: AsyncSession, user_id: str, provider: str) -> Optional[str]:
+        keys = await self.get_keys(db, user_id)
+        return keys.get(provider)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._version += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version += 1
+
+
+# 글로벌 키 보관소 인스턴스
+key_vault = KeyVault(ttl=settings.api_key_cache_ttl)
@@ -1,11 +1,40 @@
-import openai
 from typing import Optional, List, Dict, AsyncGenerator
 from .ai_service import AIService, AIResponse
+from .client_pool import client_pool
 
 class OpenAIService(AIService):
+    DEFAULT_MODEL = "gpt-4o"
+    
+    # 모델명 매핑 (레거시 별칭들만 매핑, 프론트엔드에서 특정 버전 직접 사용)
+    MODEL_MAPPING = {
+        "GPT-4.1": "gpt-4.1",
+        "GPT-4.1-mini": "gpt-4.1-mini",
+        "GPT-4.1-nano": "gpt-4.1-nano",
+        "GPT-4o": "gpt-4o",
+        "GPT-4o-mini": "gpt-4o-mini",
+        "GPT-4": "gpt-4o",
+        "gpt4": "gpt-4o",
+        "GPT-3.5": "gpt-3.5-turbo",
+        "gpt3.5": "gpt-3.5-turbo"
+    }
+    
+    # 모델별 컨텍스트 윈도우 (접두사 기준, 긴 접두사 우선)
+    CONTEXT_WINDOWS = {
+        "gpt-4.1": 1047576,
+        "gpt-5": 400000,
+        "o1": 200000,
+        "gpt-4o": 128000,
+        "gpt-3.5-turbo": 16385
+    }
+    
     def __init__(self):
         pass  # API 키는 런타임에 제공받음
     
+    def resolve_model(self, model: Optional[str]) -> str:
+        if not model:
+            return self.DEFAULT_MODEL
+        return self.MODEL_MAPPING.get(model, model)
+    
     async def generate_text(
         self,
         prompt: str,
@@ -24,26 +53,10 @@ class OpenAIService(AIService):
         
         
         try:
-            client = openai.AsyncOpenAI(api_key=api_key)
+            client = client_pool.get_client("openai", api_key)
             
             # 모델명 매핑 (프론트엔드에서 특정 버전 사용)
-            model_mapping = {
-                # 레거시 별칭들만 매핑 (프론트엔드에서 특정 버전 직접 사용)
-                "GPT-4.1": "gpt-4.1",
-                "GPT-4.1-mini": "gpt-4.1-mini",
-                "GPT-4.1-nano": "gpt-4.1-nano",
-                "GPT-4o": "gpt-4o",
-                "GPT-4o-mini": "gpt-4o-mini",
-                "GPT-4": "gpt-4o",
-                "gpt4": "gpt-4o",
-                "GPT-3.5": "gpt-3.5-turbo",
-                "gpt3.5": "gpt-3.5-turbo"
-            }
-            
-            # 모델명 매핑
-            if model in model_mapping:
-                actual_model = model_mapping[model]
-                model = actual_model
+            model = self.resolve_model(model)
             
             # 메시지 구성 (대화 컨텍스트 및 이미지 지원)
             if messages:
@@ -114,7 +127,9 @@ class OpenAIService(AIService):
                 content=response.choices[0].message.content,
                 provider="openai",
                 model=model,
-                tokens_used=response.usage.total_tokens if response.usage else None
+                tokens_used=response.usage.total_tokens if response.usage else None,
+                input_tokens=response.usage.prompt_tokens if response.usage else None,
+                output_tokens=response.usage.completion_tokens if response.usage else None
             )
         except Exception as e:
             raise Exception(f"OpenAI API error: {str(e)}")
@@ -152,24 +167,10 @@ class OpenAIService(AIService):
             raise Exception("OpenAI API key must be provided by user")
         
         try:
-            client = openai.AsyncOpenAI(api_key=api_key)
+            client = client_pool.get_client("openai", api_key)
             
             # 모델명 매핑
-            model_mapping = {
-                "GPT-4.1": "gpt-4.1",
-                "GPT-4.1-mini": "gpt-4.1-mini",
-                "GPT-4.1-nano": "gpt-4.1-nano",
-                "GPT-4o": "gpt-4o",
-                "GPT-4o-mini": "gpt-4o-mini",
-                "GPT-4": "gpt-4o",
-                "gpt4": "gpt-4o",
-                "GPT-3.5": "gpt-3.5-turbo",
-                "gpt3.5": "gpt-3.5-turbo"
-            }
-            
-            if model in model_mapping:
-                actual_model = model_mapping[model]
-                model = actual_model
+            model = self.resolve_model(model)
             
             # 메시지 구성
             if messages:
@@ -222,6 +223,7 @@ class OpenAIService(AIService):
                     messages=chat_messages,
                     max_completion_tokens=max_tokens,
                     stream=True,
+                    stream_options={"include_usage": True},  # 마지막 청크에 사용량 포함
                     **api_kwargs
                 )
             else:
@@ -232,6 +234,7 @@ class OpenAIService(AIService):
                     max_tokens=max_tokens,
                     temperature=temperature,
                     stream=True,
+                    stream_options={"include_usage": True},  # 마지막 청크에 사용량 포함
                     **api_kwargs
                 )
             
@@ -243,8 +246,19 @@ class OpenAIService(AIService):
                             content=delta.content,
                             provider="openai",
                             model=model,
-                            tokens_used=None  # 스트리밍 중에는 토큰 수 미제공
+                            tokens_used=None  # 사용량은 마지막 청크에서 제공
                         )
+                
+                # include_usage 요청 시 마지막 청크는 choices가 비어 있고 usage만 포함
+                if chunk.usage:
+                    yield AIResponse(
+                        content="",
+                        provider="openai",
+                        model=model,
+                        tokens_used=chunk.usage.total_tokens,
+                        input_tokens=chunk.usage.prompt_tokens,
+                        output_tokens=chunk.usage.completion_tokens
+                    )
             
         except Exception as e:
             raise Exception(f"OpenAI streaming API error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,280 @@
+"""
+AI 사용량 쿼터 모듈
+사용자/제공자별 롤링 윈도우 토큰 예산을 메모리에서 관리하고 주기적으로 DB에 일괄 기록
+"""
+
+import asyncio
+import calendar
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.models.usage_record import UsageRecord
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QuotaStatus:
+    """쿼터 상태 (limit이 0이면 무제한)"""
+    limit: int
+    used: int
+    reset_seconds: int
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if not self.limit:
+            return None
+        return max(0, self.limit - self.used)
+
+    def headers(self) -> Dict[str, str]:
+        """응답 헤더로 노출할 남은 예산"""
+        if not self.limit:
+            return {}
+        return {
+            "X-Quota-Limit-Tokens": str(self.limit),
+            "X-Quota-Remaining-Tokens": str(self.remaining),
+            "X-Quota-Reset": str(self.reset_seconds)
+        }
+
+
+class QuotaExceeded(Exception):
+    """제공자 토큰 예산 초과"""
+
+    def __init__(self, provider: str, status: QuotaStatus):
+        self.provider = provider
+        self.status = status
+        super().__init__(f"Token quota exceeded for provider {provider}")
+
+
+class QuotaManager:
+    """
+    사용자/제공자별 롤링 윈도우 토큰 쿼터
+
+    - 사용량은 bucket_seconds 단위 버킷으로 메모리에 집계하고, 윈도우 합계로 검사
+    - (사용자, 제공자)별로 sync_interval마다 DB의 윈도우 내 기록을 다시 읽어 다른 워커의 사용량을 반영
+      (DB 합계 + 아직 저장하지 않은 이 워커의 기록으로 재구성, 워커 간 오차는 flush/sync 주기 이내)
+    - 기록은 메모리에 누적했다가 flush_interval마다 한 번의 트랜잭션으로 일괄 저장
+    - 예산이 없는(0) 제공자는 DB를 조회하지 않음
+    - 모델별 가중치로 비싼 모델의 토큰을 더 크게 차감
+    """
+
+    def __init__(
+        self,
+        window_seconds: int = 86400,
+        bucket_seconds: int = 300,
+        default_limit: int = 0,
+        provider_limits: Optional[Dict[str, int]] = None,
+        model_weights: Optional[Dict[str, float]] = None,
+        sync_interval: float = 10.0
+    ):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self.default_limit = default_limit
+        self.provider_limits = provider_limits or {}
+        self.model_weights = model_weights or {}
+        self.sync_interval = sync_interval
+        self._buckets: Dict[Tuple[str, str], Dict[int, int]] = {}
+        self._synced_at: Dict[Tuple[str, str], float] = {}  # 키별 마지막 DB 동기화 시각 (monotonic)
+        self._pending: Dict[Tuple[str, str, Optional[str], int], List[int]] = {}
+        # flush(저장)와 동기화(조회+재구성)를 직렬화해서 저장 중인 기록이 빠지거나 두 번 세지지 않게 함
+        self._sync_lock = asyncio.Lock()
+
+        metrics.register_gauge("quota_pending_records", lambda: len(self._pending))
+
+    def get_limit(self, provider: str) -> int:
+        return self.provider_limits.get(provider, self.default_limit)
+
+    def get_model_weight(self, model: Optional[str]) -> float:
+        """모델 가중치 (가장 긴 접두사 일치, 없으면 1.0)"""
+        if not model:
+            return 1.0
+        matches = [prefix for prefix in self.model_weights if model.startswith(prefix)]
+        if not matches:
+            return 1.0
+        return self.model_weights[max(matches, key=len)]
+
+    def _bucket_start(self, now: float) -> int:
+        return int(now // self.bucket_seconds * self.bucket_seconds)
+
+    def _status(self, key: Tuple[str, str], now: float) -> QuotaStatus:
+        buckets = self._buckets.get(key, {})
+        window_start = now - self.window_seconds
+        for bucket_start in [b for b in buckets if b + self.bucket_seconds <= window_start]:
+            del buckets[bucket_start]
+
+        if buckets:
+            reset_seconds = max(0, math.ceil(min(buckets) + self.bucket_seconds + self.window_seconds - now))
+        else:
+            reset_seconds = 0
+        return QuotaStatus(
+            limit=self.get_limit(key[1]),
+            used=sum(buckets.values()),
+            reset_seconds=reset_seconds
+        )
+
+    def _needs_sync(self, key: Tuple[str, str]) -> bool:
+        synced_at = self._synced_at.get(key)
+        return synced_at is None or time.monotonic() - synced_at >= self.sync_interval
+
+    async def _sync(self, db: AsyncSession, user_id: str, provider: str) -> None:
+        """DB에 기록된 윈도우 내 사용량(다른 워커 포함) + 아직 저장하지 않은 기록으로 메모리 버킷 재구성"""
+        key = (user_id, provider)
+        if not self._needs_sync(key):
+            return
+
+        async with self._sync_lock:
+            if not self._needs_sync(key):
+                return  # 대기 중 다른 요청이 먼저 동기화
+
+            window_start = datetime.fromtimestamp(time.time() - self.window_seconds, timezone.utc).replace(tzinfo=None)
+            result = await db.execute(
+                select(UsageRecord.bucket_start, func.sum(UsageRecord.weighted_tokens)).where(
+                    UsageRecord.user_id == user_id,
+                    UsageRecord.provider == provider,
+                    UsageRecord.bucket_start >= window_start
+                ).group_by(UsageRecord.bucket_start)
+            )
+
+            buckets: Dict[int, int] = {}
+            for bucket_start, tokens in result.all():
+                epoch = calendar.timegm(bucket_start.utctimetuple())
+                buckets[epoch] = buckets.get(epoch, 0) + int(tokens or 0)
+            # 조회 중에 기록된 것까지 포함 (record는 잠금 없이 _pending에 누적)
+            for (pending_user, pending_provider, _, bucket_start), values in self._pending.items():
+                if (pending_user, pending_provider) == key:
+                    buckets[bucket_start] = buckets.get(bucket_start, 0) + values[2]
+
+            self._buckets[key] = buckets
+            self._synced_at[key] = time.monotonic()
+
+    async def get_status(self, db: AsyncSession, user_id: str, provider: str) -> QuotaStatus:
+        if self.get_limit(provider):
+            await self._sync(db, user_id, provider)
+        return self._status((user_id, provider), time.time())
+
+    async def check(
+        self,
+        db: AsyncSession,
+        user_id: str,
+        provider: str,
+        estimated_tokens: int = 0
+    ) -> QuotaStatus:
+        """요청 전 예산 확인 (초과 시 QuotaExceeded)"""
+        status = await self.get_status(db, user_id, provider)
+        if status.limit and status.used + estimated_tokens > status.limit:
+            metrics.inc("quota_rejected_total")
+            raise QuotaExceeded(provider, status)
+        return status
+
+    def record(
+        self,
+        user_id: str,
+        provider: str,
+        model: Optional[str],
+        input_tokens: int,
+        output_tokens: int
+    ) -> int:
+        """사용량 기록 (메모리 집계, DB에는 다음 flush에서 저장). 차감된 토큰 수 반환"""
+        now = time.time()
+        bucket_start = self._bucket_start(now)
+        weighted = math.ceil((input_tokens + output_tokens) * self.get_model_weight(model))
+
+        buckets = self._buckets.setdefault((user_id, provider), {})
+        buckets[bucket_start] = buckets.get(bucket_start, 0) + weighted
+
+        pending = self._pending.setdefault((user_id, provider, model, bucket_start), [0, 0, 0, 0])
+        pending[0] += input_tokens
+        pending[1] += output_tokens
+        pending[2] += weighted
+        pending[3] += 1
+
+        metrics.inc("quota_tokens_recorded_total", weighted)
+        return weighted
+
+    async def flush(self) -> int:
+        """누적된 사용량을 한 번의 트랜잭션으로 저장. 실패 시 다음 flush에서 재시도
+
+        _pending을 비우는 것부터 커밋까지 _sync_lock 안에서 수행해서, 동기화가 저장 중인 기록을
+        DB와 _pending 어느 쪽에서도 보지 못해 사용량을 적게 세는 구간이 없게 함
+        """
+        if not self._pending:
+            return 0
+
+        async with self._sync_lock:
+            if not self._pending:
+                return 0  # 잠금 대기 중 다른 flush가 저장
+
+            pending, self._pending = self._pending, {}
+            rows = [
+                {
+                    "user_id": user_id,
+                    "provider": provider,
+                    "model_name": model,
+                    "bucket_start": datetime.fromtimestamp(bucket_start, timezone.utc).replace(tzinfo=None),
+                    "input_tokens": values[0],
+                    "output_tokens": values[1],
+                    "weighted_tokens": values[2],
+                    "request_count": values[3]
+                }
+                for (user_id, provider, model, bucket_start), values in pending.items()
+            ]
+
+            try:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(insert(UsageRecord), rows)
+                    await db.commit()
+            except asyncio.CancelledError:
+                # 종료 중 취소되면 되돌려 두고 전파 (lifespan의 마지막 flush에서 저장)
+                self._restore(pending)
+                raise
+            except Exception as e:
+                logger.error(f"Failed to flush usage records: {e}")
+                # 실패한 기록은 이후 누적분과 합쳐서 재시도
+                self._restore(pending)
+                return 0
+
+        metrics.inc("quota_flushed_records_total", len(rows))
+        self._prune()
+        return len(rows)
+
+    def _restore(self, pending: Dict[Tuple[str, str, Optional[str], int], List[int]]) -> None:
+        """저장하지 못한 기록을 이후 누적분과 합침"""
+        for key, values in pending.items():
+            merged = self._pending.setdefault(key, [0, 0, 0, 0])
+            for i, value in enumerate(values):
+                merged[i] += value
+
+    def _prune(self) -> None:
+        """윈도우를 벗어나 비어 있는 키 정리 (다음 조회 시 DB에서 다시 초기화)"""
+        now = time.time()
+        for key in list(self._buckets):
+            if not self._status(key, now).used:
+                del self._buckets[key]
+                self._synced_at.pop(key, None)
+
+    async def run_flush_loop(self, interval: float) -> None:
+        """주기적 flush (애플리케이션 lifespan에서 실행)"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+
+# 글로벌 쿼터 매니저 인스턴스
+quota_manager = QuotaManager(
+    window_seconds=settings.quota_window_seconds,
+    bucket_seconds=settings.quota_bucket_seconds,
+    default_limit=settings.quota_default_tokens,
+    provider_limits=settings.quota_provider_tokens,
+    model_weights=settings.quota_model_weights,
+    sync_interval=settings.quota_sync_interval
+)
@@ -0,0 +1,230 @@
+"""
+재연결 가능한 채팅 스트림 레지스트리
+생성 작업을 HTTP 응답과 분리된 태스크에서 실행하고, 최근 이벤트를 링 버퍼에 보관하여
+연결이 끊긴 클라이언트가 Last-Event-ID로 이어받을 수 있도록 함
+"""
+
+import asyncio
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Coroutine, Deque, Dict, List, Optional, Tuple
+
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.sse import sse_frame
+
+# 응답이 시작되어 첫 구독자가 붙기까지 기다리는 최대 시간 (grace_seconds와 별개)
+FIRST_SUBSCRIBER_TIMEOUT = 10.0
+
+
+class ResumableStream:
+    """
+    하나의 채팅 생성에 대한 재연결 가능한 이벤트 스트림
+
+    - 이벤트는 1부터 증가하는 id와 함께 최근 buffer_size개만 보관
+    - 버퍼에서 밀려난 chunk 본문은 resync_max_chars까지만 따로 보관했다가, 그 구간을 놓친 구독자에게만
+      놓친 본문을 resync 이벤트로 전달 (상한을 넘어 버린 구간까지 놓쳤으면 truncated 표시, 최종 본문은 end 이벤트)
+    - 구독자(HTTP 응답)가 모두 떠난 뒤 grace_seconds 안에 재연결이 없으면 생성 태스크를 취소
+      (grace_seconds가 0이면 마지막 구독자가 떠나는 즉시 취소. 대기하는 동안에는 제공자 토큰이 계속 소비됨)
+    """
+
+    def __init__(
+        self,
+        stream_id: str,
+        user_id: str,
+        chat_id: int,
+        buffer_size: int,
+        grace_seconds: float,
+        resync_max_chars: int = 262144
+    ):
+        self.stream_id = stream_id
+        self.user_id = user_id
+        self.chat_id = chat_id
+        self.grace_seconds = grace_seconds
+        self.resync_max_chars = resync_max_chars
+        self.finished = False
+        self.task: Optional[asyncio.Task] = None
+        self._events: Deque[Tuple[int, str, Optional[str]]] = deque(maxlen=buffer_size)
+        self._evicted: Deque[Tuple[int, str]] = deque()  # 버퍼에서 밀려난 chunk 본문 (event_id, text)
+        self._evicted_chars = 0
+        self._dropped_id = 0  # 상한 초과로 버린 마지막 event id
+        self._last_id = 0
+        self._changed = asyncio.Event()
+        self._subscribers = 0
+        self._expire_handle: Optional[asyncio.TimerHandle] = None
+
+    def start(self, coro: Coroutine) -> None:
+        """생성 작업 시작 (구독자가 붙기 전에 끊긴 경우에도 취소되도록 타이머 시작)"""
+        self.task = asyncio.create_task(coro)
+        self.task.add_done_callback(lambda _: self.close())
+        self._schedule_expire(max(self.grace_seconds, FIRST_SUBSCRIBER_TIMEOUT))
+
+    def publish(self, payload: dict) -> None:
+        """이벤트 추가 후 대기 중인 구독자 깨움"""
+        if self.finished:
+            return
+        self._last_id += 1
+        if len(self._events) == self._events.maxlen and self._events[0][2]:
+            self._keep_evicted(self._events[0][0], self._events[0][2])
+        text = payload.get("content") if payload.get("type") == "chunk" else None
+        self._events.append((self._last_id, sse_frame(payload, event_id=self._last_id), text))
+        self._notify()
+
+    def _keep_evicted(self, event_id: int, text: str) -> None:
+        """밀려난 chunk 본문 보관 (오래된 것부터 버려서 resync_max_chars 이내로 유지)"""
+        self._evicted.append((event_id, text))
+        self._evicted_chars += len(text)
+        while self._evicted_chars > self.resync_max_chars and self._evicted:
+            dropped_id, dropped_text = self._evicted.popleft()
+            self._evicted_chars -= len(dropped_text)
+            self._dropped_id = dropped_id
+
+    def close(self) -> None:
+        if self.finished:
+            return
+        self.finished = True
+        self._cancel_expire()
+        self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _replay(self, last_event_id: int) -> List[str]:
+        """last_event_id 이후 버퍼에 남아 있는 프레임"""
+        frames = []
+        first_id = self._events[0][0] if self._events else self._last_id + 1
+        if last_event_id < first_id - 1:
+            # 버퍼에서 밀려난 이벤트를 놓침: 놓친 본문만 이어 붙이도록 전달
+            missed = [text for event_id, text in self._evicted if event_id > last_event_id]
+            truncated = last_event_id < self._dropped_id
+            if missed or truncated:
+                payload = {'type': 'resync', 'stream_id': self.stream_id, 'content': "".join(missed)}
+                if truncated:
+                    payload['truncated'] = True
+                frames.append(sse_frame(payload, event_id=first_id - 1))
+        frames.extend(frame for event_id, frame, _ in self._events if event_id > last_event_id)
+        return frames
+
+    async def subscribe(self, request: Request, last_event_id: int = 0) -> AsyncIterator[str]:
+        """
+        last_event_id 이후 이벤트를 재생한 뒤 실시간 이벤트를 이어서 전달
+
+        클라이언트 연결이 끊기면 구독만 종료하고 생성은 grace_seconds 동안 유지
+        """
+        self._attach()
+        cursor = last_event_id
+        poll_interval = settings.sse_disconnect_poll_interval
+        last_check = time.monotonic()
+        try:
+            while True:
+                changed = self._changed
+                finished = self.finished
+                frames = self._replay(cursor)
+                cursor = self._last_id
+                for frame in frames:
+                    yield frame
+                if finished:
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                # 이벤트가 계속 도착하는 동안에도 poll_interval마다 확인
+                now = time.monotonic()
+                if now - last_check >= poll_interval:
+                    last_check = now
+                    if await request.is_disconnected():
+                        return
+        finally:
+            self._detach()
+
+    def _attach(self) -> None:
+        self._subscribers += 1
+        self._cancel_expire()
+
+    def _detach(self) -> None:
+        self._subscribers -= 1
+        if self._subscribers == 0 and not self.finished:
+            self._schedule_expire()
+
+    def _schedule_expire(self, delay: Optional[float] = None) -> None:
+        self._cancel_expire()
+        delay = self.grace_seconds if delay is None else delay
+        self._expire_handle = asyncio.get_running_loop().call_later(delay, self._expire)
+
+    def _cancel_expire(self) -> None:
+        if self._expire_handle is not None:
+            self._expire_handle.cancel()
+            self._expire_handle = None
+
+    def _expire(self) -> None:
+        """재연결 대기 시간 만료: 아무도 보지 않는 생성 취소"""
+        self._expire_handle = None
+        if self._subscribers == 0 and self.task is not None and not self.task.done():
+            if self.grace_seconds:
+                metrics.inc("stream_resume_expired_total")
+            self.task.cancel()
+
+
+class StreamRegistry:
+    """
+    프로세스 내 재연결 가능 스트림 목록 (재연결은 같은 워커로 라우팅되어야 함)
+
+    연결이 끊긴 뒤 생성을 유지하는 grace_seconds는 재연결을 요청한(resumable) 스트림에만 적용하고,
+    그 외 스트림은 마지막 구독자가 떠나면 바로 취소해서 아무도 받지 않는 토큰이 소비되지 않게 함
+    """
+
+    def __init__(
+        self,
+        buffer_size: int = 512,
+        grace_seconds: float = 30.0,
+        retention_seconds: float = 60.0,
+        resync_max_chars: int = 262144
+    ):
+        self.buffer_size = buffer_size
+        self.grace_seconds = grace_seconds
+        self.resync_max_chars = resync_max_chars
+        self.retention_seconds = retention_seconds
+        self._streams: Dict[str, ResumableStream] = {}
+
+        metrics.register_gauge("streams_active", lambda: len(self._streams))
+
+    def create(self, user_id: str, chat_id: int, resumable: bool = False) -> ResumableStream:
+        stream = ResumableStream(
+            stream_id=uuid.uuid4().hex,
+            user_id=user_id,
+            chat_id=chat_id,
+            buffer_size=self.buffer_size,
+            grace_seconds=self.grace_seconds if resumable else 0.0,
+            resync_max_chars=self.resync_max_chars
+        )
+        self._streams[stream.stream_id] = stream
+        return stream
+
+    def start(self, stream: ResumableStream, coro: Coroutine) -> None:
+        """생성 작업 시작. 완료 후 retention_seconds 동안 재연결용으로 보관"""
+        stream.start(coro)
+        loop = asyncio.get_running_loop()
+        stream.task.add_done_callback(
+            lambda _: loop.call_later(self.retention_seconds, self._streams.pop, stream.stream_id, None)
+        )
+
+    def get(self, stream_id: str, user_id: str, chat_id: int) -> Optional[ResumableStream]:
+        """소유자와 채팅이 일치하는 스트림만 반환"""
+        stream = self._streams.get(stream_id)
+        if stream is None or stream.user_id != user_id or stream.chat_id != chat_id:
+            return None
+        return stream
+
+
+# 글로벌 스트림 레지스트리 인스턴스
+stream_registry = StreamRegistry(
+    buffer_size=settings.stream_replay_buffer_size,
+    grace_seconds=settings.stream_resume_grace_seconds,
+    retention_seconds=settings.stream_retention_seconds,
+    resync_max_chars=settings.stream_resync_max_chars
+)
@@ -0,0 +1,242 @@
+"""
+채팅 턴 저장 모듈
+스트리밍 동안 사용자 메시지/이미지/AI 응답을 스테이징했다가 응답 종료 시 한 트랜잭션으로 저장
+(선택적으로 write-behind 큐를 통해 여러 턴을 배치로 저장)
+"""
+
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import metrics
+from app.crud.chat_crud import create_chat_turn_async, create_chat_turns_async
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChatTurn:
+    """저장 대기 중인 채팅 한 턴 (reply_slots는 AI 응답에 예약할 순서 수,
+    token_counts는 히스토리 조회 중 새로 계산한 기존 메시지의 토큰 수)"""
+    chat_id: int
+    user_id: str
+    user_message: Dict[str, Any]
+    image_rows: List[Dict[str, Any]] = field(default_factory=list)
+    replies: List[Dict[str, Any]] = field(default_factory=list)
+    reply_slots: int = 1
+    token_counts: Dict[int, int] = field(default_factory=dict)
+    attempts: int = 0
+
+    def add_reply(
+        self,
+        slot: int,
+        content: str,
+        provider: Optional[str],
+        model: Optional[str],
+        token_count: Optional[int],
+        truncated: bool = False
+    ) -> None:
+        self.replies.append({
+            "slot": slot,
+            "content": content,
+            "api_provider": provider,
+            "model_name": model,
+            "token_count": token_count,
+            "truncated": truncated
+        })
+
+
+class TurnWriter:
+    """
+    채팅 턴 저장기
+
+    - 턴 전체를 한 트랜잭션으로 저장하므로 턴당 커밋(fsync)은 한 번이며,
+      스트리밍이 실패하면 아무것도 저장하지 않아 응답 없는 사용자 메시지가 남지 않음
+    - 저장 전에 턴을 메모리 저널에 먼저 기록하고 커밋이 성공하면 제거
+    - 실패한 턴은 저널에 남아 retry_interval마다 재시도되고, 종료 시 마지막으로 한 번 더 시도
+      (프로세스 메모리 저널이므로 DB 장애/재시작은 견디지만 프로세스 강제 종료는 보호하지 못함)
+
+    write_behind가 켜져 있으면 submit()은 턴을 크기가 제한된 큐에 넣고 바로 반환하며,
+    백그라운드 태스크가 최대 batch_size개씩 모아 다중 행 INSERT로 저장.
+    큐가 가득 차면 submit()이 자리가 날 때까지 대기 (backpressure)
+    """
+
+    def __init__(
+        self,
+        max_attempts: int = 20,
+        write_behind: bool = False,
+        queue_size: int = 1000,
+        batch_size: int = 100,
+        batch_interval: float = 0.05
+    ):
+        self.max_attempts = max_attempts
+        self.write_behind = write_behind
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._journal: Dict[int, ChatTurn] = {}
+        self._in_flight: Set[int] = set()
+        self._queued: Set[int] = set()
+        self._ids = itertools.count(1)
+        self._queue: Optional[asyncio.Queue] = asyncio.Queue(maxsize=queue_size) if write_behind else None
+
+        metrics.register_gauge("turn_journal_pending", lambda: len(self._journal))
+        if self._queue is not None:
+            metrics.register_gauge("turn_write_queue_depth", self._queue.qsize)
+
+    def _journal_turn(self, turn: ChatTurn) -> int:
+        entry_id = next(self._ids)
+        self._journal[entry_id] = turn
+        return entry_id
+
+    async def commit(self, turn: ChatTurn) -> bool:
+        """턴을 저널에 기록한 뒤 저장. 실패하면 False (저널에 남아 재시도됨)"""
+        return await self._write(self._journal_turn(turn), turn)
+
+    async def submit(self, turn: ChatTurn) -> bool:
+        """
+        턴 저장 요청
+
+        write-behind 모드에서는 큐에 넣는 즉시 True를 반환하고 (저널에 기록되어 재시도 보장),
+        그렇지 않으면 commit()과 같이 바로 저장
+        """
+        if self._queue is None:
+            return await self.commit(turn)
+
+        entry_id = self._journal_turn(turn)
+        self._queued.add(entry_id)
+        if self._queue.full():
+            metrics.inc("turn_write_queue_full_total")
+        try:
+            await self._queue.put((entry_id, turn))
+        except BaseException:
+            self._queued.discard(entry_id)  # 저널에 남아 재시도 루프가 저장
+            raise
+        return True
+
+    async def _write(self, entry_id: int, turn: ChatTurn) -> bool:
+        self._in_flight.add(entry_id)
+        turn.attempts += 1
+        try:
+            async with AsyncSessionLocal() as db:
+                saved = await create_chat_turn_async(
+                    db,
+                    chat_id=turn.chat_id,
+                    user_id=turn.user_id,
+                    user_message=turn.user_message,
+                    image_rows=turn.image_rows,
+                    replies=turn.replies,
+                    reply_slots=turn.reply_slots,
+                    token_counts=turn.token_counts
+                )
+        except Exception as e:
+            metrics.inc("turn_write_failures_total")
+            if turn.attempts >= self.max_attempts:
+                self._journal.pop(entry_id, None)
+                metrics.inc("turn_write_dropped_total")
+                logger.error(f"Dropping chat turn for chat {turn.chat_id} after {turn.attempts} attempts: {e}")
+            else:
+                logger.warning(f"Failed to save chat turn for chat {turn.chat_id} (attempt {turn.attempts}): {e}")
+            return False
+        finally:
+            self._in_flight.discard(entry_id)
+
+        self._journal.pop(entry_id, None)
+        if saved is None:
+            # 스트리밍 도중 채팅이 삭제됨
+            logger.warning(f"Chat {turn.chat_id} no longer exists - turn discarded")
+            return False
+        metrics.inc("turn_writes_total")
+        return True
+
+    async def _write_batch(self, entries: List[Tuple[int, ChatTurn]]) -> None:
+        """여러 턴을 한 트랜잭션으로 저장. 실패하면 턴별 저장으로 나눠 재시도"""
+        entry_ids = [entry_id for entry_id, _ in entries]
+        self._in_flight.update(entry_ids)
+        try:
+            async with AsyncSessionLocal() as db:
+                results = await create_chat_turns_async(db, [turn for _, turn in entries])
+        except Exception as e:
+            logger.warning(f"Failed to save batch of {len(entries)} chat turns, retrying individually: {e}")
+            metrics.inc("turn_write_batch_failures_total")
+            results = None
+        finally:
+            self._in_flight.difference_update(entry_ids)
+
+        if results is None:
+            for entry_id, turn in entries:
+                await self._write(entry_id, turn)
+            return
+
+        for (entry_id, turn), saved in zip(entries, results):
+            self._journal.pop(entry_id, None)
+            if not saved:
+                logger.warning(f"Chat {turn.chat_id} no longer exists - turn discarded")
+        metrics.inc("turn_writes_total", sum(results))
+        metrics.inc("turn_write_batches_total")
+
+    async def _next_batch(self) -> List[Tuple[int, ChatTurn]]:
+        """첫 턴을 기다린 뒤 batch_interval 동안 batch_size개까지 모음"""
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_interval
+        try:
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # 큐에서 꺼낸 턴은 저널에 남아 있으므로 재시도 대상으로 전환
+            self._queued.difference_update(entry_id for entry_id, _ in batch)
+            raise
+        return batch
+
+    async def run_writer_loop(self) -> None:
+        """write-behind 큐 소비 (애플리케이션 lifespan에서 실행)"""
+        if self._queue is None:
+            return
+        while True:
+            batch = await self._next_batch()
+            self._queued.difference_update(entry_id for entry_id, _ in batch)
+            await self._write_batch(batch)
+
+    async def drain(self) -> None:
+        """종료 시 큐에 남은 턴과 저널의 실패한 턴을 모두 저장 시도"""
+        if self._queue is not None:
+            while not self._queue.empty():
+                batch = [self._queue.get_nowait() for _ in range(min(self.batch_size, self._queue.qsize()))]
+                self._queued.difference_update(entry_id for entry_id, _ in batch)
+                await self._write_batch(batch)
+        await self.retry_pending()
+
+    async def retry_pending(self) -> int:
+        """저널에 남은 턴 재시도. 저장된 턴 수 반환"""
+        saved = 0
+        for entry_id, turn in list(self._journal.items()):
+            if entry_id in self._in_flight or entry_id in self._queued:
+                continue  # 저장 중이거나 write-behind 큐에서 대기 중인 턴
+            if await self._write(entry_id, turn):
+                saved += 1
+        return saved
+
+    async def run_retry_loop(self, interval: float) -> None:
+        """주기적 재시도 (애플리케이션 lifespan에서 실행)"""
+        while True:
+            await asyncio.sleep(interval)
+            await self.retry_pending()
+
+
+# 글로벌 턴 저장기 인스턴스
+turn_writer = TurnWriter(
+    max_attempts=settings.turn_journal_max_attempts,
+    write_behind=settings.turn_write_behind_enabled,
+    queue_size=settings.turn_write_queue_size,
+    batch_size=settings.turn_write_batch_size,
+    batch_interval=settings.turn_write_batch_interval
+)
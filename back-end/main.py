@@ -2,13 +2,22 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+import asyncio
 import uvicorn
 import logging
 from app.api import auth_router, api_key_router, chat_router, ai_router
 from app.api.user_preferences_routes import router as user_preferences_router
 from app.api.rate_limit_test import router as rate_limit_test_router
 from app.core.rate_limiter import limiter, rate_limit_exceeded_handler
+from app.middleware import AuthContextMiddleware, RequestLoggingMiddleware
 from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.password_hasher import PasswordHasherBusy
+from app.services.blob_gc import run_blob_gc_loop
+from app.services.client_pool import client_pool
+from app.services.quota import quota_manager, QuotaExceeded
+from app.services.turn_writer import turn_writer
 from slowapi.errors import RateLimitExceeded
 
 # 로깅 설정
@@ -27,9 +36,32 @@ if not settings.debug:
     logging.getLogger("anthropic").setLevel(logging.ERROR)
     logging.getLogger("google").setLevel(logging.ERROR)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # AI 사용량 주기적 일괄 기록
+    quota_flush_task = asyncio.create_task(quota_manager.run_flush_loop(settings.quota_flush_interval))
+    # 채팅 턴 write-behind 저장 및 실패한 턴 재시도
+    turn_writer_task = asyncio.create_task(turn_writer.run_writer_loop())
+    turn_retry_task = asyncio.create_task(turn_writer.run_retry_loop(settings.turn_journal_retry_interval))
+    # 참조 없는 이미지 Blob 주기적 정리
+    blob_gc_task = asyncio.create_task(run_blob_gc_loop(settings.blob_gc_interval)) if settings.blob_gc_interval else None
+    yield
+    if blob_gc_task is not None:
+        blob_gc_task.cancel()
+    turn_writer_task.cancel()
+    turn_retry_task.cancel()
+    await asyncio.gather(turn_writer_task, turn_retry_task, return_exceptions=True)
+    await turn_writer.drain()  # 큐와 저널에 남은 턴 저장
+    quota_flush_task.cancel()
+    await asyncio.gather(quota_flush_task, return_exceptions=True)  # 진행 중인 flush가 끝난 뒤
+    await quota_manager.flush()  # 남은 사용량 기록
+    # 종료 시 AI 제공자 커넥션 풀 정리
+    await client_pool.aclose()
+
 app = FastAPI(
     title="AI Chat Backend API", 
     version="1.0.0",
+    lifespan=lifespan,
     # 프로덕션에서는 API 문서 비활성화 (보안)
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None
@@ -39,6 +71,31 @@ app = FastAPI(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
+# 비밀번호 해싱 대기열 초과 시 503 응답 (로그인 폭주 보호)
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy. Please try again shortly."},
+        headers={"Retry-After": "1"}
+    )
+
+# AI 토큰 예산 초과 시 429 응답 (남은 예산/초기화 시간 헤더 포함)
+@app.exception_handler(QuotaExceeded)
+async def quota_exceeded_handler(request: Request, exc: QuotaExceeded):
+    headers = exc.status.headers()
+    headers["Retry-After"] = str(max(1, exc.status.reset_seconds))
+    return JSONResponse(
+        status_code=429,
+        content={
+            "error": "Quota exceeded",
+            "message": str(exc),
+            "provider": exc.provider,
+            "retry_after": exc.status.reset_seconds
+        },
+        headers=headers
+    )
+
 # 422 에러 핸들러 - 보안 강화
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -74,12 +131,18 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
         content={"detail": error_details}
     )
 
+# 요청 로깅 (개발환경에서만 출력, 인증 컨텍스트 안쪽에 두어 사용자 정보 사용)
+app.add_middleware(RequestLoggingMiddleware)
+# 요청당 한 번 토큰 검증 (Rate Limiter 키, 인증, 로깅에서 공유)
+app.add_middleware(AuthContextMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Quota-Limit-Tokens", "X-Quota-Remaining-Tokens", "X-Quota-Reset", "Retry-After", "X-Stream-Id"],
 )
 
 # 라우터 등록
@@ -105,6 +168,12 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+# 내부 메트릭은 설정된 경우에만 노출
+if settings.debug or settings.metrics_enabled:
+    @app.get("/metrics")
+    async def get_metrics():
+        return metrics.snapshot()
+
 if __name__ == "__main__":
     uvicorn.run(
         app, 
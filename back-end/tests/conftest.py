@@ -0,0 +1,211 @@
+"""
+테스트 공통 설정
+app 모듈이 import 시점에 설정을 읽으므로 필수 환경 변수를 먼저 채움 (이미 설정된 환경 변수는 그대로 사용).
+app 모듈은 각 픽스처 안에서 import
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+
+@dataclass
+class FakeProvider:
+    """
+    미리 정한 청크를 delay 간격으로 보내는 가짜 제공자 스트림
+
+    fail_after가 있으면 그만큼 보낸 뒤 예외, hang이면 청크를 다 보낸 뒤 끝나지 않고 대기.
+    제공자 스트림이 닫히면 closed_at 기록 (취소 확인용)
+    """
+    chunks: List[str]
+    delay: float = 0.0
+    fail_after: Optional[int] = None
+    hang: bool = False
+    closed_at: Optional[float] = None
+
+    async def stream(self, provider: str, model: Optional[str]):
+        from app.services.ai_service import AIResponse
+
+        try:
+            for index, chunk in enumerate(self.chunks):
+                if index == self.fail_after:
+                    raise RuntimeError(f"{provider} upstream failed")
+                await asyncio.sleep(self.delay)
+                yield AIResponse(content=chunk, provider=provider, model=model or f"{provider}-fake")
+            if self.hang:
+                await asyncio.Event().wait()
+        finally:
+            self.closed_at = time.monotonic()
+
+
+class ChatHarness:
+    """AI 라우터만 올린 앱을 ASGI로 직접 호출 (클라이언트 연결 종료를 원하는 시점에 흉내)"""
+
+    def __init__(self, app, engine, providers: Dict[str, FakeProvider]):
+        self.app = app
+        self.engine = engine
+        self.providers = providers
+
+    async def post_stream(
+        self,
+        path: str,
+        body: dict,
+        headers: Optional[Dict[str, str]] = None,
+        disconnect_when: Optional[Callable[[List[dict]], bool]] = None
+    ) -> List[dict]:
+        """SSE 요청을 보내고 받은 이벤트 목록 반환 (disconnect_when이 참이 되면 연결 종료)"""
+        events: List[dict] = []
+        buffer = b""
+        disconnected = asyncio.Event()
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal buffer
+            if message["type"] != "http.response.body" or disconnected.is_set():
+                return
+            buffer += message.get("body", b"")
+            *frames, buffer = buffer.split(b"\n\n")
+            for frame in frames:
+                for line in frame.decode().splitlines():
+                    if line.startswith("data: "):
+                        events.append(json.loads(line[len("data: "):]))
+            if disconnect_when is not None and disconnect_when(events):
+                disconnected.set()
+
+        raw_headers = [(b"content-type", b"application/json")]
+        raw_headers += [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()]
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "POST",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": b"",
+            "headers": raw_headers,
+            "client": ("127.0.0.1", 50000),
+            "server": ("testserver", 80),
+        }
+        await self.app(scope, receive, send)
+        return events
+
+    async def settle(self) -> None:
+        """생성 태스크와 백그라운드 저장이 끝날 때까지 대기"""
+        from app.api import ai_routes
+        from app.services.stream_registry import stream_registry
+
+        for _ in range(100):
+            tasks = [stream.task for stream in stream_registry._streams.values() if stream.task is not None]
+            tasks += list(ai_routes._background_tasks)
+            pending = [task for task in tasks if not task.done()]
+            if not pending:
+                return
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def messages(self, chat_id: int = 1) -> List[dict]:
+        """저장된 메시지 (순서대로)"""
+        from sqlalchemy import select
+        from sqlalchemy.ext.asyncio import AsyncSession
+        from app.models.message import Message
+
+        async with AsyncSession(self.engine) as db:
+            rows = await db.scalars(
+                select(Message).where(Message.chat_id == chat_id).order_by(Message.message_order)
+            )
+            return [
+                {
+                    "order": row.message_order,
+                    "sender": row.sender,
+                    "content": row.content,
+                    "provider": row.api_provider,
+                    "truncated": row.truncated
+                }
+                for row in rows
+            ]
+
+
+@pytest.fixture
+def chat_harness(tmp_path, monkeypatch):
+    """
+    AI 채팅 라우트 테스트용 앱
+
+    - 파일 SQLite에 사용자 alice와 채팅 1을 만들고, 라우트/턴 저장이 이 DB를 쓰도록 교체
+    - 제공자 호출은 providers에 넣은 FakeProvider로 대체 (API 키는 모든 제공자에 있다고 가정)
+    """
+    pytest.importorskip("aiosqlite")
+    from fastapi import FastAPI
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    import app.models  # noqa: F401 (관계 대상 모델 등록)
+    from app.api import ai_routes
+    from app.core.auth import get_current_user
+    from app.core.config import settings
+    from app.core.database import Base, get_async_db
+    from app.core.rate_limiter import limiter
+    from app.models import Chat, User
+    from app.services import turn_writer as turn_writer_module
+    from app.services.ai_manager import ai_manager
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chat.db'}", poolclass=NullPool)
+
+    async def seed():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            db.add(User(id="alice", email="alice@example.com", password="!", name="Alice"))
+            db.add(Chat(id=1, user_id="alice", title="chat", model="gpt-4o-mini"))
+            await db.commit()
+
+    asyncio.run(seed())
+
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(ai_routes, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(turn_writer_module, "AsyncSessionLocal", session_factory)
+    monkeypatch.setattr(settings, "sse_disconnect_poll_interval", 0.05)
+    monkeypatch.setattr(limiter, "enabled", False)
+
+    providers: Dict[str, FakeProvider] = {}
+
+    def generate_text_stream(prompt, provider, model=None, **kwargs):
+        return providers[provider].stream(provider, model)
+
+    async def get_provider_key(db, user_id, provider):
+        return "test-key"
+
+    async def get_provider_keys(db, user_id):
+        return {provider: "test-key" for provider in ai_routes.SUPPORTED_PROVIDERS}
+
+    monkeypatch.setattr(ai_manager, "generate_text_stream", generate_text_stream)
+    monkeypatch.setattr(ai_routes, "_get_provider_key", get_provider_key)
+    monkeypatch.setattr(ai_routes, "_get_provider_keys", get_provider_keys)
+
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.include_router(ai_routes.router)
+    app.dependency_overrides[get_async_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: User(id="alice", email="alice@example.com", name="Alice")
+
+    yield ChatHarness(app, engine, providers)
+    asyncio.run(engine.dispose())
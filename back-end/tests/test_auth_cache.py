@@ -0,0 +1,60 @@
+"""
+인증 캐시 테스트
+늦게 커밋된 블랙리스트 행이 증분 갱신에서 누락되지 않는지,
+캐시된 사용자가 다른 곳에서 바뀐 비밀번호 해시를 그대로 쓰지 않는지 확인
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401 (관계 대상 모델 등록)
+from app.core.auth_cache import TokenBlacklistCache, UserCache
+from app.core.database import Base
+from app.models.blacklist_token import BlacklistToken
+from app.models.user import User
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(id="alice", email="alice@example.com", password="old-hash", name="Alice"))
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _blacklist(db: Session, jti: str, blacklisted_on: datetime) -> None:
+    db.add(BlacklistToken(token_jti=jti, user_id="alice", token_type="access", blacklisted_on=blacklisted_on))
+    db.commit()
+
+
+def test_blacklist_refresh_picks_up_late_commits(db):
+    cache = TokenBlacklistCache(refresh_interval=0, overlap=60)
+    now = datetime.utcnow()
+    _blacklist(db, "first", now)
+    assert cache.is_blacklisted(db, "first")
+
+    # 먼저 시작했지만 나중에 커밋된 트랜잭션 (삽입 시각이 이미 본 행보다 이전)
+    _blacklist(db, "late", now - timedelta(seconds=30))
+
+    assert cache.is_blacklisted(db, "late")
+    assert not cache.is_blacklisted(db, "unknown")
+
+
+def test_cached_user_does_not_keep_password_hash(db):
+    cache = UserCache(ttl=60)
+    cache.set(db.get(User, "alice"))
+
+    # 다른 워커에서 비밀번호 변경
+    db.execute(User.__table__.update().values(password="new-hash"))
+    db.commit()
+    db.expunge_all()
+
+    user = cache.get(db, "alice")
+    assert user.name == "Alice"
+    assert user.password == "new-hash"
@@ -0,0 +1,71 @@
+"""
+이미지 Blob 정리 테스트
+채팅 삭제 후 다른 행이 참조하지 않는 Blob만 지우고, 최근에 사용된 Blob은 남겼다가 주기적 GC로 정리하는지 확인
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import app.models  # noqa: F401 (관계 대상 모델 등록)
+from app.core.config import settings
+from app.core.database import Base
+from app.crud.chat_crud import delete_chat, sweep_unreferenced_blobs
+from app.models import Chat, Message, MessageImage, User
+from app.services import blob_store as blob_store_module
+from app.services.blob_store import LocalBlobStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(blob_store_module, "_blob_store", store)
+    monkeypatch.setattr(settings, "blob_gc_grace_seconds", 0)
+    return store
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(id="alice", email="alice@example.com", password="!", name="Alice"))
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+def _chat_with_images(db: Session, chat_id: int, blob_keys) -> None:
+    db.add(Chat(id=chat_id, user_id="alice", title="chat", model="gpt-4o-mini"))
+    message = Message(chat_id=chat_id, sender="user", content="look", message_order=1)
+    message.message_images = [
+        MessageImage(filename=f"{i}.png", content_type="image/png", size=1, blob_key=key, order_index=i)
+        for i, key in enumerate(blob_keys)
+    ]
+    db.add(message)
+    db.commit()
+
+
+def test_delete_chat_removes_only_unreferenced_blobs(db, store):
+    shared, own = store.put(b"shared image"), store.put(b"own image")
+    _chat_with_images(db, 1, [shared, own])
+    _chat_with_images(db, 2, [shared])
+
+    assert delete_chat(db, 1, "alice")
+    assert not store.exists(own)
+    assert store.exists(shared)  # 채팅 2가 아직 참조
+
+
+def test_recently_used_blobs_are_left_for_gc(db, store, monkeypatch):
+    monkeypatch.setattr(settings, "blob_gc_grace_seconds", 3600)
+    key = store.put(b"just uploaded")
+    _chat_with_images(db, 1, [key])
+    orphan = store.put(b"staged for a turn that is still streaming")
+
+    assert delete_chat(db, 1, "alice")
+    assert store.exists(key)  # 방금 put된 Blob은 저장 대기 중인 턴이 참조할 수 있음
+    assert sweep_unreferenced_blobs(db) == 0
+
+    monkeypatch.setattr(settings, "blob_gc_grace_seconds", 0)
+    assert sweep_unreferenced_blobs(db) == 2
+    assert not store.exists(key) and not store.exists(orphan)
@@ -0,0 +1,85 @@
+"""
+비교 스트림 테스트
+여러 제공자의 청크가 index/provider 태그와 함께 섞여 전달되고, 실패한 제공자는 해당 대상의 error 이벤트만 보내며,
+응답은 완료 순서가 아니라 요청한 대상 순서(slot)대로 저장되는지 확인 (연결 종료 시 부분 응답 포함)
+"""
+
+import asyncio
+
+from conftest import FakeProvider
+
+COMPARE_PATH = "/api/v1/ai/chat/1/compare"
+COMPARE_BODY = {
+    "message": "compare",
+    "flush_policy": "immediate",
+    "targets": [
+        {"provider": "openai", "model": "gpt-4o-mini"},
+        {"provider": "google", "model": "gemini-1.5-flash"},
+        {"provider": "anthropic", "model": "claude-3-haiku"},
+    ],
+}
+
+
+def _ai_rows(messages):
+    return [(m["order"], m["provider"], m["content"], m["truncated"]) for m in messages if m["sender"] == "ai"]
+
+
+def test_compare_multiplexes_providers_and_stores_replies_in_slot_order(chat_harness):
+    chat_harness.providers.update({
+        "openai": FakeProvider(["O1", "O2"], delay=0.06),          # 가장 늦게 끝남
+        "google": FakeProvider(["G1", "G2"], delay=0.01, fail_after=1),
+        "anthropic": FakeProvider(["A1", "A2", "A3"], delay=0.02),
+    })
+
+    async def scenario():
+        events = await chat_harness.post_stream(COMPARE_PATH, COMPARE_BODY)
+        await chat_harness.settle()
+        return events, await chat_harness.messages()
+
+    events, messages = asyncio.run(scenario())
+    tags = {0: "openai", 1: "google", 2: "anthropic"}
+    assert all(tags[e["index"]] == e["provider"] for e in events if "index" in e)
+
+    chunks = [(e["index"], e["content"]) for e in events if e["type"] == "chunk"]
+    assert [c for i, c in chunks if i == 0] == ["O1", "O2"]
+    assert [c for i, c in chunks if i == 2] == ["A1", "A2", "A3"]
+    # 제공자 청크가 도착 순서대로 섞여서 전달 (openai 첫 청크가 anthropic 마지막 청크보다 먼저)
+    assert chunks.index((0, "O1")) < chunks.index((2, "A3"))
+
+    errors = [e for e in events if e["type"] == "error"]
+    assert [(e["index"], e["provider"]) for e in errors] == [(1, "google")]
+    assert "google upstream failed" in errors[0]["error"]
+    assert [e["index"] for e in events if e["type"] == "end"] == [2, 0]
+    assert events[-1] == {"type": "done", "persisted": True}
+
+    # 사용자 메시지 다음 순서를 대상별로 예약 (실패한 google 자리는 비어 있음)
+    user_order = next(m["order"] for m in messages if m["sender"] == "user")
+    assert _ai_rows(messages) == [
+        (user_order + 1, "openai", "O1O2", False),
+        (user_order + 3, "anthropic", "A1A2A3", False),
+    ]
+
+
+def test_compare_disconnect_stores_partial_replies(chat_harness):
+    chat_harness.providers.update({
+        "openai": FakeProvider(["O1"], hang=True),
+        "google": FakeProvider(["G1"], hang=True),
+        "anthropic": FakeProvider(["A1"], hang=True),
+    })
+
+    def all_started(events):
+        return len({e["index"] for e in events if e["type"] == "chunk"}) == 3
+
+    async def scenario():
+        await chat_harness.post_stream(COMPARE_PATH, COMPARE_BODY, disconnect_when=all_started)
+        await chat_harness.settle()
+        return await chat_harness.messages()
+
+    messages = asyncio.run(scenario())
+    assert all(provider.closed_at is not None for provider in chat_harness.providers.values())
+    user_order = next(m["order"] for m in messages if m["sender"] == "user")
+    assert _ai_rows(messages) == [
+        (user_order + 1, "openai", "O1", True),
+        (user_order + 2, "google", "G1", True),
+        (user_order + 3, "anthropic", "A1", True),
+    ]
@@ -0,0 +1,55 @@
+"""
+채팅 스트림 연결 종료 테스트
+재연결을 요청하지 않은 스트림은 연결이 끊기면 바로 제공자 스트림을 닫고,
+X-Stream-Resumable 스트림은 설정한 대기 시간까지만 생성을 유지하는지 확인
+"""
+
+import asyncio
+import time
+
+from conftest import FakeProvider
+
+from app.services.stream_registry import stream_registry
+
+CHAT_BODY = {"message": "hi", "provider": "openai", "flush_policy": "immediate"}
+
+
+def _disconnect_after_first_chunk(marks: dict):
+    def check(events):
+        if any(event["type"] == "chunk" for event in events):
+            marks.setdefault("disconnected_at", time.monotonic())
+            return True
+        return False
+    return check
+
+
+def test_disconnect_cancels_provider_stream_immediately(chat_harness):
+    provider = chat_harness.providers["openai"] = FakeProvider(["Hel", "lo"], hang=True)
+    marks = {}
+
+    async def scenario():
+        await chat_harness.post_stream("/api/v1/ai/chat/1", CHAT_BODY,
+                                       disconnect_when=_disconnect_after_first_chunk(marks))
+        await chat_harness.settle()
+
+    asyncio.run(scenario())
+    assert provider.closed_at is not None
+    # 다음 연결 종료 확인(poll 0.05초) 안에 취소
+    assert provider.closed_at - marks["disconnected_at"] < 0.5
+
+
+def test_resumable_stream_is_cancelled_after_grace(chat_harness, monkeypatch):
+    monkeypatch.setattr(stream_registry, "grace_seconds", 0.3)
+    provider = chat_harness.providers["openai"] = FakeProvider(["Hel", "lo"], hang=True)
+    marks = {}
+
+    async def scenario():
+        await chat_harness.post_stream("/api/v1/ai/chat/1", CHAT_BODY, headers={"X-Stream-Resumable": "1"},
+                                       disconnect_when=_disconnect_after_first_chunk(marks))
+        await asyncio.sleep(0.1)
+        marks["open_during_grace"] = provider.closed_at is None
+        await chat_harness.settle()
+
+    asyncio.run(scenario())
+    assert marks["open_during_grace"]
+    assert 0.3 <= provider.closed_at - marks["disconnected_at"] < 0.3 + 0.5
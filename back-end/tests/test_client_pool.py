@@ -0,0 +1,88 @@
+"""
+클라이언트 풀 테스트
+공유 HTTP 풀 없이 자체 transport를 가진 클라이언트(Gemini gRPC 채널)가
+LRU/유휴 TTL로 제거된 뒤 유예 시간이 지나면 닫히고, 종료 시에도 닫히는지 확인
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import client_pool as client_pool_module
+from app.services.client_pool import ProviderClientPool
+
+
+class FakeTransport:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClient:
+    def __init__(self, api_key: str, http_client):
+        self.api_key = api_key
+        self.http_client = http_client
+        self.transport = FakeTransport()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 0.0}
+    monkeypatch.setattr(client_pool_module, "time", SimpleNamespace(monotonic=lambda: now["value"]))
+
+    def advance(seconds: float):
+        now["value"] += seconds
+
+    return advance
+
+
+def _pool(**kwargs) -> ProviderClientPool:
+    pool = ProviderClientPool(**kwargs)
+    pool.register("google", FakeClient, shared_http=False)
+    pool.register("openai", FakeClient)
+    return pool
+
+
+def test_evicted_grpc_clients_are_closed_after_delay(clock):
+    pool = _pool(max_size=1, idle_ttl=100.0, close_delay=30.0)
+
+    lru_evicted = pool.get_client("google", "key-a")
+    kept = pool.get_client("google", "key-b")  # 최대 크기 초과로 key-a 제거
+    clock(10)
+    pool.get_client("google", "key-b")
+
+    # 제거 직후에는 진행 중인 스트림을 위해 열어 둠
+    assert not lru_evicted.transport.closed
+
+    clock(25)
+    pool.get_client("google", "key-b")
+    assert lru_evicted.transport.closed
+    assert not kept.transport.closed
+
+    clock(100)
+    pool.get_client("google", "key-c")  # 유휴 TTL로 key-b 제거
+    clock(30)
+    pool.get_client("google", "key-c")
+    assert kept.transport.closed
+
+    # 공유 HTTP 풀을 쓰는 클라이언트는 transport를 닫지 않음
+    shared = pool.get_client("openai", "key-a")
+    pool.get_client("google", "key-d")
+    clock(30)
+    pool.get_client("google", "key-d")
+    assert not shared.transport.closed
+
+
+def test_aclose_closes_cached_and_retired_grpc_clients(clock):
+    pool = _pool(max_size=1, close_delay=30.0)
+
+    retired = pool.get_client("google", "key-a")
+    cached = pool.get_client("google", "key-b")
+    asyncio.run(pool.aclose())
+
+    assert retired.transport.closed
+    assert cached.transport.closed
+    assert len(pool) == 0
@@ -0,0 +1,108 @@
+"""
+Gemini 스트리밍 회귀 테스트
+동기 SDK가 청크마다 블로킹되어도 이벤트 루프가 다른 코루틴을 계속 처리하는지,
+소비 측이 중단하면 워커 스레드가 SDK 스트림을 취소하고 바로 반환되는지,
+설치된 SDK에 키별 클라이언트를 주입할 수 있는지 확인
+"""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+from app.services import gemini_service
+from app.services.gemini_service import GeminiService, iterate_in_thread
+
+CHUNK_DELAY = 0.2
+TICK_INTERVAL = 0.01
+
+
+class SlowStream:
+    """청크마다 스레드를 블로킹하는 가짜 SDK 스트림 (gRPC 스트림처럼 cancel() 지원)"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks  # [(대기 시간, 텍스트)]
+        self.cancelled = threading.Event()
+        self.finished = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def __iter__(self):
+        try:
+            for delay, text in self.chunks:
+                # 취소되면 대기 중인 next()가 예외로 깨어남
+                if self.cancelled.wait(delay):
+                    raise RuntimeError("stream cancelled")
+                yield SimpleNamespace(text=text, candidates=[], usage_metadata=None)
+        finally:
+            self.finished.set()
+
+
+class SlowModel:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def generate_content(self, *args, **kwargs):
+        time.sleep(CHUNK_DELAY)  # 첫 응답까지의 네트워크 대기
+        return self.stream
+
+
+async def _count_ticks(stop: asyncio.Event) -> int:
+    ticks = 0
+    while not stop.is_set():
+        await asyncio.sleep(TICK_INTERVAL)
+        ticks += 1
+    return ticks
+
+
+def test_slow_gemini_stream_does_not_block_event_loop(monkeypatch):
+    stream = SlowStream([(CHUNK_DELAY, "first "), (CHUNK_DELAY, "second "), (CHUNK_DELAY, "third")])
+    monkeypatch.setattr(GeminiService, "_create_model", lambda self, model, api_key: SlowModel(stream))
+
+    async def scenario():
+        stop = asyncio.Event()
+        ticker = asyncio.create_task(_count_ticks(stop))
+        started = time.perf_counter()
+        texts = [
+            chunk.content
+            async for chunk in GeminiService().generate_text_stream("hello", api_key="AIza-test-key")
+        ]
+        elapsed = time.perf_counter() - started
+        stop.set()
+        return texts, elapsed, await ticker
+
+    texts, elapsed, ticks = asyncio.run(scenario())
+
+    assert texts == ["first ", "second ", "third"]
+    assert elapsed >= 4 * CHUNK_DELAY
+    # 루프가 SDK 호출에 막히면 블로킹 동안 틱이 거의 처리되지 않음
+    assert ticks >= (elapsed / TICK_INTERVAL) * 0.5
+
+
+def test_cancelled_stream_releases_worker_thread():
+    # 첫 청크 이후 다음 청크는 사실상 오지 않는 스트림
+    stream = SlowStream([(0, "ready"), (60, "never")])
+
+    async def scenario():
+        events = iterate_in_thread(lambda: stream)
+        first = await events.__anext__()
+        await events.aclose()
+        return first
+
+    first = asyncio.run(scenario())
+
+    assert first.text == "ready"
+    assert stream.cancelled.is_set()
+    # 다음 청크를 기다리지 않고 워커 스레드가 종료되어야 함
+    assert stream.finished.wait(2)
+
+
+def test_create_model_injects_pooled_client(monkeypatch):
+    pooled = object()
+    monkeypatch.setattr(gemini_service.client_pool, "get_client", lambda provider, api_key: pooled)
+
+    model_instance = GeminiService()._create_model("gemini-2.5-flash", "AIza-test-key")
+
+    # 설치된 SDK가 주입 지점(_client)을 유지하는지 확인 (업그레이드 시 이 테스트와 가드가 함께 실패)
+    assert model_instance._client is pooled
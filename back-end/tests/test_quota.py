@@ -0,0 +1,105 @@
+"""
+쿼터 테스트
+한 워커가 저장한 사용량을 다른 워커가 다시 읽어 예산이 워커 수만큼 늘어나지 않는지,
+종료 중 취소된 flush의 기록이 유실되지 않는지, flush와 동기화가 겹쳐도 사용량이 빠지지 않는지 확인
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import app.models  # noqa: F401 (관계 대상 모델 등록)
+from app.core.database import Base
+from app.models.usage_record import UsageRecord
+from app.services import quota
+from app.services.quota import QuotaExceeded, QuotaManager
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # 워커들이 같은 DB를 보도록 파일 DB 사용
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'quota.db'}")
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_schema())
+    monkeypatch.setattr(quota, "AsyncSessionLocal", async_sessionmaker(engine, expire_on_commit=False))
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+def _worker() -> QuotaManager:
+    return QuotaManager(default_limit=100, sync_interval=0)
+
+
+def test_workers_share_budget_through_db(engine):
+    async def scenario():
+        worker_a, worker_b = _worker(), _worker()
+        async with AsyncSession(engine) as db:
+            await worker_b.check(db, "alice", "openai")  # B가 먼저 초기화해 둔 상태
+            await worker_a.check(db, "alice", "openai")
+            worker_a.record("alice", "openai", "gpt-4o-mini", 50, 30)
+            assert await worker_a.flush() == 1
+
+            with pytest.raises(QuotaExceeded):
+                await worker_b.check(db, "alice", "openai", estimated_tokens=30)
+            # 저장 전인 B 자신의 기록도 합계에 포함
+            worker_b.record("alice", "openai", "gpt-4o-mini", 10, 0)
+            status = await worker_b.get_status(db, "alice", "openai")
+            assert status.used == 90
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_flush_keeps_pending_records(engine):
+    async def scenario():
+        worker = _worker()
+        worker.record("alice", "openai", "gpt-4o-mini", 10, 10)
+        async with worker._sync_lock:  # 저장이 잠금에서 대기하는 동안 취소
+            task = asyncio.create_task(worker.flush())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        assert await worker.flush() == 1
+        async with AsyncSession(engine) as db:
+            total = await db.scalar(select(func.sum(UsageRecord.weighted_tokens)))
+        assert total == 20
+
+    asyncio.run(scenario())
+
+
+def test_flush_during_sync_does_not_hide_pending_usage(engine):
+    class GatedSession:
+        """동기화 조회가 끝나기 전에 flush가 끼어들도록 execute를 잠시 멈추는 세션"""
+
+        def __init__(self, db: AsyncSession, gate: asyncio.Event):
+            self.db = db
+            self.gate = gate
+
+        async def execute(self, statement):
+            await self.gate.wait()
+            return await self.db.execute(statement)
+
+    async def scenario():
+        worker = _worker()
+        worker.record("alice", "openai", "gpt-4o-mini", 50, 30)
+        gate = asyncio.Event()
+        async with AsyncSession(engine) as db:
+            sync_task = asyncio.create_task(worker.get_status(GatedSession(db, gate), "alice", "openai"))
+            await asyncio.sleep(0)  # 동기화가 잠금을 잡고 DB 조회에서 대기
+            flush_task = asyncio.create_task(worker.flush())
+            await asyncio.sleep(0)
+            gate.set()
+            during = await sync_task
+            assert await flush_task == 1
+            after = await worker.get_status(db, "alice", "openai")
+        return during.used, after.used
+
+    assert asyncio.run(scenario()) == (80, 80)
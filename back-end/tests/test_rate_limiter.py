@@ -0,0 +1,140 @@
+"""
+Rate Limiter 저장소 테스트
+Redis 대역(fakeredis)을 공유하는 두 Limiter로 워커 간 카운터 공유를 확인하고,
+저장소에 연결할 수 없을 때 메모리 카운터로 대체되어 제한이 계속 적용되는지,
+대체 카운터의 버스트 동작(대체 시점에 0부터 시작, 점진 충전 없는 moving-window)을 확인
+"""
+
+import socket
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from slowapi.errors import RateLimitExceeded
+
+from limits.storage import memory
+
+from app.core import rate_limiter
+from app.core.config import settings
+from app.core.rate_limiter import create_limiter, rate_limit_exceeded_handler
+
+fakeredis = pytest.importorskip("fakeredis")
+redis = pytest.importorskip("redis")
+
+LIMIT = "3/minute"
+
+
+def _make_app(storage_uri, monkeypatch, storage_options=None) -> TestClient:
+    """워커 하나에 해당하는 앱 (각자 Limiter 인스턴스를 가짐)"""
+    monkeypatch.setattr(settings, "rate_limit_storage_uri", storage_uri)
+    limiter = create_limiter(
+        key_func=lambda request: "client",
+        default_limits=[],
+        storage_options=storage_options
+    )
+
+    app = FastAPI()
+    app.state.limiter = limiter
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+
+    @app.get("/limited")
+    @limiter.limit(LIMIT)
+    def limited(request: Request):
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+@pytest.fixture
+def redis_server():
+    """Lua 스크립트(moving-window)를 지원하는 인메모리 Redis 서버"""
+    pytest.importorskip("lupa")
+    return fakeredis.FakeServer()
+
+
+def _redis_options(server) -> dict:
+    # 워커마다 별도 연결 풀 (같은 서버를 바라봄)
+    return {"connection_pool": redis.ConnectionPool(connection_class=getattr(fakeredis, "FakeRedisConnection", fakeredis.FakeConnection), server=server)}
+
+
+@pytest.fixture
+def unreachable_uri():
+    # 바로 닫아서 연결이 거부되는 포트
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"redis://127.0.0.1:{port}/0"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """메모리 카운터가 보는 시간을 직접 진행시키는 시계"""
+    now = {"value": 1_000_000.0}
+    monkeypatch.setattr(memory, "time", SimpleNamespace(time=lambda: now["value"]))
+
+    def advance(seconds: float):
+        now["value"] += seconds
+
+    return advance
+
+
+@pytest.mark.skipif(not rate_limiter.REDIS_AVAILABLE, reason="redis package is not installed")
+def test_workers_share_counters_through_redis(redis_server, monkeypatch):
+    worker_a = _make_app("redis://localhost:6379/0", monkeypatch, _redis_options(redis_server))
+    worker_b = _make_app("redis://localhost:6379/0", monkeypatch, _redis_options(redis_server))
+
+    statuses = [
+        worker_a.get("/limited").status_code,
+        worker_b.get("/limited").status_code,
+        worker_a.get("/limited").status_code,
+        worker_b.get("/limited").status_code,
+    ]
+
+    # 워커마다 따로 세면 4번째 요청도 통과하므로, 공유 저장소에서 합산되어야 함
+    assert statuses == [200, 200, 200, 429]
+    # 카운터가 메모리 대체가 아니라 Redis에 기록되었는지 확인
+    keys = redis.Redis(connection_pool=_redis_options(redis_server)["connection_pool"]).keys()
+    assert any(settings.rate_limit_key_prefix.encode() in key for key in keys)
+
+
+@pytest.mark.skipif(not rate_limiter.REDIS_AVAILABLE, reason="redis package is not installed")
+def test_falls_back_to_memory_when_redis_is_down(unreachable_uri, monkeypatch):
+    worker = _make_app(unreachable_uri, monkeypatch)
+
+    statuses = [worker.get("/limited").status_code for _ in range(4)]
+
+    # 저장소 오류로 500이 나거나 제한이 풀리지 않고 메모리 카운터로 계속 제한
+    assert statuses == [200, 200, 200, 429]
+
+
+@pytest.mark.skipif(not rate_limiter.REDIS_AVAILABLE, reason="redis package is not installed")
+def test_fallback_starts_counting_from_zero(redis_server, monkeypatch):
+    worker = _make_app("redis://localhost:6379/0", monkeypatch, _redis_options(redis_server))
+
+    before = [worker.get("/limited").status_code for _ in range(2)]
+    redis_server.connected = False  # 저장소 장애
+    after = [worker.get("/limited").status_code for _ in range(4)]
+
+    # Redis에 남은 2회는 이어받지 않으므로 장애 직후 한도(3회)만큼 다시 허용됨
+    assert before == [200, 200]
+    assert after == [200, 200, 200, 429]
+
+
+@pytest.mark.skipif(not rate_limiter.REDIS_AVAILABLE, reason="redis package is not installed")
+def test_fallback_has_no_gradual_refill(unreachable_uri, clock, monkeypatch):
+    worker = _make_app(unreachable_uri, monkeypatch)
+
+    statuses = []
+    for _ in range(3):
+        statuses.append(worker.get("/limited").status_code)  # 0초, 20초, 40초
+        clock(20)
+    clock(-1)
+    statuses.append(worker.get("/limited").status_code)  # 59초: 세 요청 모두 윈도우 안
+    clock(2)
+    statuses.append(worker.get("/limited").status_code)  # 61초: 첫 요청만 빠짐
+    statuses.append(worker.get("/limited").status_code)
+
+    # 토큰 버킷(분당 3회 = 20초마다 1개 충전)이라면 59초 시점에 이미 충전되어 허용되지만,
+    # moving-window는 가장 오래된 요청이 윈도우를 벗어난 만큼만 다시 허용
+    assert statuses == [200, 200, 200, 429, 200, 429]
@@ -0,0 +1,74 @@
+"""
+클라이언트 연결 종료 테스트
+스트리밍 도중 request.is_disconnected()가 참이 되면 제공자 스트림을 취소하고,
+그때까지 받은 부분 응답을 truncated로 저장하며 중단 메트릭을 남기는지 확인
+"""
+
+import asyncio
+
+import pytest
+
+from conftest import FakeProvider
+
+from app.core.metrics import metrics
+from app.core.sse import ClientDisconnected, watch_disconnect
+
+
+class FlakyRequest:
+    """몇 번째 확인부터 연결이 끊긴 것으로 응답하는 요청"""
+
+    def __init__(self, disconnect_on_check: int):
+        self.disconnect_on_check = disconnect_on_check
+        self.checks = 0
+
+    async def is_disconnected(self) -> bool:
+        self.checks += 1
+        return self.checks >= self.disconnect_on_check
+
+
+def _counter(name: str) -> float:
+    return metrics.snapshot()["counters"].get(name, 0)
+
+
+def test_watch_disconnect_cancels_pending_provider_call():
+    provider = FakeProvider(["a", "b"], hang=True)
+    received = []
+
+    async def scenario():
+        events = watch_disconnect(FlakyRequest(disconnect_on_check=2), provider.stream("openai", None), 0.02)
+        with pytest.raises(ClientDisconnected):
+            async for item in events:
+                received.append(item.content)
+        await asyncio.sleep(0)  # 취소된 제공자 호출이 정리될 시간
+
+    asyncio.run(scenario())
+    assert received == ["a", "b"]
+    assert provider.closed_at is not None
+
+
+def test_disconnect_saves_partial_reply_as_truncated(chat_harness):
+    provider = chat_harness.providers["openai"] = FakeProvider(["Hello", " wor"], hang=True)
+    cancelled_before = _counter("stream_cancelled_total")
+    saved_before = _counter("stream_cancelled_tokens_saved_total")
+
+    def received_partial(events):
+        return "".join(event.get("content", "") for event in events if event["type"] == "chunk") == "Hello wor"
+
+    async def scenario():
+        await chat_harness.post_stream(
+            "/api/v1/ai/chat/1",
+            {"message": "hi", "provider": "openai", "flush_policy": "immediate", "max_tokens": 100},
+            disconnect_when=received_partial
+        )
+        await chat_harness.settle()
+        return await chat_harness.messages()
+
+    messages = asyncio.run(scenario())
+    assert provider.closed_at is not None
+    assert [(m["sender"], m["content"], m["truncated"]) for m in messages] == [
+        ("user", "hi", False),
+        ("ai", "Hello wor", True),
+    ]
+    assert _counter("stream_cancelled_total") == cancelled_before + 1
+    # 요청 상한(100)에서 실제 출력 토큰을 뺀 만큼 절감된 것으로 기록
+    assert 0 < _counter("stream_cancelled_tokens_saved_total") - saved_before < 100
@@ -0,0 +1,44 @@
+"""
+재연결 스트림 테스트
+버퍼에서 밀려난 구간을 놓친 구독자에게만 놓친 본문을 resync로 보내고,
+보관하는 밀려난 본문이 상한을 넘지 않는지 확인
+"""
+
+import json
+from typing import List
+
+from app.services.stream_registry import ResumableStream
+
+
+def _stream(buffer_size: int = 3, resync_max_chars: int = 1000) -> ResumableStream:
+    stream = ResumableStream("s1", "alice", 1, buffer_size=buffer_size, grace_seconds=30,
+                             resync_max_chars=resync_max_chars)
+    for i in range(1, 11):  # event id 1..10, 본문 "c1".."c10"
+        stream.publish({'type': 'chunk', 'content': f"c{i}"})
+    return stream
+
+
+def _events(frames: List[str]) -> List[dict]:
+    return [json.loads(frame.split("data: ", 1)[1]) for frame in frames]
+
+
+def test_resync_only_for_subscribers_that_missed_events():
+    stream = _stream()
+    # 버퍼(8..10)를 이어받을 수 있는 구독자는 resync 없이 재생만
+    assert [e['type'] for e in _events(stream._replay(7))] == ['chunk'] * 3
+
+    # 5까지 받은 구독자는 놓친 6, 7만 resync로 받고 이어서 버퍼 재생
+    events = _events(stream._replay(5))
+    assert events[0] == {'type': 'resync', 'stream_id': 's1', 'content': "c6c7"}
+    assert [e['content'] for e in events[1:]] == ["c8", "c9", "c10"]
+
+
+def test_evicted_text_is_capped():
+    stream = _stream(resync_max_chars=6)
+    assert stream._evicted_chars <= 6
+    assert [text for _, text in stream._evicted] == ["c5", "c6", "c7"]
+
+    # 보관 구간 안에서 이어받으면 완전한 본문
+    assert _events(stream._replay(4))[0] == {'type': 'resync', 'stream_id': 's1', 'content': "c5c6c7"}
+    # 버린 구간까지 놓쳤으면 truncated 표시
+    assert _events(stream._replay(0))[0]['truncated'] is True
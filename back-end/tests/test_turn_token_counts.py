@@ -0,0 +1,80 @@
+"""
+히스토리 토큰 수 저장 테스트
+컨텍스트 구성 중 계산한 기존 메시지의 토큰 수가 (커밋하지 않는 조회 세션이 아니라)
+턴 저장 트랜잭션에서 기록되는지 확인 (단건 저장과 write-behind 배치 저장 모두)
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+import app.models  # noqa: F401 (관계 대상 모델 등록)
+from app.core.database import Base
+from app.crud.chat_crud import create_chat_turn_async, create_chat_turns_async
+from app.models import Chat, Message, User
+from app.services.context_builder import build_history_messages, estimate_tokens
+from app.services.turn_writer import ChatTurn
+
+pytest.importorskip("aiosqlite")
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'turns.db'}")
+
+    async def seed():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(engine) as db:
+            db.add(User(id="alice", email="alice@example.com", password="!", name="Alice"))
+            db.add(Chat(id=1, user_id="alice", title="chat", model="gpt-4o-mini", message_seq=2))
+            db.add_all([
+                Message(chat_id=1, sender="user", content="hello there", message_order=1),
+                Message(chat_id=1, sender="ai", content="안녕하세요", message_order=2),
+            ])
+            await db.commit()
+
+    asyncio.run(seed())
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+async def _stage(engine) -> ChatTurn:
+    turn = ChatTurn(chat_id=1, user_id="alice", user_message={"content": "next", "token_count": 1})
+    # 요청/생성용 조회 세션은 커밋하지 않고 닫힘
+    async with AsyncSession(engine) as db:
+        history = await build_history_messages(db, 1, 1000, new_token_counts=turn.token_counts)
+    assert len(history) == 2
+    turn.add_reply(0, "reply", "openai", "gpt-4o-mini", 1)
+    return turn
+
+
+async def _stored_counts(engine) -> dict:
+    async with AsyncSession(engine) as db:
+        rows = await db.execute(select(Message.message_order, Message.token_count).where(Message.message_order <= 2))
+        return dict(rows.all())
+
+
+def test_single_turn_saves_history_token_counts(engine):
+    async def scenario():
+        turn = await _stage(engine)
+        async with AsyncSession(engine) as db:
+            await create_chat_turn_async(
+                db, turn.chat_id, turn.user_id, turn.user_message, turn.image_rows, turn.replies,
+                turn.reply_slots, token_counts=turn.token_counts
+            )
+        return await _stored_counts(engine)
+
+    assert asyncio.run(scenario()) == {1: estimate_tokens("hello there"), 2: estimate_tokens("안녕하세요")}
+
+
+def test_batched_turns_save_history_token_counts(engine):
+    async def scenario():
+        turn = await _stage(engine)
+        async with AsyncSession(engine) as db:
+            assert await create_chat_turns_async(db, [turn]) == [True]
+        return await _stored_counts(engine)
+
+    assert asyncio.run(scenario()) == {1: estimate_tokens("hello there"), 2: estimate_tokens("안녕하세요")}
@@ -1,5 +1,77 @@
 import api from './axiosConfig'
 
+// 스트림 재연결 설정
+const MAX_RESUME_ATTEMPTS = 3
+const RESUME_DELAY_MS = 1000
+
+// SSE 응답을 읽으며 이벤트 처리. 종료 이벤트를 받으면 true, 연결이 먼저 끝나면 false 반환
+async function readEventStream(response, state, handleEvent) {
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  
+  try {
+    // eslint-disable-next-line no-constant-condition
+    while (true) {
+      const { done, value } = await reader.read()
+      
+      if (done) {
+        return false
+      }
+      
+      // 줄이 청크 경계에서 잘릴 수 있으므로 마지막 줄은 다음 청크와 합침
+      buffer += decoder.decode(value, { stream: true })
+      const lines = buffer.split('\n')
+      buffer = lines.pop()
+      
+      for (const line of lines) {
+        if (line.startsWith('id: ')) {
+          state.lastEventId = line.substring(4).trim()
+          continue
+        }
+        if (!line.startsWith('data: ')) continue
+        
+        const jsonStr = line.substring(6) // 'data: ' 제거
+        if (jsonStr.trim() === '') continue
+        
+        let data
+        try {
+          data = JSON.parse(jsonStr)
+        } catch (parseError) {
+          console.error('[aiApi] JSON 파싱 오류:', parseError, 'Raw line:', line)
+          continue
+        }
+        if (handleEvent(data)) {
+          return true
+        }
+      }
+    }
+  } finally {
+    reader.releaseLock()
+  }
+}
+
+// 끊긴 스트림에 재연결 (실패 시 null)
+async function resumeStream(baseUrl, chatId, state, attempt) {
+  await new Promise(resolve => setTimeout(resolve, RESUME_DELAY_MS * (attempt + 1)))
+  
+  const headers = {
+    'Authorization': `Bearer ${localStorage.getItem('access_token')}`,
+    'Accept': 'text/event-stream'
+  }
+  if (state.lastEventId) {
+    headers['Last-Event-ID'] = state.lastEventId
+  }
+  
+  try {
+    const response = await fetch(`${baseUrl}/api/v1/ai/chat/${chatId}/streams/${state.streamId}`, { headers })
+    return response.ok ? response : null
+  } catch (error) {
+    console.warn('[aiApi] 스트림 재연결 실패:', error)
+    return null
+  }
+}
+
 // AI 채팅 관련 API 함수들
 export const aiApi = {
 
@@ -34,16 +106,19 @@ export const aiApi = {
       }
       
       // SSE 연결 설정 (이제 /stream 없이 기본 채팅 엔드포인트)
-      const apiUrl = `${process.env.VUE_APP_API_BASE_URL || 'http://localhost:8000'}/api/v1/ai/chat/${chatRequest.chat_id}`
+      const baseUrl = process.env.VUE_APP_API_BASE_URL || 'http://localhost:8000'
+      const apiUrl = `${baseUrl}/api/v1/ai/chat/${chatRequest.chat_id}`
       
       // POST 요청을 위한 설정
-      const response = await fetch(apiUrl, {
+      let response = await fetch(apiUrl, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
           'Authorization': `Bearer ${localStorage.getItem('access_token')}`,
           'Accept': 'text/event-stream',
-          'Cache-Control': 'no-cache'
+          'Cache-Control': 'no-cache',
+          // 연결이 끊겨도 서버가 잠시 생성을 유지하도록 요청 (재연결 대기 시간 동안 토큰 계속 소비)
+          'X-Stream-Resumable': '1'
         },
         body: JSON.stringify(requestData)
       })
@@ -54,71 +129,78 @@ export const aiApi = {
         throw new Error(`HTTP ${response.status}: ${response.statusText}`)
       }
       
-      // 스트림 읽기
-      const reader = response.body.getReader()
-      const decoder = new TextDecoder()
-      let fullContent = ''
+      // 재연결에 필요한 스트림 ID와 마지막으로 받은 이벤트 ID
+      const state = {
+        streamId: response.headers.get('X-Stream-Id'),
+        lastEventId: null,
+        fullContent: '',
+        result: undefined
+      }
       
-      try {
-        // eslint-disable-next-line no-constant-condition
-        while (true) {
-          const { done, value } = await reader.read()
-          
-          if (done) {
-            break
-          }
-          
-          // 청크 디코딩
-          const chunk = decoder.decode(value, { stream: true })
-          const lines = chunk.split('\n')
-          
-          for (const line of lines) {
-            if (line.trim() === '') continue
+      // 이벤트 처리. 스트림이 끝나는 이벤트(end/error)면 true 반환
+      const handleEvent = (data) => {
+        switch (data.type) {
+          case 'start':
+            state.streamId = data.stream_id || state.streamId
+            return false
             
-            if (line.startsWith('data: ')) {
-              try {
-                const jsonStr = line.substring(6) // 'data: ' 제거
-                if (jsonStr.trim() === '') continue
-                
-                const data = JSON.parse(jsonStr)
-                
-                switch (data.type) {
-                  case 'start':
-                    break
-                    
-                  case 'chunk':
-                    if (data.content) {
-                      fullContent += data.content
-                      onChunk?.(data.content, fullContent)
-                    }
-                    break
-                    
-                  case 'end':
-                    onComplete?.(data.full_content || fullContent)
-                    return { content: data.full_content || fullContent }
-                    
-                  case 'error':
-                    console.error('[aiApi] 서버 오류:', data.error)
-                    onError?.(new Error(data.error))
-                    return
-                    
-                  default:
-                    console.warn('[aiApi] 알 수 없는 이벤트 타입:', data.type)
-                }
-              } catch (parseError) {
-                console.error('[aiApi] JSON 파싱 오류:', parseError, 'Raw line:', line)
-              }
+          case 'chunk':
+            if (data.content) {
+              state.fullContent += data.content
+              onChunk?.(data.content, state.fullContent)
             }
-          }
+            return false
+            
+          case 'resync':
+            // 재연결이 늦어 버퍼에서 밀려난 구간을 놓침: 놓친 본문을 이어 붙임
+            // (truncated면 서버가 보관하지 않은 구간이 빠져 있으므로 end 이벤트의 전체 본문으로 교체됨)
+            if (data.truncated) {
+              console.warn('[aiApi] 재연결 전 본문 일부를 받지 못했습니다. 완료 시 전체 본문으로 갱신합니다.')
+            }
+            state.fullContent += data.content || ''
+            onChunk?.(data.content || '', state.fullContent)
+            return false
+            
+          case 'end':
+            onComplete?.(data.full_content || state.fullContent)
+            state.result = { content: data.full_content || state.fullContent }
+            return true
+            
+          case 'error':
+            console.error('[aiApi] 서버 오류:', data.error)
+            onError?.(new Error(data.error))
+            return true
+            
+          default:
+            console.warn('[aiApi] 알 수 없는 이벤트 타입:', data.type)
+            return false
+        }
+      }
+      
+      // 연결이 끊기면 Last-Event-ID로 진행 중인 생성에 다시 연결
+      for (let attempt = 0; ; attempt++) {
+        let finished = false
+        try {
+          finished = await readEventStream(response, state, handleEvent)
+        } catch (streamError) {
+          console.warn('[aiApi] 스트림 연결 끊김:', streamError)
+        }
+        if (finished) {
+          return state.result
+        }
+        
+        response = state.streamId && attempt < MAX_RESUME_ATTEMPTS
+          ? await resumeStream(baseUrl, chatRequest.chat_id, state, attempt)
+          : null
+        if (!response) {
+          break
         }
-      } finally {
-        reader.releaseLock()
       }
       
       // 스트림이 완료되었지만 end 이벤트가 없었던 경우
-      if (fullContent) {
-        onComplete?.(fullContent)
-        return { content: fullContent }
+      if (state.fullContent) {
+        onComplete?.(state.fullContent)
+        return { content: state.fullContent }
       }
       
     } catch (error) {
@@ -94,15 +94,17 @@ export const chatApi = {
   },
 
   /**
-   * 채팅의 메시지 목록 조회 (페이지네이션 지원)
+   * 채팅의 메시지 목록 조회 (커서 기반 페이지네이션)
    * @param {string} chatId 
-   * @param {Object} params - { limit?: number, offset?: number }
+   * @param {Object} params - { limit?: number, before?: string, after?: string }
+   * @returns {{ data: { messages: Array, before_cursor: string|null, after_cursor: string|null, has_more: boolean } }}
    */
   async getMessages(chatId, params = {}) {
     try {
       const queryParams = new URLSearchParams()
       if (params.limit) queryParams.append('limit', params.limit)
-      if (params.offset) queryParams.append('offset', params.offset)
+      if (params.before) queryParams.append('before', params.before)
+      if (params.after) queryParams.append('after', params.after)
       
       const url = `/chats/${chatId}/messages${queryParams.toString() ? '?' + queryParams.toString() : ''}`
       const response = await api.get(url)
@@ -138,8 +138,8 @@ const chatStore = reactive({
       
       const chat = await chatApi.getChat(chatId)
       // 처음에는 최신 20개 메시지만 로드
-      const response = await chatApi.getMessages(chatId, { limit: 20, offset: 0 })
-      const messages = response.data
+      const response = await chatApi.getMessages(chatId, { limit: 20 })
+      const messages = response.data.messages
       
       
       // ID 28 메시지 찾아서 디버깅
@@ -188,7 +188,8 @@ const chatStore = reactive({
       
       const chatWithMessages = {
         ...chat,
-        messages: mappedMessages
+        messages: mappedMessages,
+        beforeCursor: response.data.before_cursor // 이전 메시지 페이지 커서 (없으면 null)
       }
       
       // 최근 메시지 정보 업데이트 제거 (성능 개선)